@@ -0,0 +1,148 @@
+"""
+Runs the benchmark suite and saves the results as JSON.
+
+    python -m benchmarks                                  # every benchmark
+    python -m benchmarks json_formatter handler           # some of them
+    python -m benchmarks --output results.json
+    python -m benchmarks --compare baseline.json          # exits 1 on regression
+
+Cases with a ``budget_us`` (e.g. the import time) also exit 1 when over it.
+"""
+
+import argparse
+import datetime as dt
+import importlib
+import json
+import logging
+import pkgutil
+import platform
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from benchmarks._helpers import report
+
+BENCHMARKS_DIR = Path(__file__).resolve().parent
+PREFIX = "bench_"
+
+
+def available_benchmarks() -> List[str]:
+    return sorted(
+        module.name[len(PREFIX) :]
+        for module in pkgutil.iter_modules([str(BENCHMARKS_DIR)])
+        if module.name.startswith(PREFIX)
+    )
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BENCHMARKS_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def metadata() -> Dict:
+    return {
+        "timestamp": dt.datetime.now(dt.timezone.utc).isoformat(),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+    }
+
+
+def run_benchmarks(names: List[str]) -> Dict[str, Dict]:
+    results = {}
+    for name in names:
+        module = importlib.import_module(f"benchmarks.{PREFIX}{name}")
+        print(f"# {name}")
+        results[name] = module.run()
+        for case, result in results[name].items():
+            report(case, result)
+    return results
+
+
+def compare(baseline: Dict, current: Dict, threshold: float) -> List[str]:
+    """
+    Prints the change of every case found in both runs, returns the cases
+    that got slower than ``threshold`` (a fraction of the baseline time).
+    """
+    regressions = []
+    for name, cases in current.items():
+        for case, result in cases.items():
+            before = baseline.get(name, {}).get(case)
+            if before is None:
+                continue
+            change = result["us_per_op"] / before["us_per_op"] - 1
+            flag = ""
+            if change > threshold:
+                flag = "  REGRESSION"
+                regressions.append(f"{name}: {case}")
+            print(
+                f"{case:<48} {before['us_per_op']:>9.2f} ->"
+                f" {result['us_per_op']:>9.2f} us/op {change:>+8.1%}{flag}"
+            )
+    return regressions
+
+
+def over_budget(results: Dict) -> List[str]:
+    cases = []
+    for name, cases_results in results.items():
+        for case, result in cases_results.items():
+            budget = result.get("budget_us")
+            if budget is not None and result["us_per_op"] > budget:
+                print(f"{case}: {result['us_per_op']:.0f} us, budget {budget} us")
+                cases.append(f"{name}: {case}")
+    return cases
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    available = available_benchmarks()
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument(
+        "names", nargs="*", metavar="NAME", help=f"one of: {', '.join(available)}"
+    )
+    parser.add_argument("--output", type=Path, help="where to save the results")
+    parser.add_argument(
+        "--compare", type=Path, help="results of a previous run to compare with"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.10,
+        help="slowdown reported as a regression, as a fraction (default: 0.10)",
+    )
+    args = parser.parse_args(argv)
+
+    unknown = sorted(set(args.names) - set(available))
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(unknown)}")
+
+    logging.disable(logging.NOTSET)
+    results = run_benchmarks(args.names or available)
+    document = {"metadata": metadata(), "results": results}
+    if args.output is not None:
+        args.output.write_text(json.dumps(document, indent=2) + "\n")
+        print(f"Results saved to {args.output}")
+
+    failed = bool(over_budget(results))
+    if args.compare is None:
+        return int(failed)
+    baseline = json.loads(args.compare.read_text())
+    print(f"# compared with {args.compare} ({baseline['metadata'].get('commit')})")
+    regressions = compare(baseline["results"], results, args.threshold)
+    if regressions:
+        print(f"{len(regressions)} regression(s) above {args.threshold:.0%}")
+        failed = True
+    return int(failed)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
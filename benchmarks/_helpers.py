@@ -0,0 +1,48 @@
+import logging
+import time
+from typing import Callable, Dict
+
+
+def make_record(
+    msg: str = "GET /api/v1/users 200",
+    level: int = logging.INFO,
+    extras: int = 0,
+) -> logging.LogRecord:
+    record = logging.LogRecord(
+        name="benchmark",
+        level=level,
+        pathname="/srv/app/handlers.py",
+        lineno=42,
+        msg=msg,
+        args=(),
+        exc_info=None,
+        func="handle",
+        sinfo=None,
+    )
+    for index in range(extras):
+        setattr(record, f"extra_{index}", f"value-{index}")
+    return record
+
+
+def measure(func: Callable[[], object], number: int, repeat: int = 5) -> Dict:
+    """Runs ``func`` ``number`` times per round and keeps the best round."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, time.perf_counter() - start)
+
+    return {
+        "number": number,
+        "best_seconds": best,
+        "ops_per_second": number / best,
+        "us_per_op": best / number * 1e6,
+    }
+
+
+def report(name: str, result: Dict) -> None:
+    print(
+        f"{name:<48} {result['ops_per_second']:>12,.0f} ops/s"
+        f" {result['us_per_op']:>9.2f} us/op"
+    )
@@ -0,0 +1,54 @@
+import io
+import json
+import logging
+
+from benchmarks._helpers import make_record, measure, report
+from logninja.binary_log import BinaryLogDecoder, BinaryRecordEncoder, MAGIC
+from logninja.ninja_json_formatter import NinjaJsonFormatter
+
+NUMBER = 20_000
+RECORDS = 10_000
+
+
+def run() -> dict:
+    results = {}
+    record = make_record(extras=3)
+    record.status_code = 200
+    record.duration = 0.0123
+
+    formatter = NinjaJsonFormatter()
+    results["binary_log.encode typical[vs json]"] = measure(
+        lambda: formatter.format(record), NUMBER
+    )
+    encoder = BinaryRecordEncoder()
+    results["binary_log.encode typical[binary]"] = measure(
+        lambda: encoder.encode(record), NUMBER
+    )
+
+    lines = "\n".join(formatter.format(record) for _ in range(RECORDS)).encode()
+    binary_encoder = BinaryRecordEncoder()
+    binary = MAGIC + b"".join(binary_encoder.encode(record) for _ in range(RECORDS))
+
+    def decode_json():
+        for line in lines.splitlines():
+            json.loads(line)
+
+    def decode_binary():
+        for _ in BinaryLogDecoder().iter_dicts(io.BytesIO(binary)):
+            pass
+
+    json_decode = measure(decode_json, 1)
+    json_decode["bytes_per_record"] = len(lines) / RECORDS
+    binary_decode = measure(decode_binary, 1)
+    binary_decode["bytes_per_record"] = len(binary) / RECORDS
+    results[f"binary_log.decode {RECORDS} records[vs json]"] = json_decode
+    results[f"binary_log.decode {RECORDS} records[binary]"] = binary_decode
+    return results
+
+
+if __name__ == "__main__":
+    logging.disable(logging.NOTSET)
+    for name, result in run().items():
+        report(name, result)
+        if "bytes_per_record" in result:
+            print(f"{'':<48} {result['bytes_per_record']:>12.1f} bytes/record")
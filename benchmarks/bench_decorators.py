@@ -0,0 +1,46 @@
+import logging
+
+from benchmarks._helpers import measure, report
+from logninja.decorators import log_execution
+
+NUMBER = 50_000
+
+
+def add(a, b, scale=1):
+    return (a + b) * scale
+
+
+def first(items, default=None):
+    return items[0] if items else default
+
+
+def run() -> dict:
+    logger = logging.getLogger("benchmarks.decorators")
+    logger.propagate = False
+    logger.addHandler(logging.NullHandler())
+    decorated = log_execution(logger=logger, level=logging.DEBUG)(add)
+    decorated_first = log_execution(logger=logger, level=logging.DEBUG)(first)
+    aggregated = log_execution(logger=logger, level=logging.DEBUG, aggregate=True)(add)
+    payload = list(range(1_000))
+
+    results = {
+        "add undecorated": measure(lambda: add(1, 2, scale=3), NUMBER),
+        "first undecorated, 1k-item arg": measure(lambda: first(payload), NUMBER),
+    }
+    for label, level in (("disabled", logging.INFO), ("enabled", logging.DEBUG)):
+        logger.setLevel(level)
+        results[f"log_execution {label}"] = measure(
+            lambda: decorated(1, 2, scale=3), NUMBER
+        )
+        results[f"log_execution {label}, 1k-item arg"] = measure(
+            lambda: decorated_first(payload), NUMBER // 10
+        )
+    results["log_execution aggregate"] = measure(
+        lambda: aggregated(1, 2, scale=3), NUMBER
+    )
+    return results
+
+
+if __name__ == "__main__":
+    for name, result in run().items():
+        report(name, result)
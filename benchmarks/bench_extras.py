@@ -0,0 +1,28 @@
+import logging
+
+from benchmarks._helpers import make_record, measure, report
+from logninja.extras import compile_extras
+from logninja.options import All
+from logninja.utils import get_extras
+
+NUMBER = 50_000
+
+
+def run() -> dict:
+    results = {}
+    get_all_extras = compile_extras(All())
+    for count in (0, 5, 50):
+        record = make_record(extras=count)
+        results[f"extras[dict diff (old), {count} extras]"] = measure(
+            lambda: get_extras(record, All()), NUMBER
+        )
+        results[f"extras[compile_extras, {count} extras]"] = measure(
+            lambda: get_all_extras(record), NUMBER
+        )
+    return results
+
+
+if __name__ == "__main__":
+    logging.disable(logging.NOTSET)
+    for name, result in run().items():
+        report(name, result)
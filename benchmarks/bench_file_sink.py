@@ -0,0 +1,41 @@
+import logging
+import os
+import tempfile
+
+from benchmarks._helpers import make_record, measure, report
+from logninja.configs import BufferConfig, IndexConfig
+from logninja.ninja_file_handler import NinjaFileHandler
+from logninja.ninja_json_formatter import NinjaJsonFormatter
+from logninja.options import All
+
+NUMBER = 20_000
+
+
+def run() -> dict:
+    results = {}
+    sinks = {
+        "unbuffered": (None, None),
+        "buffered": (BufferConfig(), None),
+        "buffered, indexed": (BufferConfig(), IndexConfig()),
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        for name, (buffer_config, index_config) in sinks.items():
+            handler = NinjaFileHandler(
+                os.path.join(directory, f"{name}.jsonl"),
+                buffer_config=buffer_config,
+                index_config=index_config,
+            )
+            handler.setFormatter(NinjaJsonFormatter(extras=All()))
+            record = make_record(extras=5)
+
+            results[f"file_sink.emit[{name}]"] = measure(
+                lambda: handler.handle(record), NUMBER
+            )
+            handler.close()
+    return results
+
+
+if __name__ == "__main__":
+    logging.disable(logging.NOTSET)
+    for name, result in run().items():
+        report(name, result)
@@ -0,0 +1,28 @@
+import logging
+
+from benchmarks._helpers import make_record, measure, report
+from logninja.ninja_formatter import NinjaFormatter
+from logninja.options import All
+
+NUMBER = 20_000
+
+
+def run() -> dict:
+    results = {}
+    cases = {
+        "no extras": (None, make_record()),
+        "All, 5 extras": (All(), make_record(extras=5)),
+        "All, 50 extras": (All(), make_record(extras=50)),
+    }
+    for name, (extras, record) in cases.items():
+        formatter = NinjaFormatter(extras=extras)
+        results[f"formatter.format {name}"] = measure(
+            lambda: formatter.format(record), NUMBER
+        )
+    return results
+
+
+if __name__ == "__main__":
+    logging.disable(logging.NOTSET)
+    for name, result in run().items():
+        report(name, result)
@@ -0,0 +1,44 @@
+import io
+import logging
+
+from benchmarks._helpers import make_record, measure, report
+from logninja.ninja_console import NinjaConsole
+from logninja.ninja_formatter import NinjaFormatter
+from logninja.ninja_handler import NinjaHandler
+from logninja.ninja_json_formatter import NinjaJsonFormatter
+from logninja.options import All
+
+NUMBER = 20_000
+
+
+def _null_console() -> NinjaConsole:
+    console = NinjaConsole()
+    console.stream = io.StringIO()
+    return console
+
+
+def run() -> dict:
+    results = {}
+    formatters = {
+        "json": NinjaJsonFormatter(extras=All()),
+        "text": NinjaFormatter(extras=All()),
+    }
+    for name, formatter in formatters.items():
+        console = _null_console()
+        handler = NinjaHandler(formatter=formatter, console=console)
+        handler.stream = console.stream
+        record = make_record(extras=5)
+
+        def emit():
+            handler.emit(record)
+            console.stream.seek(0)
+            console.stream.truncate()
+
+        results[f"handler.emit[{name}]"] = measure(emit, NUMBER)
+    return results
+
+
+if __name__ == "__main__":
+    logging.disable(logging.NOTSET)
+    for name, result in run().items():
+        report(name, result)
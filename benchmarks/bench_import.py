@@ -0,0 +1,49 @@
+"""
+Import time of the package, as reported by ``python -X importtime`` in a
+fresh interpreter, checked against a budget.
+"""
+
+import subprocess
+import sys
+from typing import Dict
+
+REPEAT = 7
+
+# Cumulative import time allowed, in microseconds, on top of the stdlib
+# ``logging`` import every application already pays for.
+BUDGETS_US = {
+    "logninja": 15_000,
+    "logninja.configs": 40_000,
+}
+
+
+def import_time_us(module: str) -> int:
+    """Cumulative import time of ``module``, without its ``logging`` import."""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+    times = {}
+    for line in stderr.splitlines():
+        _, _, cumulative, name = (
+            part.strip() for part in line.replace(":", "|").split("|")
+        )
+        if name in ("logging", module):
+            times[name] = int(cumulative)
+    return times[module] - times.get("logging", 0)
+
+
+def run() -> Dict[str, Dict]:
+    results = {}
+    for module, budget in BUDGETS_US.items():
+        best = min(import_time_us(module) for _ in range(REPEAT))
+        results[f"import {module}"] = {
+            "number": 1,
+            "best_seconds": best / 1e6,
+            "ops_per_second": 1e6 / best,
+            "us_per_op": best,
+            "budget_us": budget,
+        }
+    return results
@@ -0,0 +1,32 @@
+import logging
+
+from benchmarks._helpers import make_record, measure, report
+from logninja.ninja_json_formatter import NinjaJsonFormatter
+from logninja.options import All, Only
+
+NUMBER = 20_000
+
+
+def run() -> dict:
+    results = {}
+    cases = {
+        "no extras[None]": (None, make_record()),
+        "typical[All, 3 extras]": (All(), make_record(extras=3)),
+        "many extras[All, 50 extras]": (All(), make_record(extras=50)),
+        "many extras[Only 5 of 50]": (
+            Only([f"extra_{index}" for index in range(5)]),
+            make_record(extras=50),
+        ),
+    }
+    for name, (extras, record) in cases.items():
+        formatter = NinjaJsonFormatter(extras=extras)
+        results[f"json_formatter.format {name}"] = measure(
+            lambda: formatter.format(record), NUMBER
+        )
+    return results
+
+
+if __name__ == "__main__":
+    logging.disable(logging.NOTSET)
+    for name, result in run().items():
+        report(name, result)
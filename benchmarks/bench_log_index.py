@@ -0,0 +1,72 @@
+import datetime as dt
+import logging
+import os
+import tempfile
+
+import orjson
+
+from benchmarks._helpers import make_record, measure, report
+from logninja.configs import BufferConfig, IndexConfig
+from logninja.log_index import LogReader
+from logninja.ninja_file_handler import NinjaFileHandler
+from logninja.ninja_json_formatter import NinjaJsonFormatter
+
+RECORDS = 200_000
+ERROR_EVERY = 20_000
+
+
+def write_log(filename: str) -> None:
+    handler = NinjaFileHandler(
+        filename, buffer_config=BufferConfig(), index_config=IndexConfig()
+    )
+    handler.setFormatter(NinjaJsonFormatter())
+    for index in range(RECORDS):
+        level = logging.ERROR if index % ERROR_EVERY == 0 else logging.INFO
+        record = make_record(level=level, extras=3)
+        # 1000 records per second of logs.
+        record.created = 1_700_000_000 + index / 1000
+        handler.handle(record)
+    handler.close()
+
+
+def scan(filename: str, since: float, until: float, min_level: int) -> int:
+    """What answering the query takes without the index."""
+    count = 0
+    with open(filename, "rb") as file:
+        for line in file:
+            log = orjson.loads(line)
+            if logging.getLevelName(log["level"]) < min_level:
+                continue
+            created = dt.datetime.fromisoformat(log["timestamp"]).timestamp()
+            count += since <= created <= until
+    return count
+
+
+def run() -> dict:
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "logs.jsonl")
+        write_log(filename)
+        start = 1_700_000_000 + RECORDS / 1000 / 2
+        queries = {
+            "errors": (None, None, logging.ERROR),
+            "1s window": (start, start + 1, 0),
+        }
+        for name, (since, until, min_level) in queries.items():
+            results[f"log_index.query {name}[full scan]"] = measure(
+                lambda: scan(filename, since or 0, until or 1e12, min_level), 1, 3
+            )
+            results[f"log_index.query {name}[index]"] = measure(
+                lambda: sum(
+                    1 for _ in LogReader(filename).iter_lines(since, until, min_level)
+                ),
+                1,
+                3,
+            )
+    return results
+
+
+if __name__ == "__main__":
+    logging.disable(logging.NOTSET)
+    for name, result in run().items():
+        report(name, result)
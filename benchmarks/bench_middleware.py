@@ -0,0 +1,106 @@
+import asyncio
+import contextvars
+import logging
+
+from benchmarks._helpers import measure, report
+from logninja.asgi.middleware import LogNinjaASGIMiddleware
+
+NUMBER = 5_000
+
+request_id = contextvars.ContextVar("x-request-id", default=None)
+tenant = contextvars.ContextVar("x-tenant", default=None)
+
+SCOPE = {
+    "type": "http",
+    "asgi": {"version": "3.0"},
+    "http_version": "1.1",
+    "method": "GET",
+    "scheme": "http",
+    "path": "/api/v1/users/42",
+    "raw_path": b"/api/v1/users/42",
+    "query_string": b"expand=orders",
+    "root_path": "",
+    "headers": [
+        (b"host", b"api.example.com"),
+        (b"user-agent", b"benchmark/1.0"),
+        (b"accept", b"application/json"),
+        (b"accept-encoding", b"gzip, deflate"),
+        (b"connection", b"keep-alive"),
+        (b"x-request-id", b"0f8fad5b-d9cb-469f-a165-70867728950e"),
+        (b"x-tenant", b"acme"),
+        (b"authorization", b"Bearer abc.def.ghi"),
+    ],
+    "client": ("10.0.0.1", 51000),
+    "server": ("10.0.0.2", 80),
+}
+START = {"type": "http.response.start", "status": 200, "headers": []}
+BODY = {"type": "http.response.body", "body": b"{}", "more_body": False}
+
+
+async def noop_app(scope, receive, send):
+    await send(START)
+    await send(BODY)
+
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def send(message):
+    pass
+
+
+def _measure_app(app, loop) -> dict:
+    async def run_batch():
+        for _ in range(NUMBER):
+            await app(dict(SCOPE), receive, send)
+
+    return measure(lambda: loop.run_until_complete(run_batch()), 1)
+
+
+def run() -> dict:
+    logger = logging.getLogger("benchmarks.middleware")
+    logger.propagate = False
+    logger.addHandler(logging.NullHandler())
+    middleware = LogNinjaASGIMiddleware(
+        noop_app,
+        logger=logger,
+        contextvars_by_headers=[request_id, tenant],
+    )
+    after_response = LogNinjaASGIMiddleware(
+        noop_app,
+        logger=logger,
+        contextvars_by_headers=[request_id, tenant],
+        log_after_response=True,
+    )
+
+    loop = asyncio.new_event_loop()
+    try:
+        baseline = _measure_app(noop_app, loop)
+        results = {"middleware[no-op app]": baseline}
+        for label, app, level in (
+            ("logger disabled", middleware, logging.WARNING),
+            ("logging", middleware, logging.INFO),
+            ("logging after response", after_response, logging.INFO),
+        ):
+            logger.setLevel(level)
+            result = _measure_app(app, loop)
+            result["added_us_per_request"] = (
+                (result["best_seconds"] - baseline["best_seconds"]) / NUMBER * 1e6
+            )
+            results[f"middleware[{label}]"] = result
+    finally:
+        loop.close()
+
+    for result in results.values():
+        result["number"] = NUMBER
+        result["ops_per_second"] = NUMBER / result["best_seconds"]
+        result["us_per_op"] = result["best_seconds"] / NUMBER * 1e6
+    return results
+
+
+if __name__ == "__main__":
+    for name, result in run().items():
+        report(name, result)
+        if "added_us_per_request" in result:
+            print(f"{'':<48} +{result['added_us_per_request']:.2f} us/request")
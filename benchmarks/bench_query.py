@@ -0,0 +1,93 @@
+import logging
+import os
+import random
+import tempfile
+
+import orjson
+
+from benchmarks._helpers import make_record, measure, report
+from logninja.configs import BufferConfig
+from logninja.extras import All
+from logninja.histogram import LogLinearHistogram
+from logninja.ninja_file_handler import NinjaFileHandler
+from logninja.ninja_json_formatter import NinjaJsonFormatter
+from logninja.query import Predicate, Query, run_query
+
+RECORDS = 100_000
+URLS = ["/api/v1/users", "/api/v1/orders", "/api/v1/items", "/health"]
+
+
+def write_log(filename: str) -> None:
+    """Access logs shaped like the ones of ``LogNinjaASGIMiddleware``."""
+    rng = random.Random(1234)
+    handler = NinjaFileHandler(filename, buffer_config=BufferConfig())
+    handler.setFormatter(NinjaJsonFormatter(extras=All()))
+    for index in range(RECORDS):
+        status_code = 500 if index % 50 == 0 else 200
+        record = make_record(
+            level=logging.ERROR if status_code == 500 else logging.INFO
+        )
+        record.created = 1_700_000_000 + index / 1000
+        record.url = rng.choice(URLS)
+        record.method = "GET"
+        record.status_code = status_code
+        record.client_host = "127.0.0.1"
+        record.client_port = 50000 + index % 1000
+        record.duration = int(rng.lognormvariate(15, 1))
+        handler.handle(record)
+    handler.close()
+
+
+def scan_errors(filename: str) -> int:
+    """What the query takes parsing every line."""
+    count = 0
+    with open(filename, "rb") as file:
+        for line in file:
+            count += orjson.loads(line)["status_code"] >= 500
+    return count
+
+
+def scan_durations(filename: str) -> dict:
+    groups = {}
+    with open(filename, "rb") as file:
+        for line in file:
+            log = orjson.loads(line)
+            histogram = groups.get(log["url"])
+            if histogram is None:
+                histogram = groups[log["url"]] = LogLinearHistogram(64)
+            histogram.record(log["duration"])
+    return {url: histogram.percentile(99) for url, histogram in groups.items()}
+
+
+def query(filename: str, query: Query) -> int:
+    return sum(
+        len(lines) + sum(group[0] for group in aggregation.groups.values())
+        for lines, aggregation in run_query([filename], query, jobs=1)
+    )
+
+
+def run() -> dict:
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "logs.jsonl")
+        write_log(filename)
+        errors = Query(predicates=[Predicate.parse("status_code=500")], count_only=True)
+        durations = Query(group_by=["url"], value_field="duration")
+
+        results["query errors[full parse]"] = measure(
+            lambda: scan_errors(filename), 1, 3
+        )
+        results["query errors[query]"] = measure(lambda: query(filename, errors), 1, 3)
+        results["query p99 duration per url[full parse]"] = measure(
+            lambda: scan_durations(filename), 1, 3
+        )
+        results["query p99 duration per url[query]"] = measure(
+            lambda: query(filename, durations), 1, 3
+        )
+    return results
+
+
+if __name__ == "__main__":
+    logging.disable(logging.NOTSET)
+    for name, result in run().items():
+        report(name, result)
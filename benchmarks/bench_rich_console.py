@@ -0,0 +1,77 @@
+import io
+import logging
+
+from benchmarks._helpers import make_record, measure, report
+from logninja.ninja_formatter import NinjaFormatter
+from logninja.ninja_handler import NinjaHandler
+from logninja.ninja_rich_console import NinjaRichConsole
+from logninja.options import All
+
+NUMBER = 2_000
+UNIQUE_LINES = 5_000
+
+
+def _lines(count: int):
+    formatter = NinjaFormatter(extras=All())
+    messages = [
+        'GET /api/v1/users/42 HTTP/1.1" 200',
+        'POST /api/v1/orders HTTP/1.1" 503',
+        "Loading configuration file /etc/app/settings.toml",
+    ]
+    return [
+        formatter.format(make_record(messages[i % len(messages)], extras=3))
+        for i in range(count)
+    ]
+
+
+def run() -> dict:
+    console = NinjaRichConsole(
+        file=io.StringIO(), force_terminal=True, color_system="truecolor", width=200
+    )
+    repeated = _lines(3)
+    # More different lines than any cache holds, so none is served from it.
+    unique = [f"{line} [id={i}]" for i, line in enumerate(_lines(UNIQUE_LINES))]
+
+    def print_lines(lines):
+        def run_batch():
+            for line in lines:
+                console.print(line)
+            console.file.seek(0)
+            console.file.truncate()
+
+        return run_batch
+
+    def theme_lines(lines):
+        def run_batch():
+            for line in lines:
+                console._custom_theme(line)
+
+        return run_batch
+
+    results = {}
+    for label, lines in (("repeated", repeated * (NUMBER // 3)), ("unique", unique)):
+        for name, batch in (("print", print_lines), ("highlight", theme_lines)):
+            result = measure(batch(lines), 1)
+            result["number"] = len(lines)
+            result["ops_per_second"] = len(lines) / result["best_seconds"]
+            result["us_per_op"] = result["best_seconds"] / len(lines) * 1e6
+            results[f"rich_console.{name}[{label}]"] = result
+
+    handler = NinjaHandler(formatter=NinjaFormatter(extras=All()), console=console)
+    record = make_record('GET /api/v1/users/42 HTTP/1.1" 200', extras=3)
+
+    def emit():
+        handler.emit(record)
+        console.file.seek(0)
+        console.file.truncate()
+
+    for label, print_fields in (("formatted string", False), ("fields", True)):
+        handler.print_fields = print_fields
+        results[f"handler.emit[{label}]"] = measure(emit, NUMBER)
+    return results
+
+
+if __name__ == "__main__":
+    logging.disable(logging.NOTSET)
+    for name, result in run().items():
+        report(name, result)
@@ -0,0 +1,43 @@
+import logging
+import sys
+
+from benchmarks._helpers import measure, report
+from logninja.traceback import format_exception
+
+NUMBER = 200
+
+
+def _raise_at_depth(depth: int, payload=None):
+    if depth <= 0:
+        raise ValueError("boom")
+    big_local = payload  # noqa: F841
+    _raise_at_depth(depth - 1, payload)
+
+
+def _exc_info(depth: int, payload=None):
+    try:
+        _raise_at_depth(depth, payload)
+    except ValueError:
+        return sys.exc_info()
+
+
+def run() -> dict:
+    results = {}
+    cases = {
+        "shallow[depth 5]": _exc_info(5),
+        "deep[depth 500]": _exc_info(500),
+        "deep[depth 500, 100k item local]": _exc_info(500, list(range(100_000))),
+    }
+    for name, exc_info in cases.items():
+        for show_locals in (False, True):
+            label = "locals" if show_locals else "no locals"
+            results[f"format_exception {name} {label}"] = measure(
+                lambda: format_exception(exc_info, show_locals=show_locals), NUMBER
+            )
+    return results
+
+
+if __name__ == "__main__":
+    logging.disable(logging.NOTSET)
+    for name, result in run().items():
+        report(name, result)
@@ -1,15 +1,91 @@
+from __future__ import annotations
+
+import atexit
+import importlib
 import logging
+from typing import TYPE_CHECKING, Any, Optional
 
-from logninja.configs import LogConsoleConfig, LogFileConfig, RootLoggerConfig
+from logninja.instrumentation import StatsReporter
+from logninja.instrumentation import stats as stats
 from logninja.logger import logger
-from logninja.ninja_handler import NinjaHandler
+
+if TYPE_CHECKING:
+    from logninja.aggregator import LogAggregator
+    from logninja.configs import (
+        LogConsoleConfig,
+        LogFileConfig,
+        QueueConfig,
+        RootLoggerConfig,
+        StatsReportConfig,
+    )
+
+# Importing the package only imports what ``logger`` and ``stats`` need. The
+# configs, formatters and handlers are imported by ``setup_logging``, or on
+# first access to one of these attributes.
+_LAZY_ATTRIBUTES = {
+    "log_execution": "logninja.decorators",
+    "LogAggregator": "logninja.aggregator",
+    "NinjaBinaryFileHandler": "logninja.binary_log",
+    "NinjaSocketHandler": "logninja.aggregator",
+    "LogConsoleConfig": "logninja.configs",
+    "LogFileConfig": "logninja.configs",
+    "QueueConfig": "logninja.configs",
+    "RootLoggerConfig": "logninja.configs",
+    "StatsReportConfig": "logninja.configs",
+    "NinjaFileHandler": "logninja.ninja_file_handler",
+    "NinjaHandler": "logninja.ninja_handler",
+    "NinjaQueueHandler": "logninja.ninja_queue_handler",
+    "NinjaRotatingFileHandler": "logninja.rotating_file_handler",
+}
+
+# Default of ``log_console_config``, which is only built by ``setup_logging``
+# since None already means no console sink.
+_DEFAULT_CONSOLE: Any = object()
+
+
+def __getattr__(name: str):
+    module = _LAZY_ATTRIBUTES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
 
 
 def setup_logging(
-    log_file_config: LogFileConfig = None,
-    log_console_config: LogConsoleConfig = LogConsoleConfig(),
-    root_logger_config: RootLoggerConfig = RootLoggerConfig(),
+    log_file_config: Optional[LogFileConfig] = None,
+    log_console_config: Optional[LogConsoleConfig] = _DEFAULT_CONSOLE,
+    root_logger_config: Optional[RootLoggerConfig] = None,
+    async_mode: bool = False,
+    stats_report_config: Optional[StatsReportConfig] = None,
 ) -> None:
+    """
+    Configures the root logger with the given sinks.
+
+    Args:
+        log_file_config (LogFileConfig): File sink configuration.
+        log_console_config (LogConsoleConfig | None): Console sink
+            configuration. Defaults to a ``LogConsoleConfig()``, pass None for
+            no console sink.
+        root_logger_config (RootLoggerConfig | None): Root logger
+            configuration. Defaults to a ``RootLoggerConfig()``.
+        async_mode (bool): Whether every sink should format and write on a
+            background listener. Sinks with their own ``queue_config`` are
+            always asynchronous. Defaults to False.
+        stats_report_config (StatsReportConfig | None): When given, the
+            ``stats()`` of the handlers are logged periodically by the
+            ``logninja.stats`` logger. Defaults to None.
+    """
+    from logninja.configs import LogConsoleConfig, RootLoggerConfig
+
+    if log_console_config is _DEFAULT_CONSOLE:
+        log_console_config = LogConsoleConfig()
+    if root_logger_config is None:
+        root_logger_config = RootLoggerConfig()
     if log_file_config is None and log_console_config is None:
         raise ValueError(
             "At least one of log_file_config or log_console_config must be provided"
@@ -20,11 +96,17 @@ def setup_logging(
 
     if log_console_config:
         console_handler = _setup_log_console_handler(log_console_config)
+        console_handler = _wrap_in_queue_handler(
+            console_handler, log_console_config.queue_config, async_mode
+        )
         root_logger.addHandler(console_handler)
         logger.debug("Console logging setup complete")
 
     if log_file_config:
         file_handler = _setup_log_file_handler(log_file_config)
+        file_handler = _wrap_in_queue_handler(
+            file_handler, log_file_config.queue_config, async_mode
+        )
         root_logger.addHandler(file_handler)
         logger.debug("File logging setup complete")
 
@@ -32,29 +114,156 @@ def setup_logging(
         for filter_ in root_logger_config.filters:
             handler.addFilter(filter_)
 
+    if stats_report_config is not None:
+        reporter = StatsReporter(
+            interval=stats_report_config.interval, level=stats_report_config.level
+        ).start()
+        atexit.register(reporter.stop)
+
     logger.debug("Logging setup complete", extra=dict(users="adfdfs"))
 
 
 def _setup_log_console_handler(
     log_console_config: LogConsoleConfig,
 ) -> logging.StreamHandler:
+    from logninja.ninja_handler import NinjaHandler
+
     console_handler = NinjaHandler(
         formatter=log_console_config.fmt,
         console=log_console_config.console,
         print_exception=log_console_config.print_exeption,
         sys_excepthook=log_console_config.sys_excepthook,
+        buffer_config=log_console_config.buffer_config,
     )
     console_handler.setLevel(log_console_config.level)
     return console_handler
 
 
-def _setup_log_file_handler(log_file_config: LogFileConfig) -> logging.FileHandler:
+def start_log_aggregator(log_file_config: LogFileConfig) -> LogAggregator:
+    """
+    Starts the single writer of the aggregator mode, in a background thread of
+    the calling process, usually the pre-fork server's master.
+
+    Workers call ``setup_logging`` with the same ``log_file_config``: they
+    format their records and send them over ``aggregator_config.address``,
+    while the aggregator writes them to the file described by the rest of
+    the config (rotation, buffering...).
+
+    Args:
+        log_file_config (LogFileConfig): File sink configuration, with an
+            ``aggregator_config``.
+
+    Returns:
+        LogAggregator: The running aggregator, closed at exit.
+    """
+    import dataclasses
+
+    from logninja.aggregator import LogAggregator, default_address
+
+    if log_file_config.aggregator_config is None:
+        raise ValueError("log_file_config has no aggregator_config")
+
+    file_handler = _setup_log_file_handler(
+        dataclasses.replace(log_file_config, aggregator_config=None)
+    )
+    address = log_file_config.aggregator_config.address or default_address(
+        log_file_config.filename
+    )
+    aggregator = LogAggregator(address, file_handler).start()
+    atexit.register(aggregator.close)
+    return aggregator
+
+
+def _setup_log_file_handler(log_file_config: LogFileConfig) -> logging.Handler:
+    from logninja.aggregator import NinjaSocketHandler, default_address
+    from logninja.binary_log import NinjaBinaryFileHandler
+    from logninja.ninja_file_handler import NinjaFileHandler
+    from logninja.options import All
+    from logninja.rotating_file_handler import NinjaRotatingFileHandler
+
+    if log_file_config.binary and (
+        log_file_config.rotation_config is not None
+        or log_file_config.buffer_config is not None
+        or log_file_config.aggregator_config is not None
+        or log_file_config.index_config is not None
+    ):
+        raise ValueError(
+            "Binary log files don't support rotation_config, buffer_config,"
+            " aggregator_config or index_config"
+        )
+
+    aggregator_config = log_file_config.aggregator_config
+    if aggregator_config is not None:
+        socket_handler = NinjaSocketHandler(
+            aggregator_config.address or default_address(log_file_config.filename),
+            max_batch_records=aggregator_config.max_batch_records,
+            max_batch_bytes=aggregator_config.max_batch_bytes,
+            max_latency=aggregator_config.max_latency,
+            max_buffered_records=aggregator_config.max_buffered_records,
+        )
+        socket_handler.setFormatter(fmt=log_file_config.fmt)
+        socket_handler.setLevel(log_file_config.level)
+        return socket_handler
+
     if log_file_config.clear_file_on_setup:
         with open(log_file_config.filename, "w") as f:
             f.write("")
 
-    file_handler = logging.FileHandler(log_file_config.filename)
+    if log_file_config.binary:
+        binary_handler = NinjaBinaryFileHandler(
+            log_file_config.filename,
+            extras=getattr(log_file_config.fmt, "extras", All()),
+            encoder=getattr(log_file_config.fmt, "encoder", None),
+        )
+        binary_handler.setLevel(log_file_config.level)
+        return binary_handler
+
+    if log_file_config.rotation_config is not None:
+        file_handler = NinjaRotatingFileHandler(
+            log_file_config.filename,
+            rotation_config=log_file_config.rotation_config,
+            buffer_config=log_file_config.buffer_config,
+            index_config=log_file_config.index_config,
+        )
+    else:
+        file_handler = NinjaFileHandler(
+            log_file_config.filename,
+            buffer_config=log_file_config.buffer_config,
+            index_config=log_file_config.index_config,
+        )
     file_handler.setFormatter(fmt=log_file_config.fmt)
     file_handler.setLevel(log_file_config.level)
 
     return file_handler
+
+
+def _wrap_in_queue_handler(
+    handler: logging.Handler,
+    queue_config: Optional[QueueConfig],
+    async_mode: bool,
+) -> logging.Handler:
+    from logninja.configs import QueueConfig
+    from logninja.ninja_queue_handler import NinjaQueueHandler
+
+    if queue_config is None:
+        if not async_mode:
+            return handler
+        queue_config = QueueConfig()
+
+    queue_handler = NinjaQueueHandler(
+        handler,
+        maxsize=queue_config.maxsize,
+        overflow_policy=queue_config.overflow_policy,
+    )
+    queue_handler.setLevel(handler.level)
+    queue_handler.start()
+    atexit.register(_close_queue_handler, queue_handler)
+    return queue_handler
+
+
+def _close_queue_handler(queue_handler: logging.Handler) -> None:
+    from logninja.execution_stats import emit_pending_stats
+
+    # Summaries still pending at exit must be logged before the listener stops.
+    emit_pending_stats()
+    queue_handler.close()
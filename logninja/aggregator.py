@@ -0,0 +1,395 @@
+import errno
+import hashlib
+import logging
+import os
+import selectors
+import socket
+import stat
+import struct
+import tempfile
+import threading
+import time
+from collections import deque
+from typing import Deque, List, Optional, Tuple
+
+from logninja.instrumentation import encoded_size, register_handler
+from logninja.ninja_file_handler import BATCH_ATTR
+
+# Payload size and highest level of the batch, followed by its records.
+FRAME_HEADER = struct.Struct(">IH")
+# Size, creation time and level of a record, followed by the formatted record
+# encoded as UTF-8. The aggregator indexes the file with them.
+RECORD_HEADER = struct.Struct(">IdH")
+
+RECV_SIZE = 256 * 1024
+
+
+def default_address(log_filename: str) -> str:
+    """
+    Socket of the aggregator writing ``log_filename``, in the temporary
+    directory and named after the file's absolute path, so applications
+    logging to different files on one host don't share an aggregator.
+    """
+    digest = hashlib.sha1(os.path.abspath(log_filename).encode()).hexdigest()
+    return os.path.join(tempfile.gettempdir(), f"logninja-{digest[:16]}.sock")
+
+
+def encode_batch(batch: List[Tuple[str, float, int]]) -> bytes:
+    payload = bytearray()
+    for msg, created, levelno in batch:
+        data = msg.encode("utf-8", "backslashreplace")
+        payload += RECORD_HEADER.pack(len(data), created, min(levelno, 0xFFFF))
+        payload += data
+    levelno = max(levelno for _, _, levelno in batch)
+    return FRAME_HEADER.pack(len(payload), min(levelno, 0xFFFF)) + payload
+
+
+def decode_batch(payload: bytes) -> List[Tuple[str, float, int]]:
+    batch = []
+    offset = 0
+    while offset < len(payload):
+        size, created, levelno = RECORD_HEADER.unpack_from(payload, offset)
+        offset += RECORD_HEADER.size
+        msg = payload[offset : offset + size].decode("utf-8", "replace")
+        batch.append((msg, created, levelno))
+        offset += size
+    return batch
+
+
+class NinjaSocketHandler(logging.Handler):
+    """
+    Worker side of the aggregator mode: formats records in the worker and
+    ships them in batches over a Unix domain socket to a ``LogAggregator``,
+    which does all the sink I/O.
+
+    Records are buffered in memory and sent by a background thread once
+    ``max_batch_records`` are waiting or the oldest one is ``max_latency``
+    seconds old. When the aggregator is down, records stay buffered and the
+    connection is retried with an exponential backoff. Past
+    ``max_buffered_records`` the oldest buffered records are dropped and
+    counted in ``dropped``.
+
+    The handler can be created before the server forks its workers, each
+    worker then starts its own connection and buffer on its first record.
+
+    Args:
+        address (str): Path of the aggregator's socket.
+        max_batch_records (int): Maximum number of records per batch.
+        max_batch_bytes (int): Maximum size of a batch, in characters.
+        max_latency (float): Seconds a record waits for its batch to fill.
+        max_buffered_records (int): Maximum number of records waiting to be
+            sent.
+        reconnect_delay (float): First delay between connection attempts,
+            doubled after each failure.
+        max_reconnect_delay (float): Longest delay between connection
+            attempts.
+        close_timeout (float): Seconds ``close`` keeps trying to send the
+            buffered records.
+    """
+
+    def __init__(
+        self,
+        address: str,
+        max_batch_records: int = 500,
+        max_batch_bytes: int = 256 * 1024,
+        max_latency: float = 0.2,
+        max_buffered_records: int = 100_000,
+        reconnect_delay: float = 0.1,
+        max_reconnect_delay: float = 5.0,
+        close_timeout: float = 5.0,
+    ) -> None:
+        if max_batch_records <= 0 or max_buffered_records <= 0:
+            raise ValueError("max_batch_records and max_buffered_records must be > 0")
+
+        super().__init__()
+        self.address = address
+        self.max_batch_records = max_batch_records
+        self.max_batch_bytes = max_batch_bytes
+        self.max_latency = max_latency
+        self.max_buffered_records = max_buffered_records
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.close_timeout = close_timeout
+        self.dropped = 0
+        self.stats = register_handler(self)
+        self._reset()
+
+    def _reset(self) -> None:
+        self._pid = os.getpid()
+        self._cond = threading.Condition()
+        self._buffer: Deque[Tuple[str, float, int]] = deque()
+        self._pending: List[Tuple[str, float, int]] = []
+        self._sock: Optional[socket.socket] = None
+        self._thread: Optional[threading.Thread] = None
+        self._closing = False
+        self._close_deadline = 0.0
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            start = time.perf_counter_ns()
+            msg = self.format(record)
+            formatted = time.perf_counter_ns()
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+            return
+
+        if self._pid != os.getpid():
+            # Forked since the last record, the buffer and the sender thread
+            # belong to the parent.
+            self._reset()
+
+        with self._cond:
+            if self._closing:
+                self.dropped += 1
+                return
+            if len(self._buffer) >= self.max_buffered_records:
+                self._buffer.popleft()
+                self.dropped += 1
+            self._buffer.append((msg, record.created, record.levelno))
+
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="logninja-socket-sender", daemon=True
+                )
+                self._thread.start()
+            if len(self._buffer) >= self.max_batch_records:
+                self._cond.notify()
+        # Writing is only buffering here, the sender thread does the I/O.
+        self.stats.add(
+            record,
+            encoded_size(msg),
+            formatted - start,
+            time.perf_counter_ns() - formatted,
+        )
+
+    def close(self) -> None:
+        with self._cond:
+            self._closing = True
+            self._close_deadline = time.monotonic() + self.close_timeout
+            thread = self._thread
+            self._cond.notify()
+        if thread is not None and self._pid == os.getpid():
+            thread.join(self.close_timeout + 1)
+        self._disconnect()
+        super().close()
+
+    def _run(self) -> None:
+        delay = self.reconnect_delay
+        while True:
+            with self._cond:
+                if not self._pending:
+                    while not self._buffer and not self._closing:
+                        self._cond.wait()
+                    if not self._buffer:
+                        return
+                    if not self._closing and len(self._buffer) < self.max_batch_records:
+                        self._cond.wait(self.max_latency)
+                    self._pending = self._take_batch()
+
+            if self._send(self._pending):
+                self._pending = []
+                delay = self.reconnect_delay
+                continue
+
+            with self._cond:
+                if self._closing and time.monotonic() >= self._close_deadline:
+                    self.dropped += len(self._pending) + len(self._buffer)
+                    self._pending = []
+                    self._buffer.clear()
+                    return
+                self._cond.wait(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+    def _take_batch(self) -> List[Tuple[str, float, int]]:
+        batch = [self._buffer.popleft()]
+        size = len(batch[0][0])
+        while self._buffer and len(batch) < self.max_batch_records:
+            size += len(self._buffer[0][0])
+            if size > self.max_batch_bytes:
+                break
+            batch.append(self._buffer.popleft())
+        return batch
+
+    def _send(self, batch: List[Tuple[str, float, int]]) -> bool:
+        frame = encode_batch(batch)
+        try:
+            if self._sock is None:
+                sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                try:
+                    sock.connect(self.address)
+                except OSError:
+                    sock.close()
+                    raise
+                self._sock = sock
+            self._sock.sendall(frame)
+            return True
+        except OSError:
+            # The aggregator drops a batch cut by the disconnection, it is sent
+            # again in full on the next connection.
+            self._disconnect()
+            return False
+
+    def _disconnect(self) -> None:
+        sock, self._sock = self._sock, None
+        if sock is not None:
+            sock.close()
+
+
+class _BatchFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        return record.msg
+
+
+class LogAggregator:
+    """
+    Writer side of the aggregator mode: receives the batches sent by the
+    workers' ``NinjaSocketHandler`` and passes them to a single handler,
+    e.g. a ``NinjaFileHandler``, from one background thread.
+
+    Each batch reaches the handler as one record whose message is the
+    already formatted lines and whose level is the highest level in the
+    batch, so records from different workers are never interleaved. The
+    creation time and level of each record are passed along in its
+    ``BATCH_ATTR`` attribute, so the file's index still covers every record
+    with its own time, not the time the batch was received. The handler's
+    formatter is replaced by one that writes the message as is, and the
+    handler is closed with the aggregator.
+
+    Args:
+        address (str): Path of the Unix domain socket to listen on. A stale
+            socket left by a previous run is removed, ``start`` raises
+            ``OSError`` when another aggregator is listening on it.
+        handler (logging.Handler): The sink.
+    """
+
+    def __init__(self, address: str, handler: logging.Handler) -> None:
+        self.address = address
+        self.handler = handler
+        self.handler.setFormatter(_BatchFormatter())
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "LogAggregator":
+        self._remove_stale_socket()
+        self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._server.bind(self.address)
+        self._server.listen(128)
+        # Identifies our socket file, in case another one replaces it.
+        self._socket_id = _file_id(self.address)
+        self._server.setblocking(False)
+        self._wakeup_reader, self._wakeup_writer = socket.socketpair()
+
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self._server, selectors.EVENT_READ)
+        self._selector.register(self._wakeup_reader, selectors.EVENT_READ)
+
+        self._thread = threading.Thread(
+            target=self._serve, name="logninja-aggregator", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def _remove_stale_socket(self) -> None:
+        try:
+            if not stat.S_ISSOCK(os.stat(self.address).st_mode):
+                return
+        except FileNotFoundError:
+            return
+
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.address)
+        except OSError:
+            os.unlink(self.address)
+            return
+        finally:
+            probe.close()
+        raise OSError(
+            errno.EADDRINUSE, f"A LogAggregator is already listening on {self.address}"
+        )
+
+    def close(self) -> None:
+        """Writes what the workers already sent, then closes the sink."""
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            self._wakeup_writer.send(b"\0")
+            thread.join()
+            self._wakeup_writer.close()
+        self.handler.close()
+
+    def _serve(self) -> None:
+        while True:
+            for key, _ in self._selector.select():
+                if key.fileobj is self._server:
+                    self._accept()
+                elif key.fileobj is self._wakeup_reader:
+                    self._shutdown()
+                    return
+                else:
+                    self._read(key.fileobj, key.data)
+
+    def _accept(self) -> None:
+        try:
+            conn, _ = self._server.accept()
+        except OSError:
+            return
+        conn.setblocking(False)
+        self._selector.register(conn, selectors.EVENT_READ, bytearray())
+
+    def _read(self, conn: socket.socket, buffer: bytearray) -> bool:
+        try:
+            data = conn.recv(RECV_SIZE)
+        except BlockingIOError:
+            return False
+        except OSError:
+            data = b""
+        if not data:
+            # A batch cut by the disconnection is resent by the worker.
+            self._selector.unregister(conn)
+            conn.close()
+            return False
+
+        buffer += data
+        offset = 0
+        while len(buffer) - offset >= FRAME_HEADER.size:
+            size, levelno = FRAME_HEADER.unpack_from(buffer, offset)
+            start = offset + FRAME_HEADER.size
+            if len(buffer) < start + size:
+                break
+            self._write(decode_batch(buffer[start : start + size]), levelno)
+            offset = start + size
+        del buffer[:offset]
+        return True
+
+    def _write(self, batch: List[Tuple[str, float, int]], levelno: int) -> None:
+        text = "\n".join([msg for msg, _, _ in batch])
+        record = logging.LogRecord(
+            "logninja.aggregator", levelno, "", 0, text, None, None
+        )
+        setattr(record, BATCH_ATTR, batch)
+        self.handler.handle(record)
+
+    def _shutdown(self) -> None:
+        for key in list(self._selector.get_map().values()):
+            if key.fileobj in (self._server, self._wakeup_reader):
+                continue
+            while self._read(key.fileobj, key.data):
+                pass
+            if key.fileobj.fileno() != -1:
+                self._selector.unregister(key.fileobj)
+                key.fileobj.close()
+
+        self._selector.close()
+        self._server.close()
+        self._wakeup_reader.close()
+        try:
+            if _file_id(self.address) == self._socket_id:
+                os.unlink(self.address)
+        except OSError:
+            pass
+
+
+def _file_id(path: str) -> Tuple[int, int]:
+    info = os.stat(path)
+    return info.st_dev, info.st_ino
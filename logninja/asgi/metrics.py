@@ -0,0 +1,104 @@
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Tuple
+
+from starlette.types import Scope
+
+from logninja.asgi.sampling import get_route
+from logninja.histogram import LogLinearHistogram
+
+OTHER_ROUTES = "<other>"
+
+
+@dataclass
+class RouteStats:
+    durations: LogLinearHistogram = field(default_factory=LogLinearHistogram)
+    error_count: int = 0
+    status_counts: Dict[str, int] = field(default_factory=dict)
+
+
+@dataclass
+class AccessLogAggregator:
+    """
+    Aggregates request durations and status codes in memory and logs one
+    summary record per method and route every ``interval`` seconds.
+
+    Durations go in a fixed-size log-linear histogram per route, so memory
+    doesn't grow with traffic. Routes are keyed by their template when the app
+    sets ``scope["route"]`` (as FastAPI does), otherwise by path. Once
+    ``max_routes`` keys are tracked, further ones are counted together under
+    ``"<other>"``, which keeps memory bounded with high-cardinality paths.
+
+    Summaries are logged by the first request after the interval ends, and
+    on lifespan shutdown.
+
+    Args:
+        interval (float): Seconds between summaries.
+        max_routes (int): Maximum number of method/route keys per interval.
+        error_status (int): Responses with this status or above count as
+            errors.
+        level (int): Level of the summary records.
+    """
+
+    interval: float = 60.0
+    max_routes: int = 200
+    error_status: int = 500
+    level: int = logging.INFO
+
+    def __post_init__(self) -> None:
+        self._routes: Dict[Tuple[str, str], RouteStats] = {}
+        self._interval_start = time.monotonic()
+
+    def record(self, scope: Scope, status_code: int, duration_ns: int) -> None:
+        key = (scope.get("method", ""), get_route(scope))
+        stats = self._routes.get(key)
+        if stats is None:
+            if len(self._routes) >= self.max_routes:
+                key = (OTHER_ROUTES, OTHER_ROUTES)
+                stats = self._routes.get(key)
+            if stats is None:
+                stats = self._routes[key] = RouteStats()
+
+        stats.durations.record(duration_ns // 1000)
+        if status_code >= self.error_status:
+            stats.error_count += 1
+        status_class = f"{status_code // 100}xx"
+        stats.status_counts[status_class] = stats.status_counts.get(status_class, 0) + 1
+
+    def due(self) -> bool:
+        return time.monotonic() - self._interval_start >= self.interval
+
+    def emit(self, logger: logging.Logger) -> None:
+        """Logs one summary per route seen in the interval and starts a new one."""
+        routes, self._routes = self._routes, {}
+        now = time.monotonic()
+        interval = now - self._interval_start
+        self._interval_start = now
+
+        if not logger.isEnabledFor(self.level):
+            return
+
+        for (method, route), stats in routes.items():
+            durations = stats.durations
+            p50, p90, p99 = (durations.percentile(p) * 1000 for p in (50, 90, 99))
+            max_duration = durations.max * 1000
+            logger.log(
+                self.level,
+                f"{method} {route} - {durations.count} requests,"
+                f" {stats.error_count} errors, p50 {p50 / 1e6:.1f}ms"
+                f" p90 {p90 / 1e6:.1f}ms p99 {p99 / 1e6:.1f}ms"
+                f" max {max_duration / 1e6:.1f}ms",
+                extra={
+                    "method": method,
+                    "route": route,
+                    "count": durations.count,
+                    "error_count": stats.error_count,
+                    "status_counts": stats.status_counts,
+                    "p50": p50,
+                    "p90": p90,
+                    "p99": p99,
+                    "max": max_duration,
+                    "interval": round(interval, 3),
+                },
+            )
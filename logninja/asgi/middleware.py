@@ -2,14 +2,14 @@ import contextvars
 import logging
 import time
 from dataclasses import dataclass, field
-from typing import List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 from starlette import status
-from starlette.datastructures import MutableHeaders
-from starlette.requests import Request
 from starlette.responses import JSONResponse
 from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
+from logninja.asgi.metrics import AccessLogAggregator
+from logninja.asgi.sampling import AccessLogSampler
 from logninja.logger import logger as logninja_logger
 
 
@@ -24,81 +24,191 @@ class LogNinjaASGIMiddleware:
     contextvars_by_app_state: List[contextvars.ContextVar] = field(
         default_factory=lambda: []
     )
+    sampler: Optional[AccessLogSampler] = None
+    aggregator: Optional[AccessLogAggregator] = None
+    log_requests: bool = True
+    log_after_response: bool = False
+
+    def __post_init__(self) -> None:
+        # ASGI servers send lowercased header names, matched in a single pass
+        # over the raw headers of each request.
+        self._contextvars_by_header: Dict[bytes, contextvars.ContextVar] = {}
+        for contextvar in self.contextvars_by_headers:
+            if isinstance(contextvar, contextvars.ContextVar):
+                header_name = contextvar.name
+            else:
+                contextvar, header_name = contextvar
+            self._contextvars_by_header[header_name.lower().encode("latin-1")] = (
+                contextvar
+            )
 
     async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] == "lifespan" and self.aggregator is not None:
+            return await self.app(scope, self._receive_lifespan(receive), send)
         if scope["type"] != "http":
             return await self.app(scope, receive, send)
 
-        headers = MutableHeaders(scope=scope)
-        await self._set_contextvars_by_headers(headers)
-        await self._set_contextvars_by_app_state(scope)
+        if self._contextvars_by_header:
+            self._set_contextvars_by_headers(scope)
+        if self.contextvars_by_app_state:
+            self._set_contextvars_by_app_state(scope)
 
-        request = Request(scope, receive, send)
+        if self.log_after_response:
+            return await self._call_logging_after_response(scope, receive, send)
 
         async def send_with_extra_headers(message: Message):
             if message["type"] == "http.response.start":
                 process_time = time.perf_counter_ns() - start_time
                 status_code = message.get("status")
-                await self._log_finish(request, status_code, process_time)
+                self._log_finish(scope, status_code, process_time)
             await send(message)
 
-        start_time = time.time()
+        start_time = time.perf_counter_ns()
         try:
             await self.app(scope, receive, send_with_extra_headers)
         except Exception as exc:
-            process_time = time.perf_counter_ns() - start_time
-            self.logger.exception(
-                "An error occurred while processing the request",
-                stack_info=True,
-                exc_info=exc,
-            )
-            await self._log_finish(
-                request, status.HTTP_500_INTERNAL_SERVER_ERROR, process_time
-            )
-            response = JSONResponse(
-                content={"message": "Internal Server Error"},
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            )
-            await response(scope, receive, send)
+            await self._handle_exception(scope, receive, send, exc, start_time)
+
+    async def _call_logging_after_response(
+        self, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        # Only the status and timings are captured while the response is sent,
+        # the record is emitted once the last body chunk went out.
+        status_code = None
+        time_to_first_byte = 0
+        response_bytes = 0
+        logged = False
+
+        async def send_and_log_after_response(message: Message):
+            nonlocal status_code, time_to_first_byte, response_bytes, logged
+            message_type = message["type"]
+            if message_type == "http.response.start":
+                status_code = message.get("status")
+                time_to_first_byte = time.perf_counter_ns() - start_time
+                await send(message)
+            elif message_type == "http.response.body":
+                await send(message)
+                response_bytes += len(message.get("body", b""))
+                if not message.get("more_body", False) and not logged:
+                    logged = True
+                    self._log_finish(
+                        scope,
+                        status_code,
+                        time.perf_counter_ns() - start_time,
+                        {
+                            "response_bytes": response_bytes,
+                            "time_to_first_byte": time_to_first_byte,
+                        },
+                    )
+            else:
+                await send(message)
+
+        start_time = time.perf_counter_ns()
+        try:
+            await self.app(scope, receive, send_and_log_after_response)
+        except Exception as exc:
+            logged = True
+            await self._handle_exception(scope, receive, send, exc, start_time)
+        finally:
+            # The client disconnected, or the app stopped before the last chunk.
+            if not logged and status_code is not None:
+                self._log_finish(
+                    scope,
+                    status_code,
+                    time.perf_counter_ns() - start_time,
+                    {
+                        "response_bytes": response_bytes,
+                        "time_to_first_byte": time_to_first_byte,
+                        "response_complete": False,
+                    },
+                )
+
+    async def _handle_exception(
+        self,
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+        exc: Exception,
+        start_time: int,
+    ) -> None:
+        process_time = time.perf_counter_ns() - start_time
+        self.logger.exception(
+            "An error occurred while processing the request",
+            stack_info=True,
+            exc_info=exc,
+        )
+        self._log_finish(scope, status.HTTP_500_INTERNAL_SERVER_ERROR, process_time)
+        response = JSONResponse(
+            content={"message": "Internal Server Error"},
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+        await response(scope, receive, send)
+
+    def _receive_lifespan(self, receive: Receive) -> Receive:
+        async def receive_and_flush() -> Message:
+            message = await receive()
+            if message["type"] == "lifespan.shutdown":
+                self.aggregator.emit(self.logger)
+            return message
+
+        return receive_and_flush
 
-    async def _log_finish(
-        self, request: Request, status_code: int, process_time: float
-    ):
-        url = await self._get_path_with_query_string(request.scope)
-        client_host = request.client.host
-        client_port = request.client.port
-        http_method = request.method
-        http_version = request.scope["http_version"]
+    def _log_finish(
+        self,
+        scope: Scope,
+        status_code: int,
+        process_time: int,
+        extra: Optional[dict] = None,
+    ) -> None:
+        if self.aggregator is not None:
+            self.aggregator.record(scope, status_code, process_time)
+            if self.aggregator.due():
+                self.aggregator.emit(self.logger)
+
+        if not self.log_requests or not self.logger.isEnabledFor(logging.INFO):
+            return
+
+        extra = dict(extra) if extra else {}
+        if self.sampler is not None:
+            sampled_rate = self.sampler.sample_rate(scope, status_code, process_time)
+            if not self.sampler.should_log(sampled_rate):
+                return
+            extra["sampled_rate"] = sampled_rate
+
+        url = self._get_path_with_query_string(scope)
+        client_host, client_port = scope.get("client") or (None, None)
+        http_method = scope["method"]
+        http_version = scope["http_version"]
 
         self.logger.info(
             f"""{client_host}:{client_port} - "{http_method} {url} HTTP/{http_version}" {status_code}""",
             extra={
-                "url": str(url),
+                "url": url,
                 "method": http_method,
                 "status_code": status_code,
                 "version": http_version,
                 "client_host": client_host,
                 "client_port": client_port,
                 "duration": process_time,
+                **extra,
             },
         )
 
-    async def _set_contextvars_by_headers(self, headers: MutableHeaders) -> None:
-        for contextvar in self.contextvars_by_headers:
-            header_name = (
-                contextvar.name
-                if isinstance(contextvar, contextvars.ContextVar)
-                else contextvar[1]
-            )
-            if headers.get(header_name) is not None:
-                contextvar.set(headers.get(header_name))
+    def _set_contextvars_by_headers(self, scope: Scope) -> None:
+        contextvars_by_header = self._contextvars_by_header
+        # Reversed, so the first occurrence of a repeated header is set last.
+        for name, value in reversed(scope["headers"]):
+            contextvar = contextvars_by_header.get(name)
+            if contextvar is not None:
+                contextvar.set(value.decode("latin-1"))
 
-    async def _set_contextvars_by_app_state(self, scope: Scope) -> None:
+    def _set_contextvars_by_app_state(self, scope: Scope) -> None:
+        state = getattr(scope.get("app"), "state", None)
         for contextvar in self.contextvars_by_app_state:
-            if hasattr(scope.get("app").state, contextvar.name) is not None:
-                contextvar.set(getattr(scope.get("app").state, contextvar.name))
+            if hasattr(state, contextvar.name):
+                contextvar.set(getattr(state, contextvar.name))
 
-    async def _get_path_with_query_string(self, scope: Scope):
+    def _get_path_with_query_string(self, scope: Scope) -> str:
         query_string = scope.get("query_string", b"").decode()
         path = scope.get("path", "")
         full_path = f"{path}?{query_string}" if query_string else path
@@ -0,0 +1,83 @@
+import fnmatch
+import random
+import re
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from starlette.types import Scope
+
+DEFAULT_STATUS_RATES = {1: 1.0, 2: 1.0, 3: 1.0, 4: 1.0, 5: 1.0}
+
+
+def get_route(scope: Scope) -> str:
+    """Route template of the request when the app exposes it, else its path."""
+    route = scope.get("route")
+    return getattr(route, "path", None) or scope.get("path", "")
+
+
+@dataclass
+class SamplingRule:
+    """
+    Sampling rates for the routes matching ``pattern``.
+
+    Args:
+        pattern (str): Glob matched against the route template (when the app
+            sets ``scope["route"]``, as FastAPI does) or the request path,
+            e.g. ``"/health*"``.
+        status_rates (dict): Rate per status class (``2`` for 2xx...). Classes
+            left out use the sampler's ``status_rates``.
+    """
+
+    pattern: str
+    status_rates: Dict[int, float] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        self._match = re.compile(fnmatch.translate(self.pattern)).match
+
+
+@dataclass
+class AccessLogSampler:
+    """
+    Decides which access logs ``LogNinjaASGIMiddleware`` emits.
+
+    A request is logged with probability equal to its rate: the rate of its
+    status class in the first matching rule, else in ``status_rates``.
+    Requests slower than ``always_log_slower_than`` seconds are always
+    logged. Emitted records carry a ``sampled_rate`` field, so counts can be
+    re-weighted downstream (each record stands for ``1 / sampled_rate``
+    requests).
+
+    Args:
+        status_rates (dict): Default rate per status class, e.g.
+            ``{2: 0.01, 5: 1.0}``. Missing classes are always logged.
+        rules (list[SamplingRule]): Per-route overrides, first match wins.
+        always_log_slower_than (float | None): Latency threshold, in seconds.
+        rng (Callable): Source of random numbers in ``[0, 1)``.
+    """
+
+    status_rates: Dict[int, float] = field(
+        default_factory=lambda: dict(DEFAULT_STATUS_RATES)
+    )
+    rules: List[SamplingRule] = field(default_factory=list)
+    always_log_slower_than: Optional[float] = None
+    rng: Callable[[], float] = random.random
+
+    def sample_rate(self, scope: Scope, status_code: int, duration_ns: int) -> float:
+        """Returns the rate the request is sampled at."""
+        threshold = self.always_log_slower_than
+        if threshold is not None and duration_ns >= threshold * 1e9:
+            return 1.0
+
+        status_class = status_code // 100
+        if self.rules:
+            route = get_route(scope)
+            for rule in self.rules:
+                if rule._match(route):
+                    rate = rule.status_rates.get(status_class)
+                    if rate is not None:
+                        return rate
+                    break
+        return self.status_rates.get(status_class, 1.0)
+
+    def should_log(self, rate: float) -> bool:
+        return rate >= 1.0 or (rate > 0.0 and self.rng() < rate)
@@ -0,0 +1,601 @@
+"""
+Compact binary log files.
+
+A file starts with ``MAGIC`` and is followed by entries, each one a tag byte,
+the varint size of its body and the body:
+
+- ``STRING`` entries add their UTF-8 body to the file's string dictionary,
+  under the next id. They are written right before the first record using
+  the string, so a file can be decoded in a single streaming pass.
+- ``SITE`` entries add the level, logger, module, function, line and
+  thread of records to the file's site dictionary, the same way. Strings
+  in a site are references to the string dictionary.
+- ``RECORD`` entries hold one record: a reference to its site, then its
+  timestamp and message. Exception fingerprints and extra keys are
+  references to the string dictionary, extra values are written inline.
+
+Varints are unsigned LEB128, signed integers are zigzag encoded first and
+floats are little-endian doubles. A string reference is 0 for an inline
+string or site, or its id plus one.
+"""
+
+import argparse
+import json
+import logging
+import os
+import struct
+import sys
+import time
+from typing import IO, Any, BinaryIO, Dict, Iterator, List, Optional, Tuple, Union
+
+from logninja.encoders import JsonEncoder, get_encoder
+from logninja.extras import compile_extras
+from logninja.instrumentation import register_handler
+from logninja.options import All, Only
+from logninja.timestamps import ISO, get_timestamp_renderer
+from logninja.traceback import (
+    FINGERPRINT_ATTR,
+    REPEAT_COUNT_ATTR,
+    fingerprint,
+    format_exception,
+)
+from logninja.utils import LazyStr
+
+MAGIC = b"LNJB\x01"
+
+STRING = 0x01
+SITE = 0x02
+RECORD = 0x03
+
+# Flags of a record.
+HAS_EXCEPTION = 0x01
+IS_REPEAT = 0x02
+
+# Types of extra values.
+NONE = 0
+TRUE = 1
+FALSE = 2
+INT = 3
+FLOAT = 4
+STR = 5
+JSON = 6
+
+DOUBLE = struct.Struct("<d")
+
+# Strings and sites past these numbers are written inline, e.g. when thread
+# names are unique, so the dictionaries of a long-running file stay bounded.
+MAX_INTERNED_STRINGS = 65_536
+MAX_INTERNED_SITES = 65_536
+
+READ_SIZE = 1024 * 1024
+
+
+def _write_varint(out: bytearray, value: int) -> None:
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data: bytes, offset: int) -> Tuple[int, int]:
+    value = data[offset]
+    offset += 1
+    if value < 0x80:
+        return value, offset
+    value &= 0x7F
+    shift = 7
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+def _encode_text(text: str) -> bytes:
+    return text.encode("utf-8", "surrogatepass")
+
+
+def _decode_text(data: bytes) -> str:
+    return data.decode("utf-8", "surrogatepass")
+
+
+class BinaryRecordEncoder:
+    """
+    Turns records into the entries of one binary log file.
+
+    Holds the dictionaries of the file, so an encoder must only be used for
+    one file, and from one thread at a time.
+
+    Args:
+        extras (All | Only | None): Which extra attributes are kept, as for
+            ``NinjaJsonFormatter``. Defaults to All().
+        encoder (str | Callable | None): JSON backend of the tracebacks and of
+            extra values that are not ``None``, booleans, numbers or strings.
+        strings (List[str] | None): String dictionary already in the file,
+            when appending to it.
+        sites (int): Number of sites already in the file. Their ids are not
+            reused, new sites are added after them.
+    """
+
+    def __init__(
+        self,
+        extras: Union[All, Only, None] = All(),
+        encoder: Union[str, JsonEncoder, None] = None,
+        strings: Optional[List[str]] = None,
+        sites: int = 0,
+    ) -> None:
+        self._get_extras = compile_extras(extras)
+        self.encoder = get_encoder(encoder)
+        # Interned strings, with their reference already encoded.
+        self._string_refs: Dict[str, bytes] = {}
+        self._string_count = 0
+        for string in strings or ():
+            self._add_string(string)
+        self._site_ids: Dict[tuple, int] = {}
+        self._site_count = sites
+
+    def encode(self, record: logging.LogRecord) -> bytes:
+        strings, sites = self._string_count, len(self._site_ids)
+        try:
+            return self._encode(record)
+        except BaseException:
+            # The entries of a record that isn't written must not be
+            # referenced by the next ones.
+            while self._string_count > strings:
+                self._string_refs.popitem()
+                self._string_count -= 1
+            while len(self._site_ids) > sites:
+                self._site_ids.popitem()
+                self._site_count -= 1
+            raise
+
+    def _encode(self, record: logging.LogRecord) -> bytes:
+        out = bytearray()
+        body = bytearray()
+        attrs = record.__dict__
+
+        flags = 0
+        exc_info = record.exc_info
+        has_exception = exc_info is not None and exc_info[0] is not None
+        if has_exception:
+            flags |= HAS_EXCEPTION
+        elif FINGERPRINT_ATTR in attrs:
+            flags |= IS_REPEAT
+        body.append(flags)
+        body += DOUBLE.pack(record.created)
+        self._write_site(out, body, record)
+        self._write_str(body, record.getMessage())
+
+        if has_exception:
+            self._write_str(body, self.encoder(format_exception(exc_info=exc_info)))
+            self._write_ref(
+                out, body, attrs.get(FINGERPRINT_ATTR) or fingerprint(exc_info)
+            )
+        elif flags & IS_REPEAT:
+            self._write_ref(out, body, attrs[FINGERPRINT_ATTR])
+            self._write_value(body, attrs.get(REPEAT_COUNT_ATTR))
+
+        extras = self._get_extras(record) or {}
+        _write_varint(body, len(extras))
+        string_refs = self._string_refs
+        for key, value in extras.items():
+            ref = string_refs.get(key)
+            if ref is None:
+                self._write_ref(out, body, key)
+            else:
+                body += ref
+            if type(value) is str:
+                body.append(STR)
+                self._write_str(body, value)
+            else:
+                self._write_value(body, value)
+
+        out.append(RECORD)
+        _write_varint(out, len(body))
+        out += body
+        return bytes(out)
+
+    def _write_site(
+        self, out: bytearray, body: bytearray, record: logging.LogRecord
+    ) -> None:
+        key = (
+            record.levelno,
+            record.levelname,
+            record.name,
+            record.module,
+            record.funcName,
+            record.lineno or 0,
+            record.threadName or "",
+        )
+        site_id = self._site_ids.get(key)
+        if site_id is not None:
+            _write_varint(body, site_id + 1)
+            return
+
+        site = bytearray()
+        _write_varint(site, key[0])
+        for string in key[1:5]:
+            self._write_ref(out, site, string)
+        _write_varint(site, key[5])
+        self._write_ref(out, site, key[6])
+        if self._site_count >= MAX_INTERNED_SITES:
+            body.append(0)
+            body += site
+            return
+
+        site_id = self._site_ids[key] = self._site_count
+        self._site_count += 1
+        out.append(SITE)
+        _write_varint(out, len(site))
+        out += site
+        _write_varint(body, site_id + 1)
+
+    def _add_string(self, string: str) -> bytes:
+        ref = bytearray()
+        _write_varint(ref, self._string_count + 1)
+        self._string_refs[string] = ref = bytes(ref)
+        self._string_count += 1
+        return ref
+
+    def _write_ref(self, out: bytearray, body: bytearray, string: str) -> None:
+        ref = self._string_refs.get(string)
+        if ref is None:
+            if self._string_count >= MAX_INTERNED_STRINGS:
+                body.append(0)
+                self._write_str(body, string)
+                return
+            ref = self._add_string(string)
+            out.append(STRING)
+            self._write_str(out, string)
+        body += ref
+
+    @staticmethod
+    def _write_str(out: bytearray, string: str) -> None:
+        data = _encode_text(string)
+        size = len(data)
+        if size < 0x80:
+            out.append(size)
+        else:
+            _write_varint(out, size)
+        out += data
+
+    def _write_value(self, body: bytearray, value: Any) -> None:
+        kind = type(value)
+        if kind is str:
+            body.append(STR)
+            self._write_str(body, value)
+        elif kind is LazyStr:
+            body.append(STR)
+            self._write_str(body, str(value))
+        elif value is None:
+            body.append(NONE)
+        elif kind is bool:
+            body.append(TRUE if value else FALSE)
+        elif kind is int:
+            body.append(INT)
+            _write_varint(body, value << 1 if value >= 0 else (-value << 1) - 1)
+        elif kind is float:
+            body.append(FLOAT)
+            body += DOUBLE.pack(value)
+        else:
+            body.append(JSON)
+            self._write_str(body, self.encoder(value))
+
+
+def iter_entries(
+    stream: BinaryIO, read_size: int = READ_SIZE
+) -> Iterator[Tuple[int, bytes, int]]:
+    """
+    Yields the ``(tag, body, end offset)`` of every complete entry of a binary
+    log file, reading it in chunks. A truncated last entry, e.g. from a
+    writer that crashed mid-record, is left out.
+
+    Raises:
+        ValueError: When the stream is not a binary log file.
+    """
+    magic = stream.read(len(MAGIC))
+    if magic != MAGIC:
+        raise ValueError("Not a LogNinja binary log file")
+
+    data = b""
+    position = len(MAGIC)
+    while True:
+        chunk = stream.read(read_size)
+        if not chunk:
+            return
+        data = data + chunk if data else chunk
+        offset = 0
+        size = len(data)
+        while offset < size:
+            try:
+                length, start = _read_varint(data, offset + 1)
+            except IndexError:
+                break
+            end = start + length
+            if end > size:
+                break
+            yield data[offset], data[start:end], position + end
+            offset = end
+        data = data[offset:]
+        position += offset
+
+
+class BinaryLogDecoder:
+    """
+    Decodes the records of one binary log file into the dicts
+    ``NinjaJsonFormatter._prepare_log_dict`` builds, so the JSON tooling can
+    read them.
+
+    Args:
+        timestamp_format (str): Rendering of ``timestamp``, as for
+            ``NinjaJsonFormatter``. Defaults to "iso".
+    """
+
+    def __init__(self, timestamp_format: str = ISO) -> None:
+        self.render_timestamp = get_timestamp_renderer(timestamp_format)
+        self.strings: List[str] = []
+        # Each site is kept as the first keys of the dicts of its records.
+        self.sites: List[dict] = []
+
+    def iter_dicts(self, stream: BinaryIO) -> Iterator[dict]:
+        decode = self.decode_record
+        for tag, body, _ in iter_entries(stream):
+            if tag == RECORD:
+                yield decode(body)
+            else:
+                self.add_entry(tag, body)
+
+    def add_entry(self, tag: int, body: bytes) -> None:
+        """Adds a ``STRING`` or ``SITE`` entry to the dictionaries."""
+        if tag == STRING:
+            self.strings.append(_decode_text(body))
+        elif tag == SITE:
+            self.sites.append(self._read_site(body, 0)[0])
+        else:
+            raise ValueError(f"Unknown entry tag {tag}")
+
+    def decode_record(self, body: bytes) -> dict:
+        flags = body[0]
+        created = DOUBLE.unpack_from(body, 1)[0]
+        ref = body[9]
+        offset = 10
+        if ref > 0x7F:
+            ref, offset = _read_varint(body, 9)
+        if ref:
+            log_dict = self.sites[ref - 1].copy()
+        else:
+            log_dict, offset = self._read_site(body, offset)
+
+        length = body[offset]
+        offset += 1
+        if length > 0x7F:
+            length, offset = _read_varint(body, offset - 1)
+        end = offset + length
+        log_dict["message"] = _decode_text(body[offset:end])
+        log_dict["timestamp"] = self.render_timestamp(created)
+        offset = end
+
+        read_ref = self._read_ref
+        read_value = self._read_value
+        if flags:
+            if flags & HAS_EXCEPTION:
+                exc_info, offset = self._read_str(body, offset)
+                log_dict["exc_info"] = json.loads(exc_info)
+                log_dict[FINGERPRINT_ATTR], offset = read_ref(body, offset)
+            elif flags & IS_REPEAT:
+                log_dict[FINGERPRINT_ATTR], offset = read_ref(body, offset)
+                log_dict[REPEAT_COUNT_ATTR], offset = read_value(body, offset)
+
+        count, offset = _read_varint(body, offset)
+        strings = self.strings
+        for _ in range(count):
+            # Inlined common case: an interned key with a short string value.
+            ref = body[offset]
+            if 0 < ref < 0x80:
+                key = strings[ref - 1]
+                offset += 1
+            else:
+                key, offset = read_ref(body, offset)
+            if body[offset] == STR and body[offset + 1] < 0x80:
+                start = offset + 2
+                offset = start + body[offset + 1]
+                log_dict[key] = _decode_text(body[start:offset])
+            else:
+                log_dict[key], offset = read_value(body, offset)
+        return log_dict
+
+    def _read_site(self, body: bytes, offset: int) -> Tuple[dict, int]:
+        read_ref = self._read_ref
+        _, offset = _read_varint(body, offset)
+        levelname, offset = read_ref(body, offset)
+        name, offset = read_ref(body, offset)
+        module, offset = read_ref(body, offset)
+        func_name, offset = read_ref(body, offset)
+        lineno, offset = _read_varint(body, offset)
+        thread_name, offset = read_ref(body, offset)
+        site = {
+            "level": levelname,
+            "message": None,
+            "timestamp": None,
+            "logger": name,
+            "module": module,
+            "function": func_name,
+            "line": lineno,
+            "thread_name": thread_name,
+        }
+        return site, offset
+
+    def _read_ref(self, body: bytes, offset: int) -> Tuple[str, int]:
+        ref, offset = _read_varint(body, offset)
+        if ref:
+            return self.strings[ref - 1], offset
+        return self._read_str(body, offset)
+
+    @staticmethod
+    def _read_str(body: bytes, offset: int) -> Tuple[str, int]:
+        length, offset = _read_varint(body, offset)
+        end = offset + length
+        return _decode_text(body[offset:end]), end
+
+    def _read_value(self, body: bytes, offset: int) -> Tuple[Any, int]:
+        kind = body[offset]
+        offset += 1
+        if kind == STR:
+            return self._read_str(body, offset)
+        if kind == INT:
+            value, offset = _read_varint(body, offset)
+            return (value >> 1) ^ -(value & 1), offset
+        if kind == FLOAT:
+            return DOUBLE.unpack_from(body, offset)[0], offset + DOUBLE.size
+        if kind == NONE:
+            return None, offset
+        if kind == TRUE:
+            return True, offset
+        if kind == FALSE:
+            return False, offset
+        if kind == JSON:
+            text, offset = self._read_str(body, offset)
+            return json.loads(text), offset
+        raise ValueError(f"Unknown value type {kind}")
+
+
+def read_binary_log(filename: str, timestamp_format: str = ISO) -> Iterator[dict]:
+    """Streams the records of a binary log file as log dicts."""
+    with open(filename, "rb") as stream:
+        yield from BinaryLogDecoder(timestamp_format).iter_dicts(stream)
+
+
+def convert_to_jsonl(
+    filename: str,
+    output: IO[str],
+    timestamp_format: str = ISO,
+    encoder: Union[str, JsonEncoder, None] = None,
+) -> int:
+    """
+    Writes the records of a binary log file to ``output`` as JSON lines, the
+    way ``NinjaJsonFormatter`` would have written them.
+
+    Returns:
+        int: The number of records written.
+    """
+    encode = get_encoder(encoder)
+    count = 0
+    for log_dict in read_binary_log(filename, timestamp_format):
+        output.write(encode(log_dict) + "\n")
+        count += 1
+    return count
+
+
+class NinjaBinaryFileHandler(logging.Handler):
+    """
+    File sink writing records in the binary format of this module, a
+    fraction of the size of JSON lines and cheaper to read back.
+
+    When the file already exists, records are appended to it: its string
+    dictionary is loaded and a truncated last entry is cut off first.
+
+    Args:
+        filename (str): Path of the file.
+        extras (All | Only | None): Which extra attributes are kept.
+            Defaults to All().
+        encoder (str | Callable | None): JSON backend of the tracebacks and
+            of complex extra values.
+        delay (bool): Whether the file is only opened by the first record.
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        extras: Union[All, Only, None] = All(),
+        encoder: Union[str, JsonEncoder, None] = None,
+        delay: bool = False,
+    ) -> None:
+        super().__init__()
+        self.baseFilename = os.path.abspath(filename)
+        self.extras = extras
+        self.encoder = encoder
+        self.stats = register_handler(self)
+        self.stream: Optional[BinaryIO] = None
+        self._record_encoder: Optional[BinaryRecordEncoder] = None
+        if not delay:
+            self._open()
+
+    def _open(self) -> None:
+        strings: List[str] = []
+        sites = 0
+        try:
+            size = os.path.getsize(self.baseFilename)
+        except OSError:
+            size = 0
+
+        if size:
+            end = len(MAGIC)
+            with open(self.baseFilename, "rb") as stream:
+                for tag, body, end in iter_entries(stream):
+                    if tag == STRING:
+                        strings.append(_decode_text(body))
+                    elif tag == SITE:
+                        sites += 1
+            if end < size:
+                with open(self.baseFilename, "r+b") as stream:
+                    stream.truncate(end)
+
+        self.stream = open(self.baseFilename, "ab")
+        if not size:
+            self.stream.write(MAGIC)
+        self._record_encoder = BinaryRecordEncoder(
+            self.extras, self.encoder, strings, sites
+        )
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            if self.stream is None:
+                self._open()
+            start = time.perf_counter_ns()
+            data = self._record_encoder.encode(record)
+            encoded = time.perf_counter_ns()
+            self.stream.write(data)
+            self.stream.flush()
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+            return
+        self.stats.add(
+            record, len(data), encoded - start, time.perf_counter_ns() - encoded
+        )
+
+    def flush(self) -> None:
+        with self.lock:
+            if self.stream is not None:
+                self.stream.flush()
+
+    def close(self) -> None:
+        with self.lock:
+            try:
+                if self.stream is not None:
+                    self.stream.close()
+                    self.stream = None
+            finally:
+                super().close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m logninja.binary_log",
+        description="Converts a binary log file to JSON lines.",
+    )
+    parser.add_argument("filename")
+    parser.add_argument("--timestamp-format", default=ISO)
+    args = parser.parse_args(argv)
+    try:
+        convert_to_jsonl(args.filename, sys.stdout, args.timestamp_format)
+    except (OSError, ValueError) as exc:
+        parser.error(str(exc))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
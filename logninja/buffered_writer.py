@@ -0,0 +1,126 @@
+import logging
+import threading
+import time
+from typing import IO, List, Optional
+
+
+class BufferedWriter:
+    """
+    File-like wrapper that coalesces writes into large group commits.
+
+    Buffered text is written to the underlying stream in a single call when
+    ``max_bytes`` characters or ``max_records`` writes are pending, or when the
+    oldest pending write is older than ``max_latency`` seconds. The deadline is
+    enforced by a background thread, so an idle sink never holds records back
+    for longer than that.
+
+    ``flush()`` only honours those thresholds, which keeps consoles that flush
+    after every print (such as rich) from defeating the buffer. ``commit()``
+    writes everything out immediately; handlers call it for records at or
+    above ``flush_level`` and on shutdown.
+
+    Args:
+        stream (IO[str]): The stream to write to.
+        max_bytes (int): Pending size that triggers a commit.
+        max_records (int): Pending writes that trigger a commit.
+        max_latency (float): Maximum age, in seconds, of a pending write.
+        flush_level (int): Records at or above this level are committed
+            right away by the handlers.
+        close_stream (bool): Whether ``close()`` also closes the stream.
+    """
+
+    def __init__(
+        self,
+        stream: IO[str],
+        max_bytes: int = 64 * 1024,
+        max_records: int = 1000,
+        max_latency: float = 0.5,
+        flush_level: int = logging.ERROR,
+        close_stream: bool = False,
+    ) -> None:
+        self.stream = stream
+        self.max_bytes = max_bytes
+        self.max_records = max_records
+        self.max_latency = max_latency
+        self.flush_level = flush_level
+        self.close_stream = close_stream
+
+        self._buffer: List[str] = []
+        self._size = 0
+        self._first_write_at: Optional[float] = None
+        self._closed = False
+        self._condition = threading.Condition(threading.RLock())
+        self._thread = threading.Thread(
+            target=self._run_deadline, name="logninja-buffer-flusher", daemon=True
+        )
+        self._thread.start()
+
+    def __getattr__(self, name: str):
+        # Consoles probe the stream for isatty, encoding, fileno...
+        return getattr(self.stream, name)
+
+    def write(self, text: str) -> int:
+        with self._condition:
+            if self._closed:
+                self.stream.write(text)
+                return len(text)
+
+            if not self._buffer:
+                self._first_write_at = time.monotonic()
+                self._condition.notify()
+            self._buffer.append(text)
+            self._size += len(text)
+
+            if self._size >= self.max_bytes or len(self._buffer) >= self.max_records:
+                self._commit()
+        return len(text)
+
+    def flush(self) -> None:
+        with self._condition:
+            if (
+                self._first_write_at is not None
+                and time.monotonic() - self._first_write_at >= self.max_latency
+            ):
+                self._commit()
+
+    def commit(self) -> None:
+        with self._condition:
+            self._commit()
+
+    def close(self) -> None:
+        with self._condition:
+            if self._closed:
+                return
+            self._commit()
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+        if self.close_stream:
+            self.stream.close()
+
+    def _commit(self) -> None:
+        if not self._buffer:
+            return
+        data = "".join(self._buffer)
+        self._buffer.clear()
+        self._size = 0
+        self._first_write_at = None
+        self.stream.write(data)
+        self.stream.flush()
+
+    def _run_deadline(self) -> None:
+        with self._condition:
+            while not self._closed:
+                if self._first_write_at is None:
+                    self._condition.wait()
+                    continue
+                remaining = self._first_write_at + self.max_latency - time.monotonic()
+                if remaining > 0:
+                    self._condition.wait(remaining)
+                    continue
+                try:
+                    self._commit()
+                except Exception:
+                    # The pending records are lost, but later ones must still
+                    # meet their deadline.
+                    pass
@@ -1,27 +1,100 @@
 import logging
 from dataclasses import dataclass, field
-from typing import List
+from typing import List, Optional
 
 from logninja.console_interface import ConsoleInterface
-from logninja.ninja_console import NinjaConsole
-from logninja.ninja_json_formatter import NinjaJsonFormatter
+from logninja.options import BLOCK
+
+
+# The defaults below are built when a config is created, so importing the
+# configs doesn't import the formatters and consoles, and configs don't share
+# a formatter or a console.
+def _default_formatter() -> logging.Formatter:
+    from logninja.ninja_json_formatter import NinjaJsonFormatter
+
+    return NinjaJsonFormatter()
+
+
+def _default_console() -> ConsoleInterface:
+    from logninja.ninja_console import NinjaConsole
+
+    return NinjaConsole()
+
+
+@dataclass
+class QueueConfig:
+    maxsize: int = 10_000
+    overflow_policy: str = BLOCK
+
+
+@dataclass
+class BufferConfig:
+    max_bytes: int = 64 * 1024
+    max_records: int = 1000
+    max_latency: float = 0.5
+    flush_level: int = logging.ERROR
+
+
+@dataclass
+class RotationConfig:
+    max_bytes: Optional[int] = None
+    interval: Optional[float] = None
+    backup_count: Optional[int] = 7
+    max_total_bytes: Optional[int] = None
+    compress: bool = True
+
+
+@dataclass
+class IndexConfig:
+    every_records: int = 1000
+    every_seconds: float = 1.0
+
+
+@dataclass
+class AggregatorConfig:
+    # Defaults to a socket named after the log file, see
+    # ``logninja.aggregator.default_address``.
+    address: Optional[str] = None
+    max_batch_records: int = 500
+    max_batch_bytes: int = 256 * 1024
+    max_latency: float = 0.2
+    max_buffered_records: int = 100_000
+
+
+@dataclass
+class StatsReportConfig:
+    interval: float = 60.0
+    level: int = logging.INFO
 
 
 @dataclass
 class LogFileConfig:
     level: int = logging.INFO
-    fmt: logging.Formatter = NinjaJsonFormatter()
-    filename: str = "logs.jsonl"
+    fmt: logging.Formatter = field(default_factory=_default_formatter)
+    # Defaults to logs.jsonl, or logs.lnb for binary files.
+    filename: Optional[str] = None
     clear_file_on_setup: bool = False
+    queue_config: Optional[QueueConfig] = None
+    buffer_config: Optional[BufferConfig] = None
+    rotation_config: Optional[RotationConfig] = None
+    aggregator_config: Optional[AggregatorConfig] = None
+    index_config: Optional[IndexConfig] = None
+    binary: bool = False
+
+    def __post_init__(self) -> None:
+        if self.filename is None:
+            self.filename = "logs.lnb" if self.binary else "logs.jsonl"
 
 
 @dataclass
 class LogConsoleConfig:
     level: int = logging.INFO
-    fmt: logging.Formatter = NinjaJsonFormatter()
-    console: ConsoleInterface = NinjaConsole()
+    fmt: logging.Formatter = field(default_factory=_default_formatter)
+    console: ConsoleInterface = field(default_factory=_default_console)
     print_exeption: bool = True
     sys_excepthook: bool = False
+    queue_config: Optional[QueueConfig] = None
+    buffer_config: Optional[BufferConfig] = None
 
 
 @dataclass
@@ -1,4 +1,28 @@
 from abc import ABC, abstractmethod
+from typing import NamedTuple, Optional
+
+
+class LogFields(NamedTuple):
+    """
+    A record rendered field by field by ``NinjaFormatter.format_fields``, so
+    consoles can style each part without parsing the formatted line.
+    """
+
+    time: str
+    level: str
+    levelno: int
+    message: str
+    logger: str
+    path: str
+    extras: Optional[dict]
+
+    def to_text(self) -> str:
+        """The line ``NinjaFormatter.format`` builds from the same fields."""
+        text = f"{self.time}{self.level} {self.message} ({self.logger}) {self.path}"
+        if self.extras:
+            extras = ", ".join([f"{key}={value}" for key, value in self.extras.items()])
+            text = f"{text}  [{extras}]"
+        return text
 
 
 class ConsoleInterface(ABC):
@@ -9,12 +33,26 @@ class ConsoleInterface(ABC):
         """Prints the given message to the console."""
         pass
 
+    def print_fields(self, fields: LogFields, **kwargs) -> Optional[str]:
+        """
+        Prints a record from its fields. Consoles that style the parts of a
+        line override it, ``NinjaHandler`` then skips building the string.
+
+        Returns the text printed, without styling, for the handler's stats.
+        """
+        text = fields.to_text()
+        self.print(text, **kwargs)
+        return text
+
     @abstractmethod
     def print_json(self, json: str, *args, **kwargs):
         """Prints the given message as JSON to the console."""
         pass
 
     @abstractmethod
-    def print_exception(self, show_locals: bool = False):
-        """Prints the exception to the console."""
+    def print_exception(self, show_locals: bool = False, exc_info=None):
+        """
+        Prints the exception to the console. Uses ``sys.exc_info()`` when
+        ``exc_info`` is not given.
+        """
         pass
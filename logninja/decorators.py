@@ -1,93 +1,258 @@
 import asyncio
 import functools
 import logging
+import reprlib
 import time
+from typing import Callable, Iterable, Optional
 
+from logninja.execution_stats import ExecutionStats, register_execution_stats
 from logninja.logger import logger as logninja_logger
+from logninja.utils import LazyStr
+
+LEFT_OUT_PARAM = "..."
+
+
+def _compile_params_renderer(
+    func: Callable,
+    max_param_length: int,
+    include_params: Optional[Iterable[str]],
+    exclude_params: Optional[Iterable[str]],
+) -> Callable[[tuple, dict], str]:
+    """
+    Resolves, once per decorated function, which arguments are rendered and
+    returns a function that renders them like
+    ``str({"args": [...], "kwargs": {...}})``.
+    """
+    bounded_repr = reprlib.Repr()
+    bounded_repr.maxstring = max_param_length
+    bounded_repr.maxother = max_param_length
+
+    def render_value(value) -> str:
+        text = bounded_repr.repr(value)
+        if len(text) > max_param_length:
+            text = text[:max_param_length] + "..."
+        return text
+
+    code = getattr(func, "__code__", None)
+    positional_names = code.co_varnames[: code.co_argcount] if code else ()
+    include = None if include_params is None else frozenset(include_params)
+    exclude = frozenset(exclude_params or ())
+
+    def is_rendered(name: Optional[str]) -> bool:
+        if name is None:
+            # Extra positional arguments, caught by ``*args``.
+            return include is None
+        return (include is None or name in include) and name not in exclude
+
+    rendered_positions = [is_rendered(name) for name in positional_names]
+    extra_positions_rendered = is_rendered(None)
+
+    def render(args: tuple, kwargs: dict) -> str:
+        arg_reprs = []
+        for index, value in enumerate(args):
+            rendered = (
+                rendered_positions[index]
+                if index < len(rendered_positions)
+                else extra_positions_rendered
+            )
+            arg_reprs.append(render_value(value) if rendered else LEFT_OUT_PARAM)
+        kwarg_reprs = [
+            f"{name!r}: {render_value(value)}"
+            for name, value in kwargs.items()
+            if is_rendered(name)
+        ]
+        return (
+            f"{{'args': [{', '.join(arg_reprs)}],"
+            f" 'kwargs': {{{', '.join(kwarg_reprs)}}}}}"
+        )
+
+    return render
 
 
 def log_execution(
     logger: logging.Logger = logninja_logger,
     level: int = logging.INFO,
     capture_exception: bool = False,
+    max_param_length: int = 200,
+    include_params: Optional[Iterable[str]] = None,
+    exclude_params: Optional[Iterable[str]] = None,
+    aggregate: bool = False,
+    aggregate_interval: float = 60.0,
 ):
     """
     Decorator to log the execution time of a function or coroutine.
 
+    When ``level`` is disabled for the logger, the call goes straight to the
+    function: arguments are not rendered and nothing is timed. Otherwise they
+    are rendered when the start record is formatted, not for records a filter
+    or handler drops.
+
     Args:
         logger (logging.Logger): The logger to be used.
         level (int): The logging level to be used.
         capture_exception (bool): Whether to capture exceptions. Defaults to False.
+        max_param_length (int): Maximum length of the rendering of each
+            argument. Defaults to 200.
+        include_params (Iterable[str] | None): Names of the only arguments that
+            are rendered. Defaults to all of them.
+        exclude_params (Iterable[str] | None): Names of arguments that are never
+            rendered, e.g. ``["password"]``. Positional arguments left out show
+            as ``...``.
+        aggregate (bool): Whether calls are summarized, instead of logged one
+            by one: durations and errors are aggregated in memory and one
+            record with ``calls``, ``errors``, ``mean``, ``p50``, ``p99`` and
+            ``max`` (in nanoseconds) is logged per interval. Defaults to False.
+        aggregate_interval (float): Seconds between summaries. Defaults to 60.
 
     Returns:
         Callable: The decorator.
     """
 
     def decorator(func):
-        levels = {
-            logging.CRITICAL: "critical",
-            logging.ERROR: "error",
-            logging.WARNING: "warning",
-            logging.INFO: "info",
-            logging.DEBUG: "debug",
-        }
-        level_attr = levels.get(level, "info")
-        logger_with_level = getattr(logger, level_attr)
-
-        def log_start(*args, **kwargs):
-            params = {"args": list(args), "kwargs": kwargs}
-            logger_with_level(
-                f"Starting execution of function '{func.__qualname__}'",
-                extra={"params": str(params)},
+        if aggregate:
+            return _aggregate_execution(
+                func, logger, level, capture_exception, aggregate_interval
             )
 
-        def log_end(end: float, start: float):
-            logger_with_level(
-                f"'{func.__qualname__}' executed in {end - start:.4f} seconds"
+        qualname = func.__qualname__
+        start_message = f"Starting execution of function '{qualname}'"
+        render_params = _compile_params_renderer(
+            func, max_param_length, include_params, exclude_params
+        )
+
+        def log_start(args: tuple, kwargs: dict):
+            # Rendered when the record is formatted, if it ever is.
+            params = LazyStr(render_params, args, kwargs)
+            logger.log(level, start_message, extra={"params": params})
+
+        def log_end(duration: int):
+            logger.log(
+                level,
+                f"'{qualname}' executed in {duration / 1e9:.4f} seconds",
+                extra={"duration": duration},
             )
 
         def log_exception(exc: Exception):
             logger.exception(
-                f"An error occurred while executing '{func.__qualname__}'",
+                f"An error occurred while executing '{qualname}'",
                 exc_info=exc,
             )
             raise exc
 
         @functools.wraps(func)
         def sync_wrapper(*args, **kwargs):
-            log_start(*args, **kwargs)
+            if not logger.isEnabledFor(level):
+                if not capture_exception:
+                    return func(*args, **kwargs)
+                try:
+                    return func(*args, **kwargs)
+                except Exception as exc:
+                    log_exception(exc)
 
-            start = time.time()
+            log_start(args, kwargs)
+
+            start = time.perf_counter_ns()
             if capture_exception:
                 try:
                     result = func(*args, **kwargs)
                 except Exception as exc:
                     log_exception(exc)
-                    return exc
             else:
                 result = func(*args, **kwargs)
-            end = time.time()
+            duration = time.perf_counter_ns() - start
 
-            log_end(end, start)
+            log_end(duration)
             return result
 
+        @functools.wraps(func)
         async def async_wrapper(*args, **kwargs):
-            log_start(*args, **kwargs)
+            if not logger.isEnabledFor(level):
+                if not capture_exception:
+                    return await func(*args, **kwargs)
+                try:
+                    return await func(*args, **kwargs)
+                except Exception as exc:
+                    log_exception(exc)
 
-            start = time.time()
+            log_start(args, kwargs)
+
+            start = time.perf_counter_ns()
             if capture_exception:
                 try:
                     result = await func(*args, **kwargs)
                 except Exception as exc:
                     log_exception(exc)
-                    return exc
             else:
                 result = await func(*args, **kwargs)
-            end = time.time()
+            duration = time.perf_counter_ns() - start
 
-            log_end(end, start)
+            log_end(duration)
             return result
 
         return async_wrapper if asyncio.iscoroutinefunction(func) else sync_wrapper
 
     return decorator
+
+
+def _aggregate_execution(
+    func,
+    logger: logging.Logger,
+    level: int,
+    capture_exception: bool,
+    interval: float,
+) -> Callable:
+    qualname = func.__qualname__
+    stats = ExecutionStats(qualname, interval=interval, level=level)
+    register_execution_stats(stats, logger)
+
+    def finish(start: int, failed: bool):
+        if stats.record(time.perf_counter_ns() - start, failed):
+            stats.emit(logger)
+
+    def log_exception(exc: Exception):
+        logger.exception(
+            f"An error occurred while executing '{qualname}'",
+            exc_info=exc,
+        )
+
+    @functools.wraps(func)
+    def sync_wrapper(*args, **kwargs):
+        enabled = logger.isEnabledFor(level)
+        if not enabled and not capture_exception:
+            return func(*args, **kwargs)
+
+        start = time.perf_counter_ns()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as exc:
+            if enabled:
+                finish(start, True)
+            if capture_exception:
+                log_exception(exc)
+            raise
+        if enabled:
+            finish(start, False)
+        return result
+
+    @functools.wraps(func)
+    async def async_wrapper(*args, **kwargs):
+        enabled = logger.isEnabledFor(level)
+        if not enabled and not capture_exception:
+            return await func(*args, **kwargs)
+
+        start = time.perf_counter_ns()
+        try:
+            result = await func(*args, **kwargs)
+        except Exception as exc:
+            if enabled:
+                finish(start, True)
+            if capture_exception:
+                log_exception(exc)
+            raise
+        if enabled:
+            finish(start, False)
+        return result
+
+    wrapper = async_wrapper if asyncio.iscoroutinefunction(func) else sync_wrapper
+    wrapper.execution_stats = stats
+    return wrapper
@@ -0,0 +1,150 @@
+import base64
+import dataclasses
+import datetime as dt
+import enum
+import json
+import math
+from typing import Any, Callable, Union
+
+JsonEncoder = Callable[[Any], str]
+
+ENCODERS = ("orjson", "msgspec", "json")
+
+
+def _isoformat(value: Union[dt.datetime, dt.time]) -> str:
+    text = value.isoformat()
+    if value.utcoffset() == dt.timedelta(0):
+        return text[: -len("+00:00")] + "Z"
+    return text
+
+
+def _duration(value: dt.timedelta) -> str:
+    """ISO 8601 duration, e.g. ``P1DT30.5S``."""
+    sign = "-" if value < dt.timedelta(0) else ""
+    value = abs(value)
+    text = f"{value.days}D" if value.days else ""
+    if value.seconds or value.microseconds:
+        fraction = (
+            f".{value.microseconds:06d}".rstrip("0") if value.microseconds else ""
+        )
+        text += f"T{value.seconds}{fraction}S"
+    return f"{sign}P{text or '0D'}"
+
+
+def default(obj: Any) -> Any:
+    """
+    Encodes what JSON has no type for the way msgspec does natively, so all
+    backends write the same document: ISO 8601 dates, times and durations
+    (``Z`` for UTC), enums as their value, dataclasses as objects, sets as
+    arrays, bytes in base64. Anything else is written as ``str(obj)``.
+    """
+    if isinstance(obj, (dt.datetime, dt.time)):
+        return _isoformat(obj)
+    if isinstance(obj, dt.date):
+        return obj.isoformat()
+    if isinstance(obj, dt.timedelta):
+        return _duration(obj)
+    if isinstance(obj, enum.Enum):
+        return obj.value
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return {
+            field.name: getattr(obj, field.name) for field in dataclasses.fields(obj)
+        }
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, (bytes, bytearray, memoryview)):
+        return base64.b64encode(obj).decode()
+    return str(obj)
+
+
+def _finite(obj: Any, seen: set) -> Any:
+    """``obj`` with NaN and infinities replaced by ``None``, as orjson does."""
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, (dict, list, tuple)):
+        if id(obj) in seen:
+            # Left for ``json.dumps`` to report the circular reference.
+            return obj
+        seen.add(id(obj))
+        if isinstance(obj, dict):
+            result = {key: _finite(value, seen) for key, value in obj.items()}
+        else:
+            result = [_finite(value, seen) for value in obj]
+        seen.discard(id(obj))
+        return result
+    return obj
+
+
+def _finite_default(obj: Any) -> Any:
+    return _finite(default(obj), set())
+
+
+def json_encoder(obj: Any) -> str:
+    try:
+        return json.dumps(obj, default=default, allow_nan=False)
+    except ValueError:
+        # NaN or infinities, which JSON has no literal for: written as null
+        # like the other backends do, instead of the invalid ``NaN``.
+        return json.dumps(_finite(obj, set()), default=_finite_default)
+
+
+def _orjson_encoder() -> JsonEncoder:
+    import orjson
+
+    option = orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+
+    def orjson_encoder(obj: Any) -> str:
+        try:
+            return orjson.dumps(obj, default=default, option=option).decode()
+        except TypeError:
+            # e.g. integers wider than 64 bits, which orjson refuses.
+            return json_encoder(obj)
+
+    return orjson_encoder
+
+
+def _msgspec_encoder() -> JsonEncoder:
+    import msgspec
+
+    encoder = msgspec.json.Encoder(enc_hook=default)
+
+    def msgspec_encoder(obj: Any) -> str:
+        try:
+            return encoder.encode(obj).decode()
+        except (TypeError, ValueError, OverflowError):
+            return json_encoder(obj)
+
+    return msgspec_encoder
+
+
+def get_encoder(encoder: Union[str, JsonEncoder, None] = None) -> JsonEncoder:
+    """
+    Resolves the function used to turn a log dict into a JSON string.
+
+    Args:
+        encoder (str | Callable | None): A callable is returned as is. A name
+            (``"orjson"``, ``"msgspec"`` or ``"json"``) selects that backend.
+            ``None`` picks the fastest installed backend, falling back to the
+            stdlib ``json``.
+
+    Returns:
+        Callable: The encoder.
+    """
+    if callable(encoder):
+        return encoder
+
+    if encoder is None:
+        for name in ENCODERS:
+            try:
+                return get_encoder(name)
+            except ImportError:
+                continue
+
+    if encoder == "orjson":
+        return _orjson_encoder()
+    if encoder == "msgspec":
+        return _msgspec_encoder()
+    if encoder == "json":
+        return json_encoder
+
+    raise ValueError(f"Invalid encoder {encoder!r}, use one of {', '.join(ENCODERS)}")
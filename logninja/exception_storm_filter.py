@@ -0,0 +1,65 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Tuple
+
+from logninja.traceback import FINGERPRINT_ATTR, REPEAT_COUNT_ATTR, fingerprint
+
+
+class ExceptionStormFilter(logging.Filter):
+    """
+    Keeps a burst of identical exceptions from flooding the logs.
+
+    The first record of an exception fingerprint in a window goes through
+    with its full traceback. Later records with the same fingerprint in the
+    same window lose their ``exc_info`` and ``stack_info``, and only carry the
+    fingerprint (``exc_fingerprint``) and how many times it was seen in the
+    window so far (``exc_repeat_count``). Once ``window`` seconds have passed since the full
+    record, the next occurrence is logged in full again.
+
+    Args:
+        window (float): Length of the suppression window, in seconds.
+        max_fingerprints (int): How many fingerprints are tracked, the least
+            recently seen ones are forgotten first.
+        name (str): Filter name.
+    """
+
+    def __init__(
+        self,
+        window: float = 60.0,
+        max_fingerprints: int = 1024,
+        name: str = "ExceptionStormFilter",
+    ) -> None:
+        super().__init__(name)
+        self.window = window
+        self.max_fingerprints = max_fingerprints
+        self._seen: "OrderedDict[str, Tuple[float, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        exc_info = record.exc_info
+        if not exc_info or exc_info[0] is None:
+            return True
+        if FINGERPRINT_ATTR in record.__dict__:
+            # Already handled, the filter is usually shared by all handlers.
+            return True
+
+        exc_fingerprint = fingerprint(exc_info)
+        now = time.monotonic()
+        with self._lock:
+            window_start, count = self._seen.pop(exc_fingerprint, (None, 0))
+            if window_start is None or now - window_start >= self.window:
+                window_start, count = now, 0
+            count += 1
+            self._seen[exc_fingerprint] = (window_start, count)
+            if len(self._seen) > self.max_fingerprints:
+                self._seen.popitem(last=False)
+
+        setattr(record, FINGERPRINT_ATTR, exc_fingerprint)
+        setattr(record, REPEAT_COUNT_ATTR, count)
+        if count > 1:
+            record.exc_info = None
+            record.exc_text = None
+            record.stack_info = None
+        return True
@@ -0,0 +1,96 @@
+import atexit
+import logging
+import threading
+import time
+from typing import List, Tuple
+
+from logninja.histogram import LogLinearHistogram
+
+
+class ExecutionStats:
+    """
+    Durations and errors of one function decorated with
+    ``log_execution(aggregate=True)``, summarized in one record per interval.
+
+    Durations go in a fixed-size log-linear histogram, so memory doesn't grow
+    with the number of calls. Safe to record from several threads: the lock
+    is only held to update the histogram, records are logged outside of it.
+
+    Args:
+        name (str): Qualified name of the function.
+        interval (float): Seconds between summaries.
+        level (int): Level of the summary records.
+    """
+
+    def __init__(self, name: str, interval: float = 60.0, level: int = logging.INFO):
+        self.name = name
+        self.interval = interval
+        self.level = level
+        self._lock = threading.Lock()
+        self._durations = LogLinearHistogram()
+        self._errors = 0
+        self._interval_start = time.monotonic()
+
+    def record(self, duration_ns: int, failed: bool = False) -> bool:
+        """Records a call, returns whether the interval is over."""
+        with self._lock:
+            self._durations.record(duration_ns // 1000)
+            if failed:
+                self._errors += 1
+            return time.monotonic() - self._interval_start >= self.interval
+
+    def emit(self, logger: logging.Logger) -> None:
+        """Logs the summary of the interval, if it had calls, and starts a new one."""
+        now = time.monotonic()
+        with self._lock:
+            durations, self._durations = self._durations, LogLinearHistogram()
+            errors, self._errors = self._errors, 0
+            interval = now - self._interval_start
+            self._interval_start = now
+
+        if durations.count == 0 or not logger.isEnabledFor(self.level):
+            return
+
+        mean = round(durations.mean * 1000)
+        p50, p99 = (durations.percentile(p) * 1000 for p in (50, 99))
+        max_duration = durations.max * 1000
+        logger.log(
+            self.level,
+            f"'{self.name}' - {durations.count} calls, {errors} errors,"
+            f" mean {mean / 1e6:.2f}ms p50 {p50 / 1e6:.2f}ms"
+            f" p99 {p99 / 1e6:.2f}ms max {max_duration / 1e6:.2f}ms",
+            extra={
+                "target": self.name,
+                "calls": durations.count,
+                "errors": errors,
+                "mean": mean,
+                "p50": p50,
+                "p99": p99,
+                "max": max_duration,
+                "interval": round(interval, 3),
+            },
+        )
+
+
+_pending: List[Tuple[ExecutionStats, logging.Logger]] = []
+_pending_lock = threading.Lock()
+
+
+def register_execution_stats(stats: ExecutionStats, logger: logging.Logger) -> None:
+    """Has the last, partial interval of ``stats`` logged at exit."""
+    with _pending_lock:
+        if not _pending:
+            atexit.register(emit_pending_stats)
+        _pending.append((stats, logger))
+
+
+def emit_pending_stats() -> None:
+    """
+    Logs the partial interval of every registered ``ExecutionStats``. Called
+    at exit, and by LogNinja before its queue handlers stop, since atexit
+    hooks registered at decoration time run after theirs.
+    """
+    with _pending_lock:
+        pending = list(_pending)
+    for stats, logger in pending:
+        stats.emit(logger)
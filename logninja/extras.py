@@ -0,0 +1,69 @@
+import logging
+from itertools import islice
+from typing import Callable, Union
+
+from logninja.options import All, Only
+from logninja.utils import LOG_RECORD_BUILTIN_ATTRS
+
+
+def _record_baseline() -> int:
+    probe = logging.LogRecord("probe", logging.INFO, "", 0, "", (), None)
+    return len(probe.__dict__)
+
+
+# LogRecord.__init__ always sets the same attributes in the same order, and
+# dicts keep insertion order. Everything past the first RECORD_BASELINE keys of
+# a record's __dict__ was added afterwards: the `extra=` keys set by
+# Logger.makeRecord, and attributes set by record factories and filters
+# (e.g. ContextVarsFilter). Reading that tail finds the extras without
+# diffing the whole __dict__ against the builtin attributes.
+RECORD_BASELINE = _record_baseline()
+
+
+def compile_extras(
+    extras: Union[All, Only, None],
+) -> Callable[[logging.LogRecord], Union[dict, None]]:
+    """
+    Resolves the extras option once into a function that returns the extras
+    of a record, so formatters don't dispatch on the option per record.
+
+    Args:
+        extras (All | Only | None): ``All()`` returns every extra except the
+            ``exclude`` list, ``Only([...])`` returns just the given keys and
+            ``None`` returns nothing.
+
+    Returns:
+        Callable: Takes a record and returns a dict, or None when there are
+            no extras to add.
+    """
+    if extras is None:
+        return lambda record: None
+
+    if isinstance(extras, All):
+        baseline = RECORD_BASELINE
+        # Formatters from other handlers may also set builtin attributes such
+        # as `message` or `asctime` after the record was created.
+        excluded = frozenset(LOG_RECORD_BUILTIN_ATTRS).union(extras.exclude)
+
+        def get_all_extras(record: logging.LogRecord) -> Union[dict, None]:
+            attrs = record.__dict__
+            if len(attrs) <= baseline:
+                return None
+            return {
+                key: value
+                for key, value in islice(attrs.items(), baseline, None)
+                if key not in excluded
+            }
+
+        return get_all_extras
+
+    if isinstance(extras, Only):
+        keys = tuple(extras.extras)
+
+        def get_only_extras(record: logging.LogRecord) -> dict:
+            attrs = record.__dict__
+            return {key: attrs[key] for key in keys if key in attrs}
+
+        return get_only_extras
+
+    raise ValueError("Invalid option, use All(),  Only([list of extras]) or None")
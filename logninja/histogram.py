@@ -0,0 +1,152 @@
+from typing import Dict, List, Sequence
+
+SUB_BUCKET_BITS = 4
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+MAX_VALUE_BITS = 32
+
+
+def bucket_index(value: int) -> int:
+    """
+    Log-linear bucket of a non-negative integer.
+
+    Values below ``2 * SUB_BUCKETS`` get a bucket each. Above that, every power
+    of two is split into ``SUB_BUCKETS`` equal buckets, which bounds the
+    relative error of a bucket to ``1 / SUB_BUCKETS``.
+    """
+    if value < 2 * SUB_BUCKETS:
+        return value
+    shift = value.bit_length() - SUB_BUCKET_BITS - 1
+    return shift * SUB_BUCKETS + (value >> shift)
+
+
+def bucket_bounds(index: int) -> Sequence[int]:
+    """Lowest and highest value that fall in the bucket."""
+    if index < 2 * SUB_BUCKETS:
+        return index, index
+    shift, offset = divmod(index - SUB_BUCKETS, SUB_BUCKETS)
+    mantissa = SUB_BUCKETS + offset
+    return mantissa << shift, ((mantissa + 1) << shift) - 1
+
+
+BUCKET_COUNT = bucket_index((1 << MAX_VALUE_BITS) - 1) + 1
+
+
+class LogLinearHistogram:
+    """
+    Fixed-size histogram of non-negative integers, e.g. durations in
+    microseconds.
+
+    Memory is a fixed number of counters whatever the number of values, and
+    values above ``2 ** max_value_bits`` land in the last bucket. Percentiles
+    are reported as the middle of their bucket; ``min`` and ``max`` are exact.
+    Not thread-safe, callers that record from several threads must lock.
+    """
+
+    __slots__ = ("counts", "count", "total", "min", "max")
+
+    def __init__(self, max_value_bits: int = MAX_VALUE_BITS) -> None:
+        bucket_count = bucket_index((1 << max_value_bits) - 1) + 1
+        self.counts: List[int] = [0] * bucket_count
+        self.count = 0
+        self.total = 0
+        self.min = 0
+        self.max = 0
+
+    def record(self, value: int) -> None:
+        value = int(value)
+        if value < 0:
+            value = 0
+        index = bucket_index(value)
+        counts = self.counts
+        if index >= len(counts):
+            index = len(counts) - 1
+        counts[index] += 1
+
+        if self.count == 0 or value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        self.count += 1
+        self.total += value
+
+    def record_all(self, values: List[int]) -> None:
+        """
+        Records integers in one pass, with ``bucket_index`` inlined, which
+        is much faster than a ``record`` call per value.
+        """
+        if not values:
+            return
+        counts = self.counts
+        last = len(counts) - 1
+        exact = 2 * SUB_BUCKETS
+        for value in values:
+            if value < exact:
+                index = value if value > 0 else 0
+            else:
+                shift = value.bit_length() - SUB_BUCKET_BITS - 1
+                index = shift * SUB_BUCKETS + (value >> shift)
+                if index > last:
+                    index = last
+            counts[index] += 1
+
+        low = min(values)
+        if low < 0:
+            # Negative values are recorded as 0, like in ``record``.
+            low = 0
+            self.total += sum(value for value in values if value > 0)
+        else:
+            self.total += sum(values)
+        if self.count == 0 or low < self.min:
+            self.min = low
+        self.max = max(self.max, max(values))
+        self.count += len(values)
+
+    def scale_up(self, bits: int) -> None:
+        """
+        Multiplies the recorded values by ``2 ** bits``. Every value of a
+        bucket lands in the same bucket, so this adds no error.
+        """
+        counts = [0] * len(self.counts)
+        last = len(counts) - 1
+        for index, count in enumerate(self.counts):
+            if count:
+                low, _ = bucket_bounds(index)
+                counts[min(bucket_index(low << bits), last)] += count
+        self.counts = counts
+        self.total <<= bits
+        self.min <<= bits
+        self.max <<= bits
+
+    def merge(self, other: "LogLinearHistogram") -> None:
+        """Adds the values of a histogram with the same ``max_value_bits``."""
+        if len(other.counts) != len(self.counts):
+            raise ValueError("Histograms have different max_value_bits")
+        if other.count == 0:
+            return
+        self.counts = [mine + theirs for mine, theirs in zip(self.counts, other.counts)]
+        if self.count == 0 or other.min < self.min:
+            self.min = other.min
+        if other.max > self.max:
+            self.max = other.max
+        self.count += other.count
+        self.total += other.total
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, percent: float) -> int:
+        if self.count == 0:
+            return 0
+
+        rank = max(1, round(self.count * percent / 100))
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                low, high = bucket_bounds(index)
+                return min(max((low + high) // 2, self.min), self.max)
+        return self.max
+
+    def percentiles(self, percents: Sequence[float]) -> Dict[float, int]:
+        return {percent: self.percentile(percent) for percent in percents}
@@ -0,0 +1,191 @@
+import itertools
+import logging
+import threading
+import weakref
+from typing import Dict, List, Optional, Tuple
+
+_handlers: "weakref.WeakSet[logging.Handler]" = weakref.WeakSet()
+_registration_order = itertools.count()
+
+
+class HandlerStats:
+    """
+    Counters of what a handler costs: records and bytes emitted per level,
+    time spent formatting and writing, exceptions formatted.
+
+    Updated from ``emit``, under the handler's lock, so they take no lock of
+    their own. Snapshots are read without locking and can be off by the
+    record being emitted.
+    """
+
+    __slots__ = (
+        "records",
+        "bytes",
+        "format_ns",
+        "format_max_ns",
+        "write_ns",
+        "write_max_ns",
+        "exceptions",
+        "order",
+    )
+
+    def __init__(self) -> None:
+        self.records: Dict[int, int] = {}
+        self.bytes: Dict[int, int] = {}
+        self.format_ns = 0
+        self.format_max_ns = 0
+        self.write_ns = 0
+        self.write_max_ns = 0
+        self.exceptions = 0
+        self.order = next(_registration_order)
+
+    def add(
+        self,
+        record: logging.LogRecord,
+        size: int,
+        format_ns: int,
+        write_ns: int,
+    ) -> None:
+        levelno = record.levelno
+        self.records[levelno] = self.records.get(levelno, 0) + 1
+        if size:
+            self.bytes[levelno] = self.bytes.get(levelno, 0) + size
+        self.format_ns += format_ns
+        if format_ns > self.format_max_ns:
+            self.format_max_ns = format_ns
+        self.write_ns += write_ns
+        if write_ns > self.write_max_ns:
+            self.write_max_ns = write_ns
+        exc_info = record.exc_info
+        if exc_info and exc_info[0] is not None:
+            self.exceptions += 1
+
+    def snapshot(self) -> dict:
+        return {
+            "records": _by_level_name(self.records),
+            "bytes": _by_level_name(self.bytes),
+            "format_ns": {"total": self.format_ns, "max": self.format_max_ns},
+            "write_ns": {"total": self.write_ns, "max": self.write_max_ns},
+            "exceptions_formatted": self.exceptions,
+        }
+
+
+def encoded_size(text: str, encoding: str = "utf-8", errors: str = "replace") -> int:
+    """Size of ``text`` once encoded, without encoding ASCII text."""
+    if text.isascii():
+        return len(text)
+    return len(text.encode(encoding or "utf-8", errors))
+
+
+def _by_level_name(counts: Dict[int, int]) -> Dict[str, int]:
+    return {
+        logging.getLevelName(levelno): count
+        for levelno, count in sorted(counts.items())
+    }
+
+
+def register_handler(handler: logging.Handler) -> HandlerStats:
+    """Gives the handler its ``HandlerStats`` and lists it in ``stats()``."""
+    _handlers.add(handler)
+    return HandlerStats()
+
+
+def stats() -> Dict[str, Dict[str, dict]]:
+    """
+    Snapshot of the counters of every live LogNinja handler, under
+    ``"handlers"``, keyed by the handler's name, or its class name when it
+    has none.
+
+    Besides the ``HandlerStats`` counters, each entry has the number of
+    records the handler ``dropped`` (queue overflows, aggregator outages...).
+
+    Under ``"formatters"``, keyed by class name, are the records, bytes,
+    formatting time and exceptions of each formatter, summed over the
+    handlers using it.
+    """
+    handler_entries: Dict[str, dict] = {}
+    formatters: Dict[int, Tuple[logging.Formatter, List[HandlerStats]]] = {}
+    handlers = sorted(list(_handlers), key=lambda handler: handler.stats.order)
+    for handler in handlers:
+        key = handler.name or type(handler).__name__
+        if key in handler_entries:
+            key = f"{key}#{handler.stats.order}"
+        entry = handler.stats.snapshot()
+        entry["dropped"] = getattr(handler, "dropped", 0)
+        handler_entries[key] = entry
+        if handler.formatter is not None:
+            formatter = handler.formatter
+            formatters.setdefault(id(formatter), (formatter, []))[1].append(
+                handler.stats
+            )
+
+    formatter_entries: Dict[str, dict] = {}
+    for formatter, handler_stats in formatters.values():
+        key = type(formatter).__name__
+        if key in formatter_entries:
+            key = f"{key}#{handler_stats[0].order}"
+        formatter_entries[key] = _formatter_entry(handler_stats)
+    return {"handlers": handler_entries, "formatters": formatter_entries}
+
+
+def _formatter_entry(handler_stats: List[HandlerStats]) -> dict:
+    records: Dict[int, int] = {}
+    sizes: Dict[int, int] = {}
+    for entry in handler_stats:
+        for levelno, count in entry.records.items():
+            records[levelno] = records.get(levelno, 0) + count
+        for levelno, size in entry.bytes.items():
+            sizes[levelno] = sizes.get(levelno, 0) + size
+    return {
+        "records": _by_level_name(records),
+        "bytes": _by_level_name(sizes),
+        "format_ns": {
+            "total": sum(entry.format_ns for entry in handler_stats),
+            "max": max(entry.format_max_ns for entry in handler_stats),
+        },
+        "exceptions_formatted": sum(entry.exceptions for entry in handler_stats),
+    }
+
+
+class StatsReporter:
+    """
+    Logs ``stats()`` every ``interval`` seconds, from a background thread, as
+    a record with the snapshot in its ``logninja_stats`` field.
+
+    Args:
+        interval (float): Seconds between reports.
+        logger (logging.Logger): Logger of the reports.
+        level (int): Level of the reports.
+    """
+
+    def __init__(
+        self,
+        interval: float = 60.0,
+        logger: Optional[logging.Logger] = None,
+        level: int = logging.INFO,
+    ) -> None:
+        self.interval = interval
+        self.logger = logger or logging.getLogger("logninja.stats")
+        self.level = level
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "StatsReporter":
+        self._thread = threading.Thread(
+            target=self._run, name="logninja-stats", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def report(self) -> None:
+        self.logger.log(self.level, "LogNinja stats", extra={"logninja_stats": stats()})
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            self.report()
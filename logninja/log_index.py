@@ -0,0 +1,370 @@
+"""
+Sparse index of a log file, kept next to it in ``<log file>.idx``.
+
+The log is split in blocks of consecutive records, closed every
+``every_records`` records or ``every_seconds`` seconds. The index holds one
+fixed-size entry per block: its byte range in the log, the min and max
+``created`` time of its records, their count and a bitmap of their levels,
+one bit per level bucket (``levelno // 10``).
+
+Readers memory-map the log and only scan the blocks that can match a query,
+plus the tail of the log the index doesn't cover yet.
+"""
+
+import argparse
+import datetime as dt
+import json
+import logging
+import math
+import mmap
+import os
+import struct
+import sys
+from typing import BinaryIO, Callable, Iterator, List, NamedTuple, Optional, Union
+
+from logninja.timestamps import parse_timestamp
+
+MAGIC = b"LNJI\x01"
+
+# Start and end offsets, min and max created time, count, levels bitmap.
+ENTRY = struct.Struct("<QQddII")
+
+# Bitmap and times of a block whose records are unknown, e.g. written while
+# indexing was off. It matches every query.
+ALL_LEVELS = 0xFF
+UNKNOWN_MIN_CREATED = -math.inf
+UNKNOWN_MAX_CREATED = math.inf
+
+Timestamp = Union[float, dt.datetime, None]
+
+
+def index_filename(log_filename: str) -> str:
+    return log_filename + ".idx"
+
+
+def level_bit(levelno: int) -> int:
+    return 1 << min(max(levelno, 0) // 10, 7)
+
+
+class IndexBlock(NamedTuple):
+    start: int
+    end: int
+    min_created: float
+    max_created: float
+    count: int
+    levels: int
+
+    def matches(self, since: float, until: float, min_level: int) -> bool:
+        return (
+            self.max_created >= since
+            and self.min_created <= until
+            and self.levels >> min(max(min_level, 0) // 10, 7) != 0
+        )
+
+
+class LogIndexWriter:
+    """
+    Writes the index of a log file as records are appended to it.
+
+    Args:
+        log_filename (str): Path of the log file.
+        every_records (int): Maximum number of records per block.
+        every_seconds (float): Maximum time between the first and the last
+            record of a block.
+    """
+
+    def __init__(
+        self, log_filename: str, every_records: int = 1000, every_seconds: float = 1.0
+    ) -> None:
+        if every_records <= 0 or every_seconds <= 0:
+            raise ValueError("every_records and every_seconds must be > 0")
+
+        self.filename = index_filename(log_filename)
+        self.every_records = every_records
+        self.every_seconds = every_seconds
+        self.offset = 0
+        self._stream: Optional[BinaryIO] = None
+        self._reset_block()
+
+    def _reset_block(self) -> None:
+        self._start = self.offset
+        self._count = 0
+        self._min_created = math.inf
+        self._max_created = -math.inf
+        self._first_created = 0.0
+        self._levels = 0
+
+    def open(self, log_size: int) -> None:
+        """
+        Opens the index of a log currently ``log_size`` bytes long. Records
+        the index doesn't know about become one unknown block, and an index
+        of a log that was cleared or replaced is started over.
+        """
+        self.close()
+        try:
+            blocks = read_index_file(self.filename)
+        except (OSError, ValueError):
+            blocks = None
+
+        indexed = blocks[-1].end if blocks else 0
+        if blocks is None or indexed > log_size:
+            self._stream = open(self.filename, "wb")
+            self._stream.write(MAGIC)
+            indexed = 0
+        else:
+            self._stream = open(self.filename, "ab")
+        if indexed < log_size:
+            self._write_entry(
+                IndexBlock(
+                    indexed,
+                    log_size,
+                    UNKNOWN_MIN_CREATED,
+                    UNKNOWN_MAX_CREATED,
+                    0,
+                    ALL_LEVELS,
+                )
+            )
+        self._stream.flush()
+        self.offset = log_size
+        self._reset_block()
+
+    def add(self, size: int, created: float, levelno: int) -> None:
+        """Indexes a record of ``size`` bytes, appended to the log."""
+        if self._count and (
+            self._count >= self.every_records
+            or created - self._first_created >= self.every_seconds
+        ):
+            self.flush()
+        if not self._count:
+            self._first_created = created
+        self._count += 1
+        if created < self._min_created:
+            self._min_created = created
+        if created > self._max_created:
+            self._max_created = created
+        self._levels |= level_bit(levelno)
+        self.offset += size
+
+    def flush(self) -> None:
+        """Closes the current block, if it has records."""
+        if not self._count or self._stream is None:
+            return
+        self._write_entry(
+            IndexBlock(
+                self._start,
+                self.offset,
+                self._min_created,
+                self._max_created,
+                self._count,
+                self._levels,
+            )
+        )
+        self._stream.flush()
+        self._reset_block()
+
+    def close(self) -> None:
+        if self._stream is not None:
+            self.flush()
+            self._stream.close()
+            self._stream = None
+
+    def _write_entry(self, block: IndexBlock) -> None:
+        self._stream.write(ENTRY.pack(*block))
+
+
+def read_index_file(filename: str) -> List[IndexBlock]:
+    """
+    Reads the blocks of an index file. A truncated last entry is left out.
+
+    Raises:
+        ValueError: When the file is not an index.
+    """
+    with open(filename, "rb") as stream:
+        data = stream.read()
+    if data[: len(MAGIC)] != MAGIC:
+        raise ValueError(f"{filename} is not a LogNinja index")
+    size = len(data) - (len(data) - len(MAGIC)) % ENTRY.size
+    return [
+        IndexBlock(*entry)
+        for entry in ENTRY.iter_unpack(memoryview(data)[len(MAGIC) : size])
+    ]
+
+
+def _to_created(value: Timestamp, default: float) -> float:
+    if value is None:
+        return default
+    if isinstance(value, dt.datetime):
+        return value.timestamp()
+    return float(value)
+
+
+def _record_created(value) -> Optional[float]:
+    """``created`` time of the ``timestamp`` of a JSON record, in any format."""
+    if isinstance(value, (int, float)):
+        # epoch_millis
+        return value / 1000
+    if isinstance(value, str):
+        try:
+            return parse_timestamp(value).timestamp()
+        except ValueError:
+            return None
+    return None
+
+
+def _json_loads() -> Callable[[bytes], object]:
+    try:
+        import orjson
+
+        return orjson.loads
+    except ImportError:
+        return json.loads
+
+
+class LogReader:
+    """
+    Reads the records of a log file written with an index, scanning only the
+    blocks that can match the query.
+
+    Records are JSON lines, as written by ``NinjaJsonFormatter``. Lines of
+    other formats can't be checked one by one, so every line of a matching
+    block is returned.
+
+    Args:
+        log_filename (str): Path of the log file.
+    """
+
+    def __init__(self, log_filename: str) -> None:
+        self.log_filename = log_filename
+        try:
+            self.blocks = read_index_file(index_filename(log_filename))
+        except FileNotFoundError:
+            self.blocks = []
+
+    def ranges(
+        self, since: Timestamp = None, until: Timestamp = None, min_level: int = 0
+    ) -> List[range]:
+        """
+        Byte ranges of the log to scan for the query, adjacent blocks merged.
+        The part of the log past the last block is always scanned.
+        """
+        since_created = _to_created(since, -math.inf)
+        until_created = _to_created(until, math.inf)
+        size = os.path.getsize(self.log_filename)
+
+        ranges: List[range] = []
+        indexed = 0
+        for block in self.blocks:
+            if block.end > size:
+                break
+            indexed = block.end
+            if not block.matches(since_created, until_created, min_level):
+                continue
+            if ranges and ranges[-1].stop == block.start:
+                ranges[-1] = range(ranges[-1].start, block.end)
+            else:
+                ranges.append(range(block.start, block.end))
+        if indexed < size:
+            if ranges and ranges[-1].stop == indexed:
+                ranges[-1] = range(ranges[-1].start, size)
+            else:
+                ranges.append(range(indexed, size))
+        return ranges
+
+    def iter_lines(
+        self, since: Timestamp = None, until: Timestamp = None, min_level: int = 0
+    ) -> Iterator[bytes]:
+        """
+        Yields the lines of the records logged between ``since`` and
+        ``until`` (datetimes or POSIX timestamps, inclusive) at ``min_level``
+        or above.
+        """
+        since_created = _to_created(since, -math.inf)
+        until_created = _to_created(until, math.inf)
+        filtered = since is not None or until is not None or min_level > 0
+        loads = _json_loads()
+
+        ranges = self.ranges(since, until, min_level)
+        if not ranges:
+            return
+        with open(self.log_filename, "rb") as stream:
+            with mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ) as log:
+                for byte_range in ranges:
+                    # Lines are sliced one at a time, a range can be most of
+                    # the file and copying it whole would defeat the mmap.
+                    pos, stop = byte_range.start, byte_range.stop
+                    while pos < stop:
+                        end = log.find(b"\n", pos, stop)
+                        if end == -1:
+                            end = stop
+                        line = log[pos:end].rstrip(b"\r")
+                        pos = end + 1
+                        if not line:
+                            continue
+                        if not filtered or self._matches(
+                            line, loads, since_created, until_created, min_level
+                        ):
+                            yield line
+
+    @staticmethod
+    def _matches(
+        line: bytes,
+        loads: Callable[[bytes], object],
+        since: float,
+        until: float,
+        min_level: int,
+    ) -> bool:
+        try:
+            record = loads(line)
+        except ValueError:
+            return True
+        if not isinstance(record, dict):
+            return True
+
+        levelno = logging.getLevelName(record.get("level"))
+        if isinstance(levelno, int) and levelno < min_level:
+            return False
+        created = _record_created(record.get("timestamp"))
+        if created is None:
+            return True
+        return since <= created <= until
+
+
+def _parse_time(value: str) -> dt.datetime:
+    try:
+        return parse_timestamp(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid ISO 8601 time: {value!r}")
+
+
+def _parse_level(value: str) -> int:
+    levelno = logging.getLevelName(value.upper())
+    if not isinstance(levelno, int):
+        raise argparse.ArgumentTypeError(f"unknown level: {value!r}")
+    return levelno
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m logninja.log_index",
+        description="Prints the records of an indexed log file matching a query.",
+    )
+    parser.add_argument("filename")
+    parser.add_argument("--since", type=_parse_time, help="ISO 8601 time")
+    parser.add_argument("--until", type=_parse_time, help="ISO 8601 time")
+    parser.add_argument(
+        "--level", type=_parse_level, default=0, help="minimum level, e.g. ERROR"
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        reader = LogReader(args.filename)
+        output = sys.stdout.buffer
+        for line in reader.iter_lines(args.since, args.until, args.level):
+            output.write(line + b"\n")
+    except (OSError, ValueError) as exc:
+        parser.error(str(exc))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -22,7 +22,8 @@ class NinjaConsole(ConsoleInterface):
     def print_json(self, json: str, *args, **kwargs) -> None:
         self.print(json, *args, **kwargs)
 
-    def print_exception(self, show_locals: bool = False):
-        exc_info = sys.exc_info()
+    def print_exception(self, show_locals: bool = False, exc_info=None):
+        if exc_info is None:
+            exc_info = sys.exc_info()
         trace = format_exception(exc_info)
         print(json.dumps(trace, indent=4))
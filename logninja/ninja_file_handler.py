@@ -0,0 +1,114 @@
+import logging
+import os
+import time
+from typing import Optional
+
+from logninja.buffered_writer import BufferedWriter
+from logninja.instrumentation import encoded_size, register_handler
+from logninja.log_index import LogIndexWriter
+
+# Attribute of the records that carry a whole batch of formatted records, as
+# (message, created, levelno) tuples, so each one is indexed on its own.
+BATCH_ATTR = "logninja_batch"
+
+
+class NinjaFileHandler(logging.FileHandler):
+    """
+    File sink used by ``setup_logging``.
+
+    Without ``buffer_config`` it behaves exactly like ``logging.FileHandler``.
+    With it, the file is wrapped in a ``BufferedWriter`` and records are group
+    committed, except for records at or above the configured flush level,
+    which are written out right away.
+
+    With ``index_config``, a sparse index of the file is written next to it,
+    see ``logninja.log_index``.
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        mode: str = "a",
+        encoding: Optional[str] = None,
+        delay: bool = False,
+        buffer_config=None,
+        index_config=None,
+    ) -> None:
+        self.buffer_config = buffer_config
+        self.stats = register_handler(self)
+        self.index: Optional[LogIndexWriter] = None
+        if index_config is not None:
+            self.index = LogIndexWriter(
+                os.path.abspath(filename),
+                every_records=index_config.every_records,
+                every_seconds=index_config.every_seconds,
+            )
+        super().__init__(filename, mode=mode, encoding=encoding, delay=delay)
+
+    def _open(self):
+        stream = super()._open()
+        if self.index is not None:
+            self.index.open(os.path.getsize(self.baseFilename))
+        if self.buffer_config is None:
+            return stream
+
+        return BufferedWriter(
+            stream,
+            max_bytes=self.buffer_config.max_bytes,
+            max_records=self.buffer_config.max_records,
+            max_latency=self.buffer_config.max_latency,
+            flush_level=self.buffer_config.flush_level,
+            close_stream=True,
+        )
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            start = time.perf_counter_ns()
+            msg = self.format(record) + self.terminator
+            formatted = time.perf_counter_ns()
+            if self.stream is None:
+                if self.mode == "w" and getattr(self, "_closed", False):
+                    # Reopening would truncate what was written before close.
+                    return
+                self.stream = self._open()
+            self._write(msg, record)
+            size = self._encoded_size(msg)
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+            return
+        self.stats.add(
+            record, size, formatted - start, time.perf_counter_ns() - formatted
+        )
+
+    def _write(self, msg: str, record: logging.LogRecord) -> None:
+        self.stream.write(msg)
+        if self.buffer_config is None:
+            self.stream.flush()
+        elif record.levelno >= self.stream.flush_level:
+            self.stream.commit()
+        if self.index is not None:
+            batch = record.__dict__.get(BATCH_ATTR)
+            if batch is None:
+                self.index.add(self._encoded_size(msg), record.created, record.levelno)
+            else:
+                for text, created, levelno in batch:
+                    self.index.add(self._encoded_size(text) + 1, created, levelno)
+
+    def _encoded_size(self, text: str) -> int:
+        return encoded_size(text, self.stream.encoding, self.errors or "strict")
+
+    def flush(self) -> None:
+        if self.buffer_config is None:
+            super().flush()
+            return
+
+        with self.lock:
+            if self.stream is not None:
+                self.stream.commit()
+
+    def close(self) -> None:
+        super().close()
+        if self.index is not None:
+            self.index.close()
@@ -1,37 +1,78 @@
 import logging
 from typing import Union
 
+from logninja.console_interface import LogFields
+from logninja.extras import compile_extras
 from logninja.options import All, Only
+from logninja.timestamps import strftime_local
 from logninja.utils import (
+    LEVEL_NAMES,
     format_extras,
-    format_path,
-    format_time,
-    get_extras,
     get_level_name,
     get_message,
 )
 
 
 class NinjaFormatter(logging.Formatter):
+    """
+    Formats records as human readable lines:
+    ``[time][LEVEL   ] message (logger) file.py:line  [key=value, ...]``.
+
+    The layout is resolved once, when the formatter is created, into a
+    single render path.
+
+    Args:
+        extras (All | Only | None): Which extra attributes are appended.
+            Defaults to None.
+        max_message_length (int | None): Messages are truncated or padded to
+            this length so the columns line up, ``None`` disables it.
+            Defaults to 60.
+        unwrap_json_message (bool): Whether messages that are JSON objects are
+            replaced by their ``message`` field. Defaults to False.
+        time_format (str): ``strftime`` format of the timestamp.
+    """
+
+    output_kind = "text"
+
     def __init__(
-        self, extras: Union[All, Only, None] = None, max_message_length: int | None = 60
+        self,
+        extras: Union[All, Only, None] = None,
+        max_message_length: int | None = 60,
+        unwrap_json_message: bool = False,
+        time_format: str = "%Y-%m-%d %H:%M:%S",
     ):
         super().__init__()
         self.extras = extras
         self.max_message_length = max_message_length
+        self.unwrap_json_message = unwrap_json_message
+        self.time_format = time_format
 
-    def format(self, record: logging.LogRecord) -> str:
-        message = get_message(record, self.max_message_length)
+        # The brackets are part of the cached rendering of each second.
+        self._time_format = f"[{time_format}]"
+        self._get_extras = compile_extras(extras)
 
-        message_time = format_time(record)
-        message_level = get_level_name(record)
-        filepath = format_path(record)
-        extras = get_extras(record=record, extras=self.extras)
-        formatted_extras = format_extras(extras)
+    def format(self, record: logging.LogRecord) -> str:
+        message = self._get_message(record)
+        level_name = LEVEL_NAMES.get(record.levelno) or get_level_name(record)
+        return (
+            f"{strftime_local(record.created, self._time_format)}{level_name}"
+            f" {message} ({record.name}) {record.filename}:{record.lineno}"
+            f"{format_extras(self._get_extras(record))}"
+        )
 
-        structured_message = (
-            f"{message_time}{message_level} {message} ({record.name}) {filepath}"
-            + formatted_extras
+    def format_fields(self, record: logging.LogRecord) -> LogFields:
+        """Same rendering as ``format``, kept as separate fields."""
+        return LogFields(
+            time=strftime_local(record.created, self._time_format),
+            level=LEVEL_NAMES.get(record.levelno) or get_level_name(record),
+            levelno=record.levelno,
+            message=self._get_message(record),
+            logger=record.name,
+            path=f"{record.filename}:{record.lineno}",
+            extras=self._get_extras(record),
         )
 
-        return structured_message
+    def _get_message(self, record: logging.LogRecord) -> str:
+        return get_message(
+            record, self.max_message_length, unwrap_json=self.unwrap_json_message
+        )
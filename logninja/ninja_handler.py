@@ -2,9 +2,12 @@ import copy
 import json
 import logging
 import sys
-from typing import Union
+import time
+from typing import Optional, Union
 
+from logninja.buffered_writer import BufferedWriter
 from logninja.console_interface import ConsoleInterface
+from logninja.instrumentation import encoded_size, register_handler
 from logninja.ninja_console import NinjaConsole
 from logninja.ninja_formatter import NinjaFormatter
 from logninja.ninja_json_formatter import NinjaJsonFormatter
@@ -14,29 +17,83 @@ class NinjaHandler(logging.StreamHandler):
     def __init__(
         self,
         formatter: Union[NinjaJsonFormatter, NinjaFormatter],
-        console: ConsoleInterface = NinjaConsole(),
+        console: Optional[ConsoleInterface] = None,
         print_exception: bool = True,
         sys_excepthook: bool = False,
+        buffer_config=None,
     ):
         super().__init__()
         if not isinstance(formatter, (NinjaJsonFormatter, NinjaFormatter)):
             raise ValueError("Invalid formatter")
 
+        self.stats = register_handler(self)
         self.sys_excepthook = sys_excepthook
         self.print_exception = print_exception
+        if console is None:
+            console = NinjaConsole()
         self.console = console
+        self.writer: Optional[BufferedWriter] = None
+        self._owns_writer = False
+        if buffer_config is not None:
+            self.console, self.writer, self._owns_writer = _attach_writer(
+                console, buffer_config
+            )
         self.setFormatter(formatter)
 
+    def setFormatter(self, fmt: logging.Formatter) -> None:
+        super().setFormatter(fmt)
+        # Formatters declare what they produce, so the output never has to be
+        # parsed again just to pick the console method.
+        self.output_kind = getattr(fmt, "output_kind", None)
+        # Consoles with their own `print_fields` get the fields of the record,
+        # the default one would only join them back into the formatted line.
+        print_fields = getattr(type(self.console), "print_fields", None)
+        overridden = print_fields not in (None, ConsoleInterface.print_fields)
+        self.print_fields = overridden and hasattr(fmt, "format_fields")
+
     def emit(self, record: logging.LogRecord) -> None:
-        formatted_message = self.format(record)
-        if self.is_json(formatted_message):
-            self.console.print_json(formatted_message)
-        else:
-            self.console.print(formatted_message)
-        self.flush()
+        try:
+            start = time.perf_counter_ns()
+            if self.print_fields:
+                fields = self.formatter.format_fields(record)
+                formatted = time.perf_counter_ns()
+                # The line is only assembled by the console, which returns it.
+                printed = self.console.print_fields(fields)
+                size = encoded_size(printed) if printed else 0
+            else:
+                formatted_message = self.format(record)
+                formatted = time.perf_counter_ns()
+                size = encoded_size(formatted_message)
+                output_kind = self.output_kind
+                if output_kind == "json":
+                    self.console.print_json(formatted_message)
+                elif output_kind == "text" or not self.is_json(formatted_message):
+                    self.console.print(formatted_message)
+                else:
+                    self.console.print_json(formatted_message)
 
-        if record.exc_info and self.print_exception:
-            self.console.print_exception(show_locals=True)
+            if record.exc_info and self.print_exception:
+                if sys.exc_info()[1] is record.exc_info[1]:
+                    self.console.print_exception(show_locals=True)
+                else:
+                    # Emitted away from the except block (e.g. on a queue listener
+                    # thread), so the exception has to be handed over explicitly.
+                    self.console.print_exception(
+                        show_locals=True, exc_info=record.exc_info
+                    )
+
+            if self.writer is None:
+                self.flush()
+            elif record.levelno >= self.writer.flush_level:
+                self.writer.commit()
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+            return
+        self.stats.add(
+            record, size, formatted - start, time.perf_counter_ns() - formatted
+        )
 
         def handle_exception(exc_type, exc_value, exc_traceback):
             if issubclass(exc_type, KeyboardInterrupt):
@@ -46,10 +103,52 @@ class NinjaHandler(logging.StreamHandler):
         if self.sys_excepthook is False:
             sys.excepthook = handle_exception
 
+    def flush(self) -> None:
+        super().flush()
+        if self.writer is not None:
+            self.writer.commit()
+
+    def close(self) -> None:
+        super().close()
+        if self._owns_writer:
+            self.writer.close()
+        elif self.writer is not None:
+            self.writer.commit()
+
     def is_json(self, message: str) -> bool:
         try:
-            message_copy = copy.deepcopy(message)
-            json.loads(message_copy)
+            json.loads(message)
             return True
         except Exception:
             return False
+
+
+def _attach_writer(console: ConsoleInterface, buffer_config):
+    """
+    Buffer the writes of ``console`` without touching it: the handler prints
+    to a copy of the console whose stream is its own writer, so consoles
+    shared by several handlers keep their stream and each handler its config.
+
+    A console that already writes to a BufferedWriter is used as is, the
+    writer then belongs to whoever created it.
+    """
+    # NinjaConsole writes to `stream`, rich consoles to `file`.
+    attr = "stream" if hasattr(console, "stream") else "file"
+    stream = getattr(console, attr, None)
+    if stream is None:
+        raise ValueError(
+            f"{type(console).__name__} has no stream or file to buffer writes on"
+        )
+    if isinstance(stream, BufferedWriter):
+        return console, stream, False
+
+    writer = BufferedWriter(
+        stream,
+        max_bytes=buffer_config.max_bytes,
+        max_records=buffer_config.max_records,
+        max_latency=buffer_config.max_latency,
+        flush_level=buffer_config.flush_level,
+    )
+    console = copy.copy(console)
+    setattr(console, attr, writer)
+    return console, writer, True
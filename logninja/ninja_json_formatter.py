@@ -1,11 +1,17 @@
-import datetime as dt
-import json
 import logging
-from typing import Union
+from operator import attrgetter
+from typing import Callable, Dict, List, Tuple, Union
 
+from logninja.encoders import JsonEncoder, get_encoder
+from logninja.extras import compile_extras
 from logninja.options import All, Only
-from logninja.traceback import format_exception
-from logninja.utils import get_extras
+from logninja.timestamps import ISO, get_timestamp_renderer
+from logninja.traceback import (
+    FINGERPRINT_ATTR,
+    REPEAT_COUNT_ATTR,
+    fingerprint,
+    format_exception,
+)
 
 FMT_KEYS = {
     "level": "levelname",
@@ -20,36 +26,75 @@ FMT_KEYS = {
 
 
 class NinjaJsonFormatter(logging.Formatter):
-    def __init__(self, extras: Union[All, Only, None] = All):
+    """
+    Formats records as JSON objects.
+
+    The key mapping and the extras policy are compiled once, when the
+    formatter is created, so formatting a record is a fixed list of getters
+    followed by a single encoder call.
+
+    Args:
+        extras (All | Only | None): Which extra attributes are added to the
+            output. Defaults to All().
+        encoder (str | Callable | None): The JSON backend, see
+            ``logninja.encoders.get_encoder``. Defaults to the fastest one
+            installed.
+        timestamp_format (str): ``"iso"`` (ISO 8601 in UTC with microseconds),
+            ``"rfc3339"`` (UTC with milliseconds and a ``Z`` suffix) or
+            ``"epoch_millis"`` (integer milliseconds). Defaults to "iso".
+    """
+
+    output_kind = "json"
+
+    def __init__(
+        self,
+        extras: Union[All, Only, None] = All(),
+        encoder: Union[str, JsonEncoder, None] = None,
+        timestamp_format: str = ISO,
+    ):
         super().__init__()
+        if extras is All:
+            extras = All()
         self.extras = extras
+        self.encoder = get_encoder(encoder)
+        self.timestamp_format = timestamp_format
+        self._field_plan = self._compile_field_plan(
+            FMT_KEYS, get_timestamp_renderer(timestamp_format)
+        )
+        self._get_extras = compile_extras(extras)
 
     def format(self, record: logging.LogRecord) -> str:
         message = self._prepare_log_dict(record)
-        return json.dumps(message, default=str)
+        return self.encoder(message)
 
     def _prepare_log_dict(self, record: logging.LogRecord):
-        always_fields = {
-            "message": record.getMessage(),
-            "timestamp": dt.datetime.fromtimestamp(
-                record.created, tz=dt.timezone.utc
-            ).isoformat(),
-        }
-        if record.exc_info is not None:
-            always_fields["exc_info"] = format_exception(exc_info=record.exc_info)
-
-        message = {
-            key: (
-                msg_val
-                if (msg_val := always_fields.pop(val, None)) is not None
-                else getattr(record, val)
-            )
-            for key, val in FMT_KEYS.items()
-        }
-        message.update(always_fields)
+        message = {key: getter(record) for key, getter in self._field_plan}
+        exc_info = record.exc_info
+        if exc_info is not None and exc_info[0] is not None:
+            message["exc_info"] = format_exception(exc_info=exc_info)
+            exc_fingerprint = record.__dict__.get(FINGERPRINT_ATTR)
+            message[FINGERPRINT_ATTR] = exc_fingerprint or fingerprint(exc_info)
+        elif FINGERPRINT_ATTR in record.__dict__:
+            # A repeat whose traceback was suppressed by ExceptionStormFilter.
+            message[FINGERPRINT_ATTR] = record.__dict__[FINGERPRINT_ATTR]
+            message[REPEAT_COUNT_ATTR] = record.__dict__.get(REPEAT_COUNT_ATTR)
 
-        extras = get_extras(record=record, extras=self.extras)
-        for key, value in extras.items():
-            message[key] = value
+        extras = self._get_extras(record)
+        if extras:
+            message.update(extras)
 
         return message
+
+    @staticmethod
+    def _compile_field_plan(
+        fmt_keys: Dict[str, str],
+        render_timestamp: Callable[[float], object],
+    ) -> List[Tuple[str, Callable[[logging.LogRecord], object]]]:
+        computed = {
+            "message": logging.LogRecord.getMessage,
+            "timestamp": lambda record: render_timestamp(record.created),
+        }
+        return [
+            (key, computed.get(attr) or attrgetter(attr))
+            for key, attr in fmt_keys.items()
+        ]
@@ -0,0 +1,160 @@
+import logging
+import queue
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+from logninja.instrumentation import register_handler
+from logninja.options import BLOCK, DROP_NEWEST, OVERFLOW_POLICIES
+from logninja.options import DROP_OLDEST as DROP_OLDEST
+from logninja.utils import LazyStr
+
+
+class NinjaQueueListener(QueueListener):
+    """
+    Listener that drains a sink queue on a single background thread.
+
+    Unlike the stdlib listener, the sentinel is enqueued with a blocking put,
+    so stopping a listener whose bounded queue is full waits for room instead
+    of raising ``queue.Full``, and a handler raising for one record doesn't
+    stop the thread, which would leave the queue to fill up.
+    """
+
+    def __init__(self, queue_: queue.Queue, handler: logging.Handler) -> None:
+        super().__init__(queue_, handler, respect_handler_level=True)
+
+    def start(self) -> None:
+        self._thread = threading.Thread(
+            target=self._monitor, name="logninja-listener", daemon=True
+        )
+        self._thread.start()
+
+    def handle(self, record: logging.LogRecord) -> None:
+        record = self.prepare(record)
+        for handler in self.handlers:
+            if record.levelno < handler.level:
+                continue
+            try:
+                handler.handle(record)
+            except RecursionError:
+                raise
+            except Exception:
+                handler.handleError(record)
+
+    def enqueue_sentinel(self) -> None:
+        self.queue.put(self._sentinel)
+
+
+class NinjaQueueHandler(QueueHandler):
+    """
+    Handler that only enqueues records; formatting and I/O happen on the
+    listener thread owned by this handler.
+
+    Args:
+        handler (logging.Handler): The sink that does the actual formatting
+            and writing.
+        maxsize (int): Maximum number of records waiting in the queue.
+        overflow_policy (str): What to do when the queue is full, one of
+            ``"block"``, ``"drop_newest"`` or ``"drop_oldest"``.
+    """
+
+    def __init__(
+        self,
+        handler: logging.Handler,
+        maxsize: int = 10_000,
+        overflow_policy: str = BLOCK,
+    ) -> None:
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(
+                f"Invalid overflow_policy {overflow_policy!r}, "
+                f"use one of {', '.join(OVERFLOW_POLICIES)}"
+            )
+        if maxsize <= 0:
+            raise ValueError("maxsize must be greater than zero")
+
+        super().__init__(queue.Queue(maxsize=maxsize))
+        self.handler = handler
+        self.overflow_policy = overflow_policy
+        self.dropped_newest = 0
+        self.dropped_oldest = 0
+        self.listener = NinjaQueueListener(self.queue, handler)
+        self.stats = register_handler(self)
+        self._closed = False
+
+    @property
+    def dropped(self) -> int:
+        return self.dropped_newest + self.dropped_oldest
+
+    def start(self) -> None:
+        self.listener.start()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        # Preparing stands for formatting and enqueueing for writing in the
+        # stats, the sink's own stats have the real formatting and I/O.
+        try:
+            start = time.perf_counter_ns()
+            record = self.prepare(record)
+            prepared = time.perf_counter_ns()
+            self.enqueue(record)
+        except Exception:
+            self.handleError(record)
+            return
+        self.stats.add(record, 0, prepared - start, time.perf_counter_ns() - prepared)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Formatting is left to the listener. Only the message is merged here,
+        # so later mutations of the args by the caller can't leak into the log.
+        record.msg = record.getMessage()
+        record.args = None
+        # Same for the lazily rendered params of ``log_execution``, the
+        # function could mutate its arguments before the listener formats.
+        params = record.__dict__.get("params")
+        if type(params) is LazyStr:
+            record.params = str(params)
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self._closed:
+            # Nobody drains the queue anymore, enqueueing could block forever.
+            self.dropped_newest += 1
+            return
+
+        if self.overflow_policy == BLOCK:
+            self.queue.put(record)
+            return
+
+        try:
+            self.queue.put_nowait(record)
+            return
+        except queue.Full:
+            if self.overflow_policy == DROP_NEWEST:
+                self.dropped_newest += 1
+                return
+
+        while True:
+            try:
+                self.queue.get_nowait()
+                self.queue.task_done()
+                self.dropped_oldest += 1
+            except queue.Empty:
+                pass
+            try:
+                self.queue.put_nowait(record)
+                return
+            except queue.Full:
+                continue
+
+    def flush(self) -> None:
+        self.handler.flush()
+
+    def close(self) -> None:
+        with self.lock:
+            if self._closed:
+                return
+            self._closed = True
+
+        if self.listener._thread is not None:
+            self.listener.stop()
+        self.handler.flush()
+        self.handler.close()
+        super().close()
@@ -1,8 +1,13 @@
+import functools
 import re
-from typing import List
+from typing import Dict, List
+
+from logninja.console_interface import LogFields
 
 try:
     from rich.console import Console
+    from rich.text import Text
+    from rich.traceback import Traceback
 except ImportError:
     raise ImportError(
         "rich library is required for NinjaRichConsole, install it with pip install rich"
@@ -19,6 +24,93 @@ HTTP_METHODS: List[str] = [
     "PATCH",
 ]
 
+LEVEL_STYLES: Dict[str, str] = {
+    "[DEBUG   ]": "blue",
+    "[INFO    ]": "green",
+    "[WARNING ]": "yellow",
+    "[ERROR   ]": "bold red",
+    "[CRITICAL]": "bold red",
+}
+
+STATUS_CODE_STYLES: Dict[str, str] = {
+    "1": "bold blue",  # Informational
+    "2": "bold green",  # Success
+    "3": "bold yellow",  # Redirection
+    "4": "bold red",  # Client errors
+    "5": "bold magenta",  # Server errors
+}
+
+# Messages up to this length have their markup cached.
+MAX_CACHED_LENGTH = 1024
+
+_DATETIME_PATTERN = r"\[\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\]"
+_DATETIME = re.compile(_DATETIME_PATTERN)
+# Every highlighted token in one alternation, so a message is scanned once.
+# Alternatives are tried in order at each position.
+_TOKENS = re.compile(
+    "|".join(
+        [
+            rf"(?P<level>{'|'.join(re.escape(level) for level in LEVEL_STYLES)})",
+            rf"(?P<datetime>{_DATETIME_PATTERN})",
+            r"(?P<file_line>\w+\.py:\d+)",
+            r"(?P<logger>\(\w+\))",
+            r"(?P<key>[\w-]+)=(?P<value>[\w-]*)",
+            r"(?P<status_code>\b[1-5]\d\d\b)",
+            rf"(?P<method>\b(?:{'|'.join(HTTP_METHODS)})\b)",
+        ]
+    )
+)
+# The only tokens that can't be told apart by their position in the fields.
+_MESSAGE_TOKENS = re.compile(
+    rf"\b(?:(?P<status_code>[1-5]\d\d)|(?P<method>{'|'.join(HTTP_METHODS)}))\b"
+)
+
+
+def _token_markup(match: re.Match) -> str:
+    kind = match.lastgroup
+    text = match.group()
+    if kind == "value":
+        key, value = match.group("key", "value")
+        markup = f"[yellow]{key}[/yellow]="
+        return f"{markup}[blue]{value}[/blue]" if value else markup
+    if kind == "level":
+        style = LEVEL_STYLES[text]
+    elif kind == "datetime":
+        style = "dim"
+    elif kind == "file_line":
+        style = "dim underline"
+    elif kind == "logger":
+        style = "orange4"
+    elif kind == "status_code":
+        style = STATUS_CODE_STYLES[text[0]]
+    else:
+        style = "bold"
+    return f"[{style}]{text}[/{style}]"
+
+
+@functools.lru_cache(maxsize=2048)
+def _cached_markup(message: str) -> str:
+    return _TOKENS.sub(_token_markup, message)
+
+
+def highlight(message: str) -> str:
+    """
+    Adds the rich markup of ``NinjaRichConsole`` to a formatted line, in a
+    single pass over the line.
+
+    The leading timestamp changes every second, it is highlighted on its own
+    so the markup of the rest of the line can be reused when the same message
+    is logged again.
+    """
+    prefix = ""
+    match = _DATETIME.match(message)
+    if match is not None:
+        prefix = f"[dim]{match.group()}[/dim]"
+        message = message[match.end() :]
+    if len(message) > MAX_CACHED_LENGTH:
+        return prefix + _TOKENS.sub(_token_markup, message)
+    return prefix + _cached_markup(message)
+
 
 class NinjaRichConsole(Console):
     def print(self, *objects: str, **kwargs) -> None:
@@ -29,70 +121,48 @@ class NinjaRichConsole(Console):
             return
         super().print(*objects, **kwargs)
 
-    def _custom_theme(self, message: str) -> str:
-        message = self._replace_loglevel(message)
-        message = self._replace_datetime(message)
-        message = self._replace_file_line(message)
-        message = self._replace_parentheses_content(message)
-        message = self._replace_extras(message)
-        message = self._highlight_msg(message)
-        return message
-
-    def _replace_loglevel(self, message: str) -> str:
-        message = message.replace("[DEBUG   ]", "[blue][DEBUG   ][/blue]")
-        message = message.replace("[INFO    ]", "[green][INFO    ][/green]")
-        message = message.replace("[WARNING ]", "[yellow][WARNING ][/yellow]")
-        message = message.replace("[ERROR   ]", "[bold red][ERROR   ][/bold red]")
-        message = message.replace("[CRITICAL]", "[bold red][CRITICAL][/bold red]")
-        return message
-
-    def _replace_datetime(self, message: str) -> str:
-        string = re.sub(
-            r"(\[\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\])", r"[dim]\g<0>[/dim]", message
-        )
-        return string
+    def print_exception(self, *, exc_info=None, **kwargs) -> None:
+        if exc_info is None:
+            super().print_exception(**kwargs)
+            return
+        self.print(Traceback.from_exception(*exc_info, **kwargs))
+
+    def print_fields(self, fields: LogFields, **kwargs) -> str:
+        """
+        Prints a record from its fields, each one styled directly: only the
+        message is searched, for status codes and HTTP methods and by the
+        console's highlighter.
+        """
+        message = Text(fields.message)
+        if self._highlight:
+            # Like strings given to `print`, minus the fields styled below.
+            message = self.highlighter(message)
+        for match in _MESSAGE_TOKENS.finditer(fields.message):
+            status_code = match.group("status_code")
+            style = STATUS_CODE_STYLES[status_code[0]] if status_code else "bold"
+            message.stylize(style, match.start(), match.end())
 
-    def _replace_file_line(self, message: str):
-        string = re.sub(
-            r"(\w+\.py:\d+)", r"[dim underline]\g<0>[/dim underline]", message
+        text = Text.assemble(
+            (fields.time, "dim"),
+            (fields.level, LEVEL_STYLES.get(fields.level, "")),
+            " ",
+            message,
         )
-        return string
-
-    def _replace_parentheses_content(self, message: str) -> str:
-        message = re.sub(r"(\(\w+\))", r"[orange4]\g<0>[/orange4]", message)
-        return message
-
-    def _replace_extras(self, message: str) -> str:
-        result = re.sub(r"(?<=\=)([\w-]+)", r"[blue]\g<0>[/blue]", message)
-        result = re.sub(r"([\w-]+)(?=\=)", r"[yellow]\g<0>[/yellow]", result)
-        return result
-
-    def _highlight_msg(self, message: str) -> str:
-        message = self._highlight_http_status_codes(message)
-        message = self._highlight_http_methods(message)
-        return message
-
-    def _highlight_http_methods(self, message: str) -> str:
-        for method in HTTP_METHODS:
-            if method in message:
-                message = message.replace(method, f"[bold]{method}[/bold]")
-        return message
-
-    def _highlight_http_status_codes(self, message: str) -> str:
-        status_codes = {
-            "1..": "blue",  # Informational
-            "2..": "green",  # Success
-            "3..": "yellow",  # Redirection
-            "4..": "red",  # Client errors
-            "5..": "magenta",  # Server errors
-        }
-
-        for status_code, color in status_codes.items():
-            status_code_pattern = status_code.replace("..", "\d\d")
-            pattern = re.compile(rf"\b{status_code_pattern}\b")
-            matches = pattern.findall(message)
-            for match in matches:
-                message = message.replace(
-                    match, f"[bold {color}]{match}[/bold {color}]"
-                )
-        return message
+        text.append(" ")
+        text.append(f"({fields.logger})", "orange4")
+        text.append(" ")
+        text.append(fields.path, "dim underline")
+        if fields.extras:
+            text.append("  [")
+            for index, (key, value) in enumerate(fields.extras.items()):
+                if index:
+                    text.append(", ")
+                text.append(str(key), "yellow")
+                text.append("=")
+                text.append(str(value), "blue")
+            text.append("]")
+        super().print(text, **kwargs)
+        return text.plain
+
+    def _custom_theme(self, message: str) -> str:
+        return highlight(message)
@@ -1,8 +1,15 @@
-from typing import List
+from typing import List, Optional
 
 
 class All:
+    def __init__(self, exclude: Optional[List[str]] = None):
+        if exclude is not None and not isinstance(exclude, list):
+            raise ValueError("exclude must be a list")
+        self.exclude = exclude or []
+
     def __repr__(self):
+        if self.exclude:
+            return f"All(exclude={self.exclude})"
         return "All()"
 
 
@@ -14,3 +21,11 @@ class Only:
 
     def __repr__(self):
         return f"Only({self.extras})"
+
+
+# Overflow policies of the queue of ``NinjaQueueHandler``.
+BLOCK = "block"
+DROP_NEWEST = "drop_newest"
+DROP_OLDEST = "drop_oldest"
+
+OVERFLOW_POLICIES = (BLOCK, DROP_NEWEST, DROP_OLDEST)
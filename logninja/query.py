@@ -0,0 +1,597 @@
+"""
+Streaming queries over the JSON lines written by ``NinjaJsonFormatter``.
+
+    python -m logninja logs.jsonl --level ERROR --logger app.db
+    python -m logninja logs.jsonl --last 1h --where "status_code>=500"
+    python -m logninja logs.jsonl --last 1h --group-by url --field duration
+
+Lines are only parsed when they can match: the level, logger and equality
+filters of a query are first turned into byte strings the raw line must
+contain, and most lines are dropped by these substring checks alone.
+
+Big files are split in chunks processed in parallel by a pool of processes,
+each one returning its matching lines or its partial aggregates. When the
+log has a ``logninja.log_index`` index, only the blocks matching the time
+range and level are read.
+"""
+
+import argparse
+import datetime as dt
+import json
+import logging
+import math
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from logninja.histogram import LogLinearHistogram
+from logninja.log_index import LogReader, _json_loads, _parse_level, _record_created
+from logninja.timestamps import parse_timestamp
+
+# Below MIN_CHUNK_SIZE, starting a process costs more than it saves.
+CHUNK_SIZE = 32 * 1024 * 1024
+MIN_CHUNK_SIZE = 4 * 1024 * 1024
+
+# Histograms only hold integers. Integer values are recorded as is, but once
+# a group gets a float its values are all recorded in 1/2**FRACTION_BITS
+# units, so fractions of a second keep their precision. The histograms are
+# wide enough for scaled nanosecond durations.
+FRACTION_BITS = 20
+FRACTION_SCALE = 1 << FRACTION_BITS
+HISTOGRAM_BITS = 64
+
+DEFAULT_PERCENTILES = (50.0, 90.0, 99.0)
+
+OPERATORS = ("==", "!=", ">=", "<=", ">", "<", "=", "~")
+_PREDICATE = re.compile(
+    r"^\s*([^=!<>~\s]+)\s*(" + "|".join(map(re.escape, OPERATORS)) + r")\s*(.*)$"
+)
+
+
+def _is_plain(text: str) -> bool:
+    """Whether orjson and the json module both write the string as is."""
+    return all(" " <= char <= "~" for char in text)
+
+
+@dataclass
+class Predicate:
+    field: str
+    operator: str
+    value: Any
+
+    @classmethod
+    def parse(cls, text: str) -> "Predicate":
+        """
+        Parses ``FIELD OP VALUE``, e.g. ``status_code>=500`` or ``url~^/api``.
+        ``~`` is a regex search, the value of other operators is read as JSON
+        when it can be, as a string otherwise.
+        """
+        match = _PREDICATE.match(text)
+        if match is None:
+            raise ValueError(
+                f"Invalid predicate {text!r}, use FIELD OP VALUE with OP one of "
+                f"{' '.join(OPERATORS)}"
+            )
+        name, operator, raw_value = match.groups()
+        if operator == "~":
+            return cls(name, operator, re.compile(raw_value))
+        try:
+            value = json.loads(raw_value)
+        except ValueError:
+            value = raw_value
+        return cls(name, "==" if operator == "=" else operator, value)
+
+    def needles(self) -> Optional[Tuple[bytes, ...]]:
+        """
+        Bytes any line matching an equality on a string or a number contains,
+        as written by orjson or by the json module. None for other predicates.
+        """
+        if self.operator != "==" or isinstance(self.value, bool):
+            return None
+        if isinstance(self.value, int):
+            value = str(self.value)
+        elif isinstance(self.value, str) and _is_plain(self.value):
+            value = json.dumps(self.value)
+            if "\\" in value:
+                return None
+        else:
+            return None
+        key = json.dumps(self.field)
+        return (f"{key}:{value}".encode(), f"{key}: {value}".encode())
+
+    def matches(self, value: Any) -> bool:
+        operator = self.operator
+        if operator == "~":
+            return value is not None and self.value.search(str(value)) is not None
+        if operator == "==":
+            return value == self.value
+        if operator == "!=":
+            return value != self.value
+        try:
+            if operator == ">":
+                return value > self.value
+            if operator == ">=":
+                return value >= self.value
+            if operator == "<":
+                return value < self.value
+            return value <= self.value
+        except TypeError:
+            return False
+
+
+@dataclass
+class Query:
+    """
+    Args:
+        min_level (int): Lowest level of the records.
+        loggers (List[str]): Loggers of the records, children included.
+        since (float | None): Earliest ``created`` time, inclusive.
+        until (float | None): Latest ``created`` time, inclusive.
+        predicates (List[Predicate]): Conditions on any field.
+        group_by (List[str]): Fields of the aggregation groups. Without them
+            or ``field``, the matching lines are returned.
+        value_field (str | None): Numeric field summarized by percentiles.
+        percentiles (Sequence[float]): Percentiles of ``value_field``.
+        count_only (bool): Count the matching records instead of returning
+            them.
+    """
+
+    min_level: int = 0
+    loggers: List[str] = field(default_factory=list)
+    since: Optional[float] = None
+    until: Optional[float] = None
+    predicates: List[Predicate] = field(default_factory=list)
+    group_by: List[str] = field(default_factory=list)
+    value_field: Optional[str] = None
+    percentiles: Sequence[float] = DEFAULT_PERCENTILES
+    count_only: bool = False
+
+    @property
+    def aggregates(self) -> bool:
+        return bool(self.group_by) or self.value_field is not None or self.count_only
+
+    @property
+    def filters(self) -> bool:
+        return bool(
+            self.min_level > 0
+            or self.loggers
+            or self.since is not None
+            or self.until is not None
+            or self.predicates
+        )
+
+    def needles(self) -> List[Tuple[bytes, ...]]:
+        """
+        Byte strings lines must contain to match, each one given as a tuple
+        of alternatives, the most selective first.
+        """
+        needles = []
+        for predicate in self.predicates:
+            alternatives = predicate.needles()
+            if alternatives is not None:
+                needles.append(alternatives)
+        if self.loggers:
+            # orjson writes non-ASCII characters as is, the json module escapes
+            # them.
+            prefixes = {
+                json.dumps(logger, ensure_ascii=ascii_only)[:-1].encode()
+                for logger in self.loggers
+                for ascii_only in (True, False)
+            }
+            needles.append(tuple(prefixes))
+        if self.min_level > 0:
+            levels = [
+                f'"{name}"'.encode()
+                for name, levelno in logging._nameToLevel.items()
+                if levelno >= self.min_level
+            ]
+            # Levels without a name are written as "Level <number>".
+            needles.append((*levels, b'"Level '))
+        return needles
+
+    def matches(self, record: dict) -> bool:
+        if self.min_level > 0:
+            levelno = logging.getLevelName(record.get("level"))
+            if isinstance(levelno, int) and levelno < self.min_level:
+                return False
+
+        if self.loggers:
+            name = record.get("logger") or ""
+            if not any(
+                name == logger or name.startswith(logger + ".")
+                for logger in self.loggers
+            ):
+                return False
+
+        if self.since is not None or self.until is not None:
+            created = _record_created(record.get("timestamp"))
+            if created is None:
+                return False
+            if self.since is not None and created < self.since:
+                return False
+            if self.until is not None and created > self.until:
+                return False
+
+        for predicate in self.predicates:
+            if not predicate.matches(record.get(predicate.field)):
+                return False
+        return True
+
+
+class Aggregation:
+    """
+    Count and histogram of the value field per group, merged across chunks.
+
+    Groups are ``[count, histogram, fraction_bits]`` lists, see
+    ``FRACTION_BITS``.
+    """
+
+    def __init__(self) -> None:
+        self.groups: Dict[tuple, List] = {}
+
+    def merge(self, other: "Aggregation") -> None:
+        for key, other_group in other.groups.items():
+            group = self.groups.get(key)
+            if group is None:
+                self.groups[key] = other_group
+                continue
+            if group[2] < other_group[2]:
+                _scale_group(group)
+            elif other_group[2] < group[2]:
+                _scale_group(other_group)
+            group[0] += other_group[0]
+            group[1].merge(other_group[1])
+
+    def rows(self, query: Query) -> List[dict]:
+        """One dict per group, the biggest groups first."""
+        rows = []
+        ordered = sorted(self.groups.items(), key=lambda item: -item[1][0])
+        for key, (count, histogram, bits) in ordered:
+            row = dict(zip(query.group_by, key))
+            row["count"] = count
+            if query.value_field is not None and histogram.count:
+                row["mean"] = _unscale(histogram.mean, bits)
+                for percent in query.percentiles:
+                    row[f"p{percent:g}"] = _unscale(histogram.percentile(percent), bits)
+                row["max"] = _unscale(histogram.max, bits)
+            rows.append(row)
+        return rows
+
+
+def _scale_group(group: List) -> None:
+    group[1].scale_up(FRACTION_BITS - group[2])
+    group[2] = FRACTION_BITS
+
+
+def _unscale(value: float, bits: int) -> float:
+    value = round(value / (1 << bits), 3)
+    return int(value) if value.is_integer() else value
+
+
+def _group_key(record: dict, group_by: List[str]) -> tuple:
+    key = tuple(map(record.get, group_by))
+    try:
+        hash(key)
+    except TypeError:
+        # Lists and dicts can't be dict keys, group them by their JSON.
+        key = tuple(
+            json.dumps(value, sort_keys=True)
+            if isinstance(value, (list, dict))
+            else value
+            for value in key
+        )
+    return key
+
+
+def _candidate_lines(data: bytes, needles: List[Tuple[bytes, ...]]) -> Iterator[bytes]:
+    """
+    Lines of ``data`` containing one of the alternatives of every needle.
+    Lines with the first needle are found by a regex search of the whole
+    chunk, the other needles are checked line by line.
+    """
+    first = re.compile(b"|".join(re.escape(needle) for needle in needles[0]))
+    others = needles[1:]
+    position = 0
+    while True:
+        match = first.search(data, position)
+        if match is None:
+            return
+        start = data.rfind(b"\n", 0, match.start()) + 1
+        end = data.find(b"\n", match.end())
+        if end == -1:
+            end = len(data)
+        position = end + 1
+        line = data[start:end]
+        if all(
+            any(needle in line for needle in alternatives) for alternatives in others
+        ):
+            yield line
+
+
+def process_chunk(
+    filename: str, start: int, end: int, query: Query
+) -> Tuple[List[bytes], Aggregation]:
+    """Runs the query over the lines of ``filename`` in ``[start, end)``."""
+    loads = _json_loads()
+    lines: List[bytes] = []
+    aggregation = Aggregation()
+    with open(filename, "rb") as stream:
+        stream.seek(start)
+        data = stream.read(end - start)
+
+    needles = query.needles()
+    candidates = _candidate_lines(data, needles) if needles else data.splitlines()
+    filters = query.filters
+    if not query.aggregates:
+        for line in candidates:
+            try:
+                record = loads(line)
+            except ValueError:
+                continue
+            if isinstance(record, dict) and (not filters or query.matches(record)):
+                lines.append(line)
+        return lines, aggregation
+
+    # Groups of the chunk, keyed by the value itself when grouping by a
+    # single field, which saves building a tuple per record. Values are
+    # collected in a list and recorded in one pass at the end.
+    groups: Dict[Any, List] = {}
+    group_by = query.group_by
+    single = group_by[0] if len(group_by) == 1 else None
+    value_field = query.value_field
+    isfinite = math.isfinite
+    for line in candidates:
+        try:
+            record = loads(line)
+            if filters and not query.matches(record):
+                continue
+            key = (
+                record.get(single)
+                if single is not None
+                else _group_key(record, group_by)
+            )
+        except (ValueError, AttributeError):
+            # Not JSON, or not a JSON object.
+            continue
+        try:
+            group = groups.get(key)
+        except TypeError:
+            key = _group_key(record, group_by)[0]
+            group = groups.get(key)
+        if group is None:
+            group = groups[key] = [0, [], 0]
+        group[0] += 1
+
+        if value_field is not None:
+            value = record.get(value_field)
+            if type(value) is int:
+                # Negative values are recorded as 0 by record_all.
+                group[1].append(value << group[2])
+            elif type(value) is float and isfinite(value):
+                if not group[2]:
+                    group[1] = [value << FRACTION_BITS for value in group[1]]
+                    group[2] = FRACTION_BITS
+                group[1].append(round(value * FRACTION_SCALE))
+
+    for key, group in groups.items():
+        histogram = LogLinearHistogram(HISTOGRAM_BITS)
+        histogram.record_all(group[1])
+        group[1] = histogram
+        aggregation.groups[(key,) if single is not None else key] = group
+    return lines, aggregation
+
+
+def _process_chunk(args) -> Tuple[List[bytes], Aggregation]:
+    return process_chunk(*args)
+
+
+def split_chunks(
+    filename: str, ranges: List[range], chunk_size: int = CHUNK_SIZE
+) -> List[Tuple[int, int]]:
+    """Splits byte ranges made of whole lines in chunks of whole lines."""
+    chunks = []
+    with open(filename, "rb") as stream:
+        for byte_range in ranges:
+            start = byte_range.start
+            while byte_range.stop - start > chunk_size:
+                stream.seek(start + chunk_size)
+                stream.readline()
+                end = min(stream.tell(), byte_range.stop)
+                chunks.append((start, end))
+                start = end
+            if start < byte_range.stop:
+                chunks.append((start, byte_range.stop))
+    return chunks
+
+
+def _ranges(filename: str, query: Query) -> List[range]:
+    reader = LogReader(filename)
+    if not reader.blocks:
+        return [range(0, os.path.getsize(filename))]
+    return reader.ranges(query.since, query.until, query.min_level)
+
+
+def run_query(
+    filenames: List[str],
+    query: Query,
+    jobs: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+) -> Iterator[Tuple[List[bytes], Aggregation]]:
+    """
+    Yields the result of every chunk of the files, in the order of the files.
+
+    Args:
+        filenames (List[str]): JSON lines files.
+        query (Query): The query.
+        jobs (int | None): Number of processes. Defaults to the number of
+            CPUs. A single chunk, or ``jobs=1``, runs in this process.
+        chunk_size (int | None): Size of the chunks, in bytes. Defaults to
+            spreading the files over the processes, in chunks of
+            ``MIN_CHUNK_SIZE`` to ``CHUNK_SIZE`` bytes.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    ranges = {filename: _ranges(filename, query) for filename in filenames}
+    if chunk_size is None:
+        total = sum(len(byte_range) for file in ranges.values() for byte_range in file)
+        chunk_size = min(max(-(-total // jobs), MIN_CHUNK_SIZE), CHUNK_SIZE)
+
+    tasks = [
+        (filename, start, end, query)
+        for filename, file_ranges in ranges.items()
+        for start, end in split_chunks(filename, file_ranges, chunk_size)
+    ]
+    if jobs == 1 or len(tasks) <= 1:
+        for task in tasks:
+            yield _process_chunk(task)
+        return
+
+    with ProcessPoolExecutor(max_workers=min(jobs, len(tasks))) as executor:
+        yield from executor.map(_process_chunk, tasks)
+
+
+def _parse_time(value: str) -> float:
+    try:
+        return parse_timestamp(value).timestamp()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid ISO 8601 time: {value!r}")
+
+
+_DURATION = re.compile(r"^(\d+(?:\.\d+)?)([smhd])$")
+_DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def _parse_duration(value: str) -> float:
+    match = _DURATION.match(value)
+    if match is None:
+        raise argparse.ArgumentTypeError(f"invalid duration {value!r}, e.g. 15m, 1h")
+    return float(match.group(1)) * _DURATION_UNITS[match.group(2)]
+
+
+def _parse_predicate(value: str) -> Predicate:
+    try:
+        return Predicate.parse(value)
+    except (ValueError, re.error) as exc:
+        raise argparse.ArgumentTypeError(str(exc))
+
+
+def _parse_percentiles(value: str) -> List[float]:
+    try:
+        percentiles = [float(percent) for percent in value.split(",")]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid percentiles: {value!r}")
+    if not all(0 < percent <= 100 for percent in percentiles):
+        raise argparse.ArgumentTypeError("percentiles must be in (0, 100]")
+    return percentiles
+
+
+def _print_table(rows: List[dict]) -> None:
+    if not rows:
+        return
+    columns = list(rows[0])
+    cells = [[_cell(row.get(column)) for column in columns] for row in rows]
+    widths = [
+        max(len(column), *(len(row[index]) for row in cells))
+        for index, column in enumerate(columns)
+    ]
+    print("  ".join(column.ljust(width) for column, width in zip(columns, widths)))
+    for row in cells:
+        print("  ".join(cell.ljust(width) for cell, width in zip(row, widths)))
+
+
+def _cell(value: Any) -> str:
+    if value is None:
+        return "-"
+    if isinstance(value, str):
+        return value
+    return json.dumps(value)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m logninja",
+        description="Filters and aggregates LogNinja JSON lines files.",
+    )
+    parser.add_argument("filenames", nargs="+", metavar="FILE")
+    parser.add_argument("--level", type=_parse_level, default=0, help="e.g. ERROR")
+    parser.add_argument(
+        "--logger", action="append", default=[], help="logger and its children"
+    )
+    parser.add_argument("--since", type=_parse_time, help="ISO 8601 time")
+    parser.add_argument("--until", type=_parse_time, help="ISO 8601 time")
+    parser.add_argument(
+        "--last", type=_parse_duration, help="only the last 15m, 1h, 2d..."
+    )
+    parser.add_argument(
+        "--where",
+        type=_parse_predicate,
+        action="append",
+        default=[],
+        help="FIELD OP VALUE, OP one of == != > >= < <= ~ (regex)",
+    )
+    parser.add_argument(
+        "--group-by", action="append", default=[], help="field to group by"
+    )
+    parser.add_argument("--field", help="numeric field to compute percentiles of")
+    parser.add_argument(
+        "--percentiles",
+        type=_parse_percentiles,
+        default=list(DEFAULT_PERCENTILES),
+        help="comma-separated (default: 50,90,99)",
+    )
+    parser.add_argument("--count", action="store_true", help="only count records")
+    parser.add_argument("--json", action="store_true", help="JSON lines output")
+    parser.add_argument("--limit", type=int, help="maximum number of lines or rows")
+    parser.add_argument(
+        "--jobs", type=int, help="number of processes (default: number of CPUs)"
+    )
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    since = args.since
+    if args.last is not None:
+        since = max(since or -math.inf, dt.datetime.now().timestamp() - args.last)
+    query = Query(
+        min_level=args.level,
+        loggers=args.logger,
+        since=since,
+        until=args.until,
+        predicates=args.where,
+        group_by=args.group_by,
+        value_field=args.field,
+        percentiles=args.percentiles,
+        count_only=args.count,
+    )
+
+    aggregation = Aggregation()
+    printed = 0
+    try:
+        for lines, chunk_aggregation in run_query(args.filenames, query, args.jobs):
+            if query.aggregates:
+                aggregation.merge(chunk_aggregation)
+                continue
+            for line in lines:
+                if args.limit is not None and printed >= args.limit:
+                    return 0
+                sys.stdout.buffer.write(line + b"\n")
+                printed += 1
+    except BrokenPipeError:
+        return 0
+    except OSError as exc:
+        parser.error(str(exc))
+
+    if not query.aggregates:
+        return 0
+    rows = aggregation.rows(query)[: args.limit]
+    if args.json:
+        for row in rows:
+            print(json.dumps(row))
+    else:
+        _print_table(rows)
+    return 0
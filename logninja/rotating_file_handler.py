@@ -0,0 +1,249 @@
+import gzip
+import logging
+import os
+import queue
+import re
+import shutil
+import threading
+import time
+import traceback
+from typing import List, Optional
+
+from logninja.log_index import index_filename
+from logninja.ninja_file_handler import NinjaFileHandler
+
+COMPRESSED_SUFFIX = ".gz"
+
+# Suffix of the segments named by ``NinjaRotatingFileHandler._segment_name``.
+SEGMENT_SUFFIX = r"\.\d{8}-\d{6}-\d{6}(?:-\d+)?"
+
+
+class SegmentArchiver:
+    """
+    Compresses rotated segments and prunes old ones on a background thread,
+    so rotating never waits on gzip or on the file system scan.
+
+    Segments are handled one at a time, in the order they were rotated.
+
+    Args:
+        base_filename (str): Path of the active log file, segments are the
+            files next to it named ``<base_filename>.<timestamp>``. The index
+            of a segment, if any, is pruned along with it.
+        backup_count (int | None): How many segments are kept.
+        max_total_bytes (int | None): Maximum total size of the kept segments.
+        compress (bool): Whether segments are gzip-compressed.
+    """
+
+    _sentinel = None
+
+    def __init__(
+        self,
+        base_filename: str,
+        backup_count: Optional[int] = None,
+        max_total_bytes: Optional[int] = None,
+        compress: bool = True,
+    ) -> None:
+        self.base_filename = base_filename
+        self.backup_count = backup_count
+        self.max_total_bytes = max_total_bytes
+        self.compress = compress
+        self._queue: "queue.SimpleQueue[Optional[str]]" = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def submit(self, segment: str) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="logninja-rotation", daemon=True
+                )
+                self._thread.start()
+        self._queue.put(segment)
+
+    def close(self) -> None:
+        """Waits for the pending segments to be archived."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(self._sentinel)
+            thread.join()
+
+    def segments(self) -> List[str]:
+        """Archived segments, oldest first."""
+        directory, name = os.path.split(os.path.abspath(self.base_filename))
+        suffix = re.escape(COMPRESSED_SUFFIX) if self.compress else ""
+        pattern = re.compile(re.escape(name) + SEGMENT_SUFFIX + suffix)
+        paths = []
+        for entry in os.scandir(directory):
+            if not pattern.fullmatch(entry.name) or not entry.is_file():
+                continue
+            paths.append((entry.stat().st_mtime, entry.name, entry.path))
+        return [path for _, _, path in sorted(paths)]
+
+    def archive(self, segment: str) -> None:
+        if self.compress:
+            self._compress(segment)
+        self._prune()
+
+    def _run(self) -> None:
+        while True:
+            segment = self._queue.get()
+            if segment is self._sentinel:
+                return
+            try:
+                self.archive(segment)
+            except Exception:
+                if logging.raiseExceptions:
+                    traceback.print_exc()
+
+    def _compress(self, segment: str) -> None:
+        target = segment + COMPRESSED_SUFFIX
+        partial = target + ".tmp"
+        with open(segment, "rb") as source, gzip.open(partial, "wb") as compressed:
+            shutil.copyfileobj(source, compressed, 1024 * 1024)
+        os.replace(partial, target)
+        os.remove(segment)
+
+    def _prune(self) -> None:
+        if self.backup_count is None and self.max_total_bytes is None:
+            return
+
+        segments = self.segments()
+        if self.backup_count is not None and len(segments) > self.backup_count:
+            excess = len(segments) - self.backup_count
+            for path in segments[:excess]:
+                self._remove(path)
+            segments = segments[excess:]
+
+        if self.max_total_bytes is not None:
+            sizes = [os.path.getsize(path) for path in segments]
+            total = sum(sizes)
+            for path, size in zip(segments, sizes):
+                if total <= self.max_total_bytes:
+                    break
+                self._remove(path)
+                total -= size
+
+    def _remove(self, segment: str) -> None:
+        os.remove(segment)
+        if segment.endswith(COMPRESSED_SUFFIX):
+            segment = segment[: -len(COMPRESSED_SUFFIX)]
+        try:
+            os.remove(index_filename(segment))
+        except FileNotFoundError:
+            pass
+
+
+class NinjaRotatingFileHandler(NinjaFileHandler):
+    """
+    ``NinjaFileHandler`` that starts a new file once the current one reaches
+    ``max_bytes`` or is ``interval`` seconds old, whichever comes first.
+
+    The full file is renamed to ``<filename>.<YYYYmmdd-HHMMSS-ffffff>`` and
+    handed to a ``SegmentArchiver``, which gzips it and prunes old segments on
+    its own thread. Sizes are counted in characters written, so with non-ASCII
+    output files can end up slightly larger than ``max_bytes``.
+
+    With ``index_config``, the index of the full file is renamed along with
+    it, to ``<segment>.idx``. It keeps describing the uncompressed segment.
+
+    Args:
+        filename (str): Path of the active log file.
+        rotation_config (RotationConfig): When to rotate and what to keep.
+        buffer_config (BufferConfig | None): See ``NinjaFileHandler``.
+        index_config (IndexConfig | None): See ``NinjaFileHandler``.
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        rotation_config,
+        mode: str = "a",
+        encoding: Optional[str] = None,
+        delay: bool = False,
+        buffer_config=None,
+        index_config=None,
+    ) -> None:
+        if rotation_config.max_bytes is None and rotation_config.interval is None:
+            raise ValueError("Set max_bytes and/or interval to rotate log files")
+        if rotation_config.max_bytes is not None and rotation_config.max_bytes <= 0:
+            raise ValueError("max_bytes must be greater than zero")
+        if rotation_config.interval is not None and rotation_config.interval <= 0:
+            raise ValueError("interval must be greater than zero")
+
+        self.rotation_config = rotation_config
+        self.archiver = SegmentArchiver(
+            os.path.abspath(filename),
+            backup_count=rotation_config.backup_count,
+            max_total_bytes=rotation_config.max_total_bytes,
+            compress=rotation_config.compress,
+        )
+        self._size = 0
+        self._rollover_at = None
+        super().__init__(
+            filename,
+            mode=mode,
+            encoding=encoding,
+            delay=delay,
+            buffer_config=buffer_config,
+            index_config=index_config,
+        )
+
+    def _open(self):
+        stream = super()._open()
+        try:
+            self._size = os.path.getsize(self.baseFilename)
+        except OSError:
+            self._size = 0
+        if self.rotation_config.interval is not None:
+            self._rollover_at = time.time() + self.rotation_config.interval
+        return stream
+
+    def shouldRollover(self, size: int) -> bool:
+        if self._rollover_at is not None and time.time() >= self._rollover_at:
+            if self._size:
+                return True
+            # Nothing was logged during the interval, keep the empty file.
+            self._rollover_at = time.time() + self.rotation_config.interval
+
+        max_bytes = self.rotation_config.max_bytes
+        if max_bytes is None or not self._size:
+            return False
+        return self._size + size > max_bytes
+
+    def doRollover(self) -> None:
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+
+        if self.index is not None:
+            self.index.close()
+
+        if os.path.exists(self.baseFilename):
+            segment = self._segment_name()
+            os.rename(self.baseFilename, segment)
+            if self.index is not None and os.path.exists(self.index.filename):
+                os.rename(self.index.filename, index_filename(segment))
+            self.archiver.submit(segment)
+
+        self.stream = self._open()
+
+    def _write(self, msg: str, record: logging.LogRecord) -> None:
+        if self.shouldRollover(len(msg)):
+            self.doRollover()
+        super()._write(msg, record)
+        self._size += len(msg)
+
+    def close(self) -> None:
+        super().close()
+        self.archiver.close()
+
+    def _segment_name(self) -> str:
+        now = time.time()
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(now))
+        name = f"{self.baseFilename}.{stamp}-{int(now % 1 * 1e6):06d}"
+        segment, counter = name, 0
+        while os.path.exists(segment) or os.path.exists(segment + COMPRESSED_SUFFIX):
+            counter += 1
+            segment = f"{name}-{counter}"
+        return segment
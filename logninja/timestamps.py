@@ -0,0 +1,119 @@
+import datetime as dt
+import math
+from typing import Callable, Dict, Tuple, Union
+
+ISO = "iso"
+RFC3339 = "rfc3339"
+EPOCH_MILLIS = "epoch_millis"
+
+TIMESTAMP_FORMATS = (ISO, RFC3339, EPOCH_MILLIS)
+
+
+class SecondCache:
+    """
+    Remembers the last rendered second.
+
+    Records logged close together share the same second, so rendering it once
+    and reusing the string saves a datetime and a strftime/isoformat call on
+    almost every record. The entry is a single tuple, replaced atomically, so
+    the cache is safe to share between threads.
+    """
+
+    __slots__ = ("render", "_last")
+
+    def __init__(self, render: Callable[[int], str]) -> None:
+        self.render = render
+        self._last: Tuple[Union[int, None], str] = (None, "")
+
+    def get(self, second: int) -> str:
+        last = self._last
+        if last[0] == second:
+            return last[1]
+
+        rendered = self.render(second)
+        self._last = (second, rendered)
+        return rendered
+
+
+def split_timestamp(created: float) -> Tuple[int, int]:
+    """
+    Splits a POSIX timestamp into whole seconds and microseconds, rounding
+    the same way ``datetime.fromtimestamp`` does.
+    """
+    fraction, whole = math.modf(created)
+    second = int(whole)
+    microsecond = round(fraction * 1e6)
+    if microsecond >= 1_000_000:
+        second += 1
+        microsecond -= 1_000_000
+    elif microsecond < 0:
+        second -= 1
+        microsecond += 1_000_000
+    return second, microsecond
+
+
+_utc_seconds = SecondCache(
+    lambda second: dt.datetime.fromtimestamp(second, tz=dt.timezone.utc).strftime(
+        "%Y-%m-%dT%H:%M:%S"
+    )
+)
+_local_seconds: Dict[str, SecondCache] = {}
+
+
+def isoformat_utc(created: float) -> str:
+    """Same output as ``datetime.fromtimestamp(created, tz=utc).isoformat()``."""
+    second, microsecond = split_timestamp(created)
+    prefix = _utc_seconds.get(second)
+    if microsecond:
+        return f"{prefix}.{microsecond:06d}+00:00"
+    return f"{prefix}+00:00"
+
+
+def rfc3339_utc(created: float) -> str:
+    """RFC 3339 with millisecond precision and a fixed ``Z`` offset."""
+    second, microsecond = split_timestamp(created)
+    return f"{_utc_seconds.get(second)}.{microsecond // 1000:03d}Z"
+
+
+def epoch_millis(created: float) -> int:
+    return int(created * 1000)
+
+
+def strftime_local(created: float, fmt: str) -> str:
+    """Same output as ``datetime.fromtimestamp(created).strftime(fmt)``."""
+    if "%f" in fmt:
+        return dt.datetime.fromtimestamp(created).strftime(fmt)
+
+    cache = _local_seconds.get(fmt)
+    if cache is None:
+        cache = _local_seconds.setdefault(
+            fmt,
+            SecondCache(lambda second: dt.datetime.fromtimestamp(second).strftime(fmt)),
+        )
+    return cache.get(split_timestamp(created)[0])
+
+
+def parse_timestamp(value: str) -> dt.datetime:
+    """
+    ``datetime.fromisoformat`` that also reads the ``Z`` offset of RFC 3339
+    timestamps, which it only accepts from Python 3.11 on.
+    """
+    if value[-1:] in ("Z", "z"):
+        value = value[:-1] + "+00:00"
+    return dt.datetime.fromisoformat(value)
+
+
+def get_timestamp_renderer(
+    timestamp_format: str,
+) -> Callable[[float], Union[str, int]]:
+    if timestamp_format == ISO:
+        return isoformat_utc
+    if timestamp_format == RFC3339:
+        return rfc3339_utc
+    if timestamp_format == EPOCH_MILLIS:
+        return epoch_millis
+
+    raise ValueError(
+        f"Invalid timestamp_format {timestamp_format!r}, "
+        f"use one of {', '.join(TIMESTAMP_FORMATS)}"
+    )
@@ -4,8 +4,13 @@
 
 from __future__ import annotations
 
+import hashlib
 import os
-from dataclasses import asdict, dataclass, field
+import reprlib
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from functools import lru_cache
 from traceback import walk_tb
 from types import TracebackType
 from typing import Any, Optional, Tuple, Type, Union
@@ -15,8 +20,13 @@ ExcInfo = Tuple[Type[BaseException], BaseException, Optional[TracebackType]]
 
 SHOW_LOCALS = True
 LOCALS_MAX_STRING = 80
+LOCALS_MAX_TOTAL = 16 * 1024
+LOCALS_MAX_SECONDS = 0.05
 MAX_FRAMES = 50
 
+FINGERPRINT_ATTR = "exc_fingerprint"
+REPEAT_COUNT_ATTR = "exc_repeat_count"
+
 OptExcInfo = Union[ExcInfo, Tuple[None, None, None]]
 
 
@@ -76,13 +86,43 @@ def safe_str(_object: Any) -> str:
         return f"<str-error {str(error)!r}>"
 
 
+class _BoundedRepr(reprlib.Repr):
+    """
+    ``reprlib.Repr`` that also bounds bytes, which it would otherwise render
+    in full before truncating them.
+    """
+
+    def repr_bytes(self, obj: bytes, level: int) -> str:
+        if len(obj) <= self.maxstring:
+            return repr(obj)
+        return f"{obj[: self.maxstring]!r}..."
+
+    repr_bytearray = repr_bytes
+
+
+# Every local but strings is rendered through reprlib, so a huge value, even
+# nested in a small container, costs a bounded number of element reprs
+# instead of a full repr to be truncated.
+_bounded_repr = _BoundedRepr()
+_bounded_repr.maxlevel = 3
+_bounded_repr.maxstring = LOCALS_MAX_STRING
+_bounded_repr.maxother = LOCALS_MAX_STRING
+_bounded_repr.maxlong = LOCALS_MAX_STRING
+
+
+# reprlib would only add its dispatch on top of their plain repr.
+_SCALARS = frozenset((int, bool, float, type(None)))
+
+
 def to_repr(obj: Any, max_string: int | None = None) -> str:
-    """Get repr string for an object, but catch errors."""
+    """Get a bounded repr string for an object, but catch errors."""
     if isinstance(obj, str):
         obj_repr = obj
+    elif type(obj) in _SCALARS:
+        obj_repr = repr(obj)
     else:
         try:
-            obj_repr = repr(obj)
+            obj_repr = _bounded_repr.repr(obj)
         except Exception as error:
             obj_repr = f"<repr-error {str(error)!r}>"
 
@@ -93,6 +133,43 @@ def to_repr(obj: Any, max_string: int | None = None) -> str:
     return obj_repr
 
 
+@lru_cache(maxsize=1024)
+def normalize_filename(filename: str) -> str:
+    """Absolute path of a code object's file, cached per filename."""
+    if filename and not filename.startswith("<"):
+        return os.path.abspath(filename)
+    return filename or "?"
+
+
+class _LocalsBudget:
+    """Caps the total size and time spent rendering locals for one trace."""
+
+    def __init__(self, max_total: int | None, max_seconds: float | None) -> None:
+        self.remaining = max_total
+        self.deadline = (
+            None if max_seconds is None else time.perf_counter() + max_seconds
+        )
+        self.exhausted = False
+
+    def render(self, f_locals: dict, max_string: int | None) -> dict[str, str] | None:
+        if self.exhausted:
+            return None
+
+        rendered = {}
+        for key, value in f_locals.items():
+            value_repr = to_repr(value, max_string=max_string)
+            rendered[key] = value_repr
+            if self.remaining is not None:
+                self.remaining -= len(key) + len(value_repr)
+                if self.remaining <= 0:
+                    self.exhausted = True
+                    break
+            if self.deadline is not None and time.perf_counter() > self.deadline:
+                self.exhausted = True
+                break
+        return rendered
+
+
 def extract(
     exc_type: type[BaseException],
     exc_value: BaseException,
@@ -100,6 +177,9 @@ def extract(
     *,
     show_locals: bool = False,
     locals_max_string: int = LOCALS_MAX_STRING,
+    locals_max_total: int | None = LOCALS_MAX_TOTAL,
+    locals_max_seconds: float | None = LOCALS_MAX_SECONDS,
+    max_frames: int | None = None,
 ) -> Trace:
     """
     Extract traceback information.
@@ -116,7 +196,19 @@ def extract(
         locals_max_string:
             Maximum length of string before truncating, or ``None`` to disable.
 
-        max_frames: Maximum number of frames in each stack
+        locals_max_total:
+            Maximum total length of the rendered locals of the whole trace, or
+            ``None`` to disable. The budget is spent on the raised exception
+            before its causes, innermost frame first, so the frames past it
+            that get no locals are the outermost ones.
+
+        locals_max_seconds:
+            Maximum time spent rendering locals, or ``None`` to disable.
+
+        max_frames: Maximum number of frames in each stack. Only the first and
+            last ``max_frames // 2`` frames are materialised, the middle ones
+            are replaced by a single "Skipped frames" frame. ``None`` keeps
+            every frame.
 
     Returns:
         A Trace instance with structured information about all exceptions.
@@ -126,6 +218,21 @@ def extract(
 
     stacks: list[Stack] = []
     is_cause = False
+    # Frames whose locals are rendered once every stack is walked, in the
+    # order they are most useful: the raised exception before its causes,
+    # innermost frame first.
+    pending_locals: list[tuple[Frame, dict]] = []
+
+    def make_frame(frame_summary, line_no: int) -> Frame:
+        code = frame_summary.f_code
+        frame = Frame(
+            filename=normalize_filename(code.co_filename),
+            lineno=line_no,
+            name=code.co_name,
+        )
+        if show_locals:
+            pending_locals.append((frame, frame_summary.f_locals))
+        return frame
 
     while True:
         stack = Stack(
@@ -144,26 +251,38 @@ def extract(
             )
 
         stacks.append(stack)
-        append = stack.frames.append
-
-        for frame_summary, line_no in walk_tb(traceback):
-            filename = frame_summary.f_code.co_filename
-            if filename and not filename.startswith("<"):
-                filename = os.path.abspath(filename)
-            frame = Frame(
-                filename=filename or "?",
-                lineno=line_no,
-                name=frame_summary.f_code.co_name,
-                locals=(
-                    {
-                        key: to_repr(value, max_string=locals_max_string)
-                        for key, value in frame_summary.f_locals.items()
-                    }
-                    if show_locals
-                    else None
-                ),
-            )
-            append(frame)
+        stack_start = len(pending_locals)
+
+        if max_frames is None:
+            stack.frames = [make_frame(*entry) for entry in walk_tb(traceback)]
+        else:
+            half = max_frames // 2
+            head: list[Frame] = []
+            rest: deque = deque(maxlen=max_frames - half)
+            total = 0
+            for entry in walk_tb(traceback):
+                if total < half:
+                    head.append(make_frame(*entry))
+                else:
+                    rest.append(entry)
+                total += 1
+
+            if total <= max_frames:
+                stack.frames = head + [make_frame(*entry) for entry in rest]
+            else:
+                tail = list(rest)[len(rest) - half :] if half else []
+                fake_frame = Frame(
+                    filename="",
+                    lineno=-1,
+                    name=f"Skipped frames: {total - (2 * half)}",
+                )
+                stack.frames = [
+                    *head,
+                    fake_frame,
+                    *[make_frame(*entry) for entry in tail],
+                ]
+
+        pending_locals[stack_start:] = reversed(pending_locals[stack_start:])
 
         cause = getattr(exc_value, "__cause__", None)
         if cause and cause.__traceback__:
@@ -187,6 +306,10 @@ def extract(
 
         break
 
+    budget = _LocalsBudget(locals_max_total, locals_max_seconds)
+    for frame, f_locals in pending_locals:
+        frame.locals = budget.render(f_locals, locals_max_string)
+
     return Trace(stacks=stacks)
 
 
@@ -195,27 +318,69 @@ def format_exception(
     locals_max_string: int = LOCALS_MAX_STRING,
     max_frames: int = MAX_FRAMES,
     show_locals: bool = SHOW_LOCALS,
+    locals_max_total: int | None = LOCALS_MAX_TOTAL,
+    locals_max_seconds: float | None = LOCALS_MAX_SECONDS,
 ) -> list[dict[str, Any]]:
     trace = extract(
         *exc_info,
         show_locals=show_locals,
         locals_max_string=locals_max_string,
+        locals_max_total=locals_max_total,
+        locals_max_seconds=locals_max_seconds,
+        max_frames=max_frames,
     )
+    return [_stack_asdict(stack) for stack in trace.stacks]
+
 
-    for stack in trace.stacks:
-        if len(stack.frames) <= max_frames:
+def _stack_asdict(stack: Stack) -> dict[str, Any]:
+    """
+    Same result as ``dataclasses.asdict(stack)``, without its recursive
+    deep copy, which costs more than the extraction itself.
+    """
+    result = dict(vars(stack))
+    if stack.syntax_error is not None:
+        result["syntax_error"] = dict(vars(stack.syntax_error))
+    result["frames"] = [dict(vars(frame)) for frame in stack.frames]
+    return result
+
+
+@lru_cache(maxsize=1024)
+def _code_key(code) -> bytes:
+    return f"{code.co_filename}:{code.co_name}:".encode()
+
+
+def fingerprint(exc_info: ExcInfo) -> str:
+    """
+    Stable identifier of an exception and where it was raised.
+
+    Hashes the exception type and the code object/line chain of its
+    traceback, following causes and contexts the same way ``extract`` does.
+    The same exception raised from the same stack always gets the same
+    fingerprint, across processes and restarts, whatever its message.
+    """
+    exc_type, exc_value, traceback = exc_info
+    digest = hashlib.blake2b(digest_size=8)
+
+    while True:
+        digest.update(f"{exc_type.__module__}.{exc_type.__qualname__}|".encode())
+        for frame_summary, line_no in walk_tb(traceback):
+            digest.update(_code_key(frame_summary.f_code))
+            digest.update(f"{line_no}|".encode())
+
+        cause = getattr(exc_value, "__cause__", None)
+        if cause and cause.__traceback__:
+            exc_type, exc_value, traceback = cause.__class__, cause, cause.__traceback__
             continue
 
-        half = max_frames // 2  # Force int division to handle odd numbers correctly
-        fake_frame = Frame(
-            filename="",
-            lineno=-1,
-            name=f"Skipped frames: {len(stack.frames) - (2 * half)}",
-        )
-        stack.frames[:] = [
-            *stack.frames[:half],
-            fake_frame,
-            *stack.frames[-half:],
-        ]
+        cause = getattr(exc_value, "__context__", None)
+        if (
+            cause
+            and cause.__traceback__
+            and not getattr(exc_value, "__suppress_context__", False)
+        ):
+            exc_type, exc_value, traceback = cause.__class__, cause, cause.__traceback__
+            continue
+
+        break
 
-    return [asdict(stack) for stack in trace.stacks]
+    return digest.hexdigest()
@@ -1,9 +1,9 @@
+import json
 import logging
-from datetime import datetime
-from pathlib import Path
-from typing import List, Union
+from typing import Any, Callable, List, Union
 
 from logninja.options import All, Only
+from logninja.timestamps import strftime_local
 
 LOG_RECORD_BUILTIN_ATTRS = {
     "args",
@@ -32,44 +32,87 @@ LOG_RECORD_BUILTIN_ATTRS = {
 }
 
 
-def get_message(record: logging.LogRecord, max_len: int | None) -> str:
-    message = record.getMessage()
-    import json
+class LazyStr:
+    """
+    Text rendered by ``render(*args)`` the first time ``str()`` is called on
+    it, e.g. by a formatter, so records dropped by a level, filter or handler
+    never pay for it.
+    """
+
+    __slots__ = ("_render", "_args", "_text")
+
+    def __init__(self, render: Callable[..., str], *args: Any) -> None:
+        self._render = render
+        self._args = args
+        self._text = None
+
+    def __str__(self) -> str:
+        if self._text is None:
+            self._text = self._render(*self._args)
+            self._render = self._args = None
+        return self._text
+
+    __repr__ = __str__
+
+
+LEVEL_NAMES = {
+    logging.CRITICAL: "[CRITICAL]",
+    logging.ERROR: "[ERROR   ]",
+    logging.WARNING: "[WARNING ]",
+    logging.INFO: "[INFO    ]",
+    logging.DEBUG: "[DEBUG   ]",
+}
+
+
+def unwrap_json_message(message: str) -> str:
+    """Returns the ``message`` field when the message is a JSON object."""
+    if not message.startswith("{"):
+        return message
 
     try:
         result = json.loads(message)
-        if result.get("message"):
-            message = result.get("message")
-    except Exception:
-        pass
+    except ValueError:
+        return message
+
+    if isinstance(result, dict) and result.get("message"):
+        return result["message"]
+    return message
+
 
+def fit_message(message: str, max_len: int | None) -> str:
+    """
+    Truncates longer messages to ``max_len`` characters plus ``...`` and pads
+    shorter ones to ``max_len + 3``. A message of exactly ``max_len`` is kept
+    as is.
+    """
     if max_len is None:
         return message
 
     message_size = len(message)
     if message_size == max_len:
         return message
-
     if message_size > max_len:
-        message = message[:max_len] + "..."
-        return message
+        return message[:max_len] + "..."
+    return message.ljust(max_len + 3)
 
-    if message_size < max_len:
-        message = message + " " * (max_len + 3 - message_size)
 
-    return message
+def get_message(
+    record: logging.LogRecord, max_len: int | None, unwrap_json: bool = True
+) -> str:
+    message = record.getMessage()
+    if unwrap_json:
+        message = unwrap_json_message(message)
+    return fit_message(message, max_len)
 
 
 def format_path(record: logging.LogRecord) -> str:
-    path = Path(record.pathname).name
-    result = f"{path}:{record.lineno}"
-    return result
+    return f"{record.filename}:{record.lineno}"
 
 
-def get_all_extras(record: logging.LogRecord) -> dict:
+def get_all_extras(record: logging.LogRecord, exclude: List[str] = ()) -> dict:
     extras_result = {}
     for key, val in record.__dict__.items():
-        if key not in LOG_RECORD_BUILTIN_ATTRS:
+        if key not in LOG_RECORD_BUILTIN_ATTRS and key not in exclude:
             extras_result[key] = val
     return extras_result
 
@@ -90,7 +133,7 @@ def get_extras(
         return {}
 
     if isinstance(extras, All):
-        return get_all_extras(record)
+        return get_all_extras(record, extras.exclude)
     if isinstance(extras, Only):
         return get_only_extras(record, extras.extras)
 
@@ -98,34 +141,19 @@ def get_extras(
 
 
 def get_level_name(record: logging.LogRecord) -> str:
-    levelno = record.levelno
-    levels = {
-        logging.CRITICAL: "[CRITICAL]",
-        logging.ERROR: "[ERROR   ]",
-        logging.WARNING: "[WARNING ]",
-        logging.INFO: "[INFO    ]",
-        logging.DEBUG: "[DEBUG   ]",
-    }
-    level_name = levels.get(levelno)
+    level_name = LEVEL_NAMES.get(record.levelno)
+    if level_name is None:
+        level_name = f"[{record.levelname:<8}]"
     return level_name
 
 
 def format_time(record: logging.LogRecord, fmt: str = "%Y-%m-%d %H:%M:%S") -> str:
-    timestamp = record.created
-    dt_object = datetime.fromtimestamp(timestamp)
-    formatted_time = dt_object.strftime(fmt)
-    return f"[{formatted_time}]"
+    return f"[{strftime_local(record.created, fmt)}]"
 
 
 def format_extras(extras: dict) -> str:
-    text = ""
-    if extras:
-        last_key = list(extras.keys())[-1]
-        for key, value in extras.items():
-            key_value = f"{key}={value}"
-            text += key_value
-            if key != last_key:
-                text += ", "
-        return f"  [{text}]"
-
-    return text
+    if not extras:
+        return ""
+
+    text = ", ".join([f"{key}={value}" for key, value in extras.items()])
+    return f"  [{text}]"
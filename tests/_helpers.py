@@ -0,0 +1,29 @@
+import logging
+from typing import Optional
+
+
+def make_record(
+    msg: str = "Test message",
+    level: int = logging.INFO,
+    *,
+    args: tuple = (),
+    exc_info=None,
+    name: str = "test_logger",
+    created: Optional[float] = None,
+    **extras,
+) -> logging.LogRecord:
+    record = logging.LogRecord(
+        name=name,
+        level=level,
+        pathname="/path/to/file.py",
+        lineno=10,
+        msg=msg,
+        args=args,
+        exc_info=exc_info,
+        func="test_function",
+        sinfo=None,
+    )
+    if created is not None:
+        record.created = created
+    record.__dict__.update(extras)
+    return record
@@ -0,0 +1,154 @@
+import logging
+import multiprocessing
+import os
+import socket
+import tempfile
+import time
+import unittest
+
+from logninja.aggregator import LogAggregator, NinjaSocketHandler, default_address
+from logninja.configs import IndexConfig
+from logninja.log_index import LogReader
+from logninja.ninja_file_handler import NinjaFileHandler
+from tests._helpers import make_record
+
+
+def log_from_worker(address: str, worker: int, count: int) -> None:
+    handler = NinjaSocketHandler(address, max_batch_records=7, max_latency=0.01)
+    for i in range(count):
+        handler.handle(make_record(f"worker {worker} record {i}"))
+    handler.close()
+
+
+class LogAggregatorTests(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.address = os.path.join(directory.name, "logninja.sock")
+        self.filename = os.path.join(directory.name, "logs.jsonl")
+
+    def start_aggregator(self) -> LogAggregator:
+        aggregator = LogAggregator(self.address, NinjaFileHandler(self.filename))
+        self.addCleanup(aggregator.close)
+        return aggregator.start()
+
+    def read_lines(self):
+        with open(self.filename) as file:
+            return file.read().splitlines()
+
+    def test_batches_from_workers_are_written_whole(self):
+        aggregator = self.start_aggregator()
+        context = multiprocessing.get_context("fork")
+        workers = [
+            context.Process(target=log_from_worker, args=(self.address, worker, 50))
+            for worker in range(3)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(10)
+            self.assertEqual(worker.exitcode, 0)
+        aggregator.close()
+
+        lines = self.read_lines()
+        self.assertEqual(len(lines), 150)
+        for worker in range(3):
+            own = [line for line in lines if line.startswith(f"worker {worker} ")]
+            self.assertEqual(own, [f"worker {worker} record {i}" for i in range(50)])
+
+    def test_buffers_until_the_aggregator_is_up(self):
+        handler = NinjaSocketHandler(
+            self.address, max_latency=0.01, reconnect_delay=0.01
+        )
+        handler.handle(make_record("before the aggregator started"))
+
+        aggregator = self.start_aggregator()
+        handler.handle(make_record("after it started"))
+        handler.close()
+        aggregator.close()
+
+        self.assertEqual(
+            self.read_lines(), ["before the aggregator started", "after it started"]
+        )
+        self.assertEqual(handler.dropped, 0)
+
+    def test_index_covers_each_record_of_a_batch(self):
+        aggregator = LogAggregator(
+            self.address,
+            NinjaFileHandler(self.filename, index_config=IndexConfig()),
+        ).start()
+        handler = NinjaSocketHandler(self.address, max_latency=60)
+        handler.handle(make_record("buffered", logging.INFO, created=1000.0))
+        handler.handle(make_record("error é", logging.ERROR, created=2000.0))
+        handler.close()
+        aggregator.close()
+
+        reader = LogReader(self.filename)
+        self.assertEqual(list(reader.iter_lines(until=1500)), [b"buffered"])
+        self.assertEqual(
+            list(reader.iter_lines(min_level=logging.ERROR)), ["error é".encode()]
+        )
+
+    def test_reconnects_after_a_restart(self):
+        handler = NinjaSocketHandler(
+            self.address, max_latency=0.01, reconnect_delay=0.01
+        )
+        aggregator = self.start_aggregator()
+        handler.handle(make_record("first"))
+        for _ in range(500):
+            if os.path.exists(self.filename) and self.read_lines():
+                break
+            time.sleep(0.01)
+        aggregator.close()
+
+        aggregator = self.start_aggregator()
+        handler.handle(make_record("second"))
+        handler.close()
+        aggregator.close()
+
+        self.assertEqual(self.read_lines(), ["first", "second"])
+
+    def test_drops_oldest_when_the_buffer_is_full(self):
+        handler = NinjaSocketHandler(
+            self.address, max_buffered_records=2, max_latency=60, close_timeout=0
+        )
+        for i in range(5):
+            handler.handle(make_record(f"record {i}"))
+        self.assertEqual(handler.dropped, 3)
+        handler.close()
+        self.assertEqual(handler.dropped, 5)
+
+    def test_refuses_a_live_socket_and_removes_a_stale_one(self):
+        self.start_aggregator()
+
+        with self.assertRaises(OSError):
+            LogAggregator(self.address, NinjaFileHandler(self.filename)).start()
+
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        other = os.path.join(os.path.dirname(self.address), "stale.sock")
+        stale.bind(other)
+        stale.close()
+        aggregator = LogAggregator(other, NinjaFileHandler(self.filename)).start()
+        aggregator.close()
+        self.assertFalse(os.path.exists(other))
+
+    def test_close_leaves_a_replaced_socket(self):
+        aggregator = self.start_aggregator()
+        os.unlink(self.address)
+        replacement = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.addCleanup(replacement.close)
+        replacement.bind(self.address)
+
+        aggregator.close()
+
+        self.assertTrue(os.path.exists(self.address))
+
+    def test_default_address_depends_on_the_log_file(self):
+        self.assertEqual(default_address("logs.jsonl"), default_address("logs.jsonl"))
+        self.assertNotEqual(
+            default_address("/srv/a/logs.jsonl"), default_address("/srv/b/logs.jsonl")
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,200 @@
+import asyncio
+import contextvars
+import logging
+import unittest
+
+from logninja.asgi.metrics import OTHER_ROUTES, AccessLogAggregator
+from logninja.asgi.middleware import LogNinjaASGIMiddleware
+from logninja.asgi.sampling import AccessLogSampler, SamplingRule
+
+
+def make_app(status_code: int = 200):
+    async def app(scope, receive, send):
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status_code,
+                "headers": [(b"content-type", b"text/plain")],
+            }
+        )
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    return app
+
+
+def make_scope(path: str = "/users", headers=()):
+    return {
+        "type": "http",
+        "http_version": "1.1",
+        "method": "GET",
+        "path": path,
+        "query_string": b"page=1",
+        "headers": list(headers),
+        "client": ("127.0.0.1", 50000),
+        "server": ("testserver", 80),
+        "scheme": "http",
+        "root_path": "",
+    }
+
+
+def call(middleware, scope):
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(middleware(scope, receive, send))
+    return messages
+
+
+class LogNinjaASGIMiddlewareTests(unittest.TestCase):
+    def setUp(self):
+        self.logger = logging.getLogger("logninja.tests.asgi")
+        self.logger.setLevel(logging.INFO)
+
+    def test_logs_access(self):
+        middleware = LogNinjaASGIMiddleware(make_app(), logger=self.logger)
+
+        with self.assertLogs(self.logger) as logs:
+            messages = call(middleware, make_scope())
+
+        self.assertEqual(messages[0]["status"], 200)
+        (record,) = logs.records
+        self.assertEqual(record.url, "/users?page=1")
+        self.assertEqual(record.status_code, 200)
+        self.assertGreater(record.duration, 0)
+        self.assertLess(record.duration, 10**9)
+        self.assertFalse(hasattr(record, "sampled_rate"))
+
+    def test_contextvars_by_headers(self):
+        trace_id = contextvars.ContextVar("x-trace-id", default=None)
+        tenant = contextvars.ContextVar("tenant", default=None)
+        seen = {}
+
+        async def app(scope, receive, send):
+            seen.update(trace_id=trace_id.get(), tenant=tenant.get())
+            await make_app()(scope, receive, send)
+
+        middleware = LogNinjaASGIMiddleware(
+            app, self.logger, contextvars_by_headers=[trace_id, (tenant, "X-Tenant")]
+        )
+        headers = [(b"x-trace-id", b"abc"), (b"x-tenant", b"a"), (b"x-tenant", b"b")]
+        with self.assertLogs(self.logger):
+            call(middleware, make_scope(headers=headers))
+
+        self.assertEqual(seen, {"trace_id": "abc", "tenant": "a"})
+
+    def test_log_after_response(self):
+        async def app(scope, receive, send):
+            await send({"type": "http.response.start", "status": 200})
+            await send({"type": "http.response.body", "body": b"ab", "more_body": True})
+            await send({"type": "http.response.body", "body": b"cde"})
+
+        middleware = LogNinjaASGIMiddleware(app, self.logger, log_after_response=True)
+        messages = []
+        sent_before_log = []
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message):
+            messages.append(message)
+
+        handler = logging.Handler()
+        handler.emit = lambda record: sent_before_log.append(len(messages))
+        with self.assertLogs(self.logger) as logs:
+            self.logger.addHandler(handler)
+            asyncio.run(middleware(make_scope(), receive, send))
+
+        (record,) = logs.records
+        self.assertEqual(sent_before_log, [3])
+        self.assertEqual(record.status_code, 200)
+        self.assertEqual(record.response_bytes, 5)
+        self.assertLessEqual(record.time_to_first_byte, record.duration)
+        self.assertFalse(hasattr(record, "response_complete"))
+
+    def test_log_after_response_on_disconnect(self):
+        async def app(scope, receive, send):
+            await send({"type": "http.response.start", "status": 200})
+            await send({"type": "http.response.body", "body": b"ab", "more_body": True})
+            raise asyncio.CancelledError
+
+        middleware = LogNinjaASGIMiddleware(app, self.logger, log_after_response=True)
+        with self.assertLogs(self.logger) as logs:
+            with self.assertRaises(asyncio.CancelledError):
+                call(middleware, make_scope())
+
+        (record,) = logs.records
+        self.assertEqual(record.response_bytes, 2)
+        self.assertFalse(record.response_complete)
+
+    def test_sampling_by_status_class_and_route(self):
+        sampler = AccessLogSampler(
+            status_rates={2: 0.5},
+            rules=[SamplingRule("/health*", {2: 0.0})],
+            rng=lambda: 0.25,
+        )
+        logged = LogNinjaASGIMiddleware(make_app(), self.logger, sampler=sampler)
+        errors = LogNinjaASGIMiddleware(make_app(503), self.logger, sampler=sampler)
+
+        with self.assertLogs(self.logger) as logs:
+            call(logged, make_scope("/health/live"))
+            call(logged, make_scope("/users"))
+            call(errors, make_scope("/health/live"))
+
+        self.assertEqual(
+            [(record.url, record.sampled_rate) for record in logs.records],
+            [("/users?page=1", 0.5), ("/health/live?page=1", 1.0)],
+        )
+
+    def test_slow_requests_are_always_logged(self):
+        sampler = AccessLogSampler(status_rates={2: 0.0}, always_log_slower_than=0)
+        middleware = LogNinjaASGIMiddleware(make_app(), self.logger, sampler=sampler)
+
+        with self.assertLogs(self.logger) as logs:
+            call(middleware, make_scope())
+
+        self.assertEqual(logs.records[0].sampled_rate, 1.0)
+
+    def test_aggregated_summaries_instead_of_access_logs(self):
+        aggregator = AccessLogAggregator(interval=3600, max_routes=2)
+        ok = LogNinjaASGIMiddleware(
+            make_app(), self.logger, aggregator=aggregator, log_requests=False
+        )
+        failing = LogNinjaASGIMiddleware(
+            make_app(500), self.logger, aggregator=aggregator, log_requests=False
+        )
+        for path in ("/users", "/users", "/orders", "/a", "/b"):
+            call(ok, make_scope(path))
+        call(failing, make_scope("/users"))
+
+        with self.assertLogs(self.logger) as logs:
+            aggregator.emit(self.logger)
+
+        summaries = {record.route: record for record in logs.records}
+        self.assertEqual(set(summaries), {"/users", "/orders", OTHER_ROUTES})
+        self.assertEqual(summaries["/users"].count, 3)
+        self.assertEqual(summaries["/users"].error_count, 1)
+        self.assertEqual(summaries["/users"].status_counts, {"2xx": 2, "5xx": 1})
+        self.assertEqual(summaries[OTHER_ROUTES].count, 2)
+        self.assertLessEqual(summaries["/users"].p50, summaries["/users"].max)
+
+    def test_summaries_are_emitted_when_the_interval_ends(self):
+        aggregator = AccessLogAggregator(interval=0)
+        middleware = LogNinjaASGIMiddleware(
+            make_app(), self.logger, aggregator=aggregator
+        )
+
+        with self.assertLogs(self.logger) as logs:
+            call(middleware, make_scope())
+
+        self.assertEqual(
+            [hasattr(record, "route") for record in logs.records], [True, False]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
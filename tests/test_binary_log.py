@@ -0,0 +1,165 @@
+import io
+import json
+import logging
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from logninja import _setup_log_file_handler
+from logninja.binary_log import (
+    MAX_INTERNED_STRINGS,
+    NinjaBinaryFileHandler,
+    convert_to_jsonl,
+    read_binary_log,
+)
+from logninja.configs import LogFileConfig, RotationConfig
+from logninja.ninja_json_formatter import NinjaJsonFormatter
+from logninja.options import Only
+from logninja.timestamps import EPOCH_MILLIS
+from tests._helpers import make_record
+
+
+class BinaryLogTests(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.filename = os.path.join(directory.name, "logs.lnb")
+
+    def write(self, *records, **kwargs):
+        handler = NinjaBinaryFileHandler(self.filename, **kwargs)
+        try:
+            for record in records:
+                handler.handle(record)
+        finally:
+            handler.close()
+
+    @staticmethod
+    def failed_record():
+        # Raised in a frame that is done before the record is formatted, so
+        # the locals in the traceback are the same every time.
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            return make_record("failed", logging.ERROR, exc_info=sys.exc_info())
+
+    def test_decodes_to_the_json_formatter_dict(self):
+        records = [
+            make_record(
+                "hello é\ud800",
+                user_id=42,
+                delta=-7,
+                ratio=0.25,
+                big=2**70,
+                flag=True,
+                missing=None,
+                tags=["a", "b"],
+                path="x" * 300,
+            ),
+            self.failed_record(),
+            make_record("repeat", exc_fingerprint="abc", exc_repeat_count=3),
+            make_record("again", user_id=43),
+        ]
+        formatter = NinjaJsonFormatter()
+        expected = [json.loads(formatter.format(record)) for record in records]
+        # The lone surrogate can't be JSON encoded by every backend.
+        expected[0]["message"] = "hello é\ud800"
+
+        self.write(*records)
+
+        self.assertEqual(list(read_binary_log(self.filename)), expected)
+
+    def test_extras_and_timestamp_format(self):
+        record = make_record("hello", user_id=42, request_id="r-1")
+        self.write(record, extras=Only(["request_id"]))
+
+        (log_dict,) = read_binary_log(self.filename, timestamp_format=EPOCH_MILLIS)
+
+        self.assertEqual(log_dict["timestamp"], int(record.created * 1000))
+        self.assertEqual(log_dict["request_id"], "r-1")
+        self.assertNotIn("user_id", log_dict)
+
+    def test_appends_and_cuts_a_truncated_entry(self):
+        self.write(make_record("first", user_id=1))
+        size = os.path.getsize(self.filename)
+        self.write(make_record("second", user_id=2))
+        with open(self.filename, "r+b") as file:
+            file.truncate(os.path.getsize(self.filename) - 3)
+
+        self.assertEqual(
+            [d["message"] for d in read_binary_log(self.filename)], ["first"]
+        )
+
+        self.write(make_record("third", user_id=3), make_record("fourth", other=4))
+        self.assertGreater(os.path.getsize(self.filename), size)
+        log_dicts = list(read_binary_log(self.filename))
+        self.assertEqual(
+            [(d["message"], d.get("user_id")) for d in log_dicts],
+            [("first", 1), ("third", 3), ("fourth", None)],
+        )
+
+    def test_failed_record_leaves_no_dangling_entries(self):
+        circular = {}
+        circular["self"] = circular
+        bad = make_record("bad", name="bad_logger", new_key=circular)
+        bad.funcName = "bad_function"
+
+        with mock.patch.object(logging, "raiseExceptions", False):
+            self.write(bad, make_record("good", name="bad_logger", new_key="value"))
+
+        (log_dict,) = read_binary_log(self.filename)
+        self.assertEqual(log_dict["message"], "good")
+        self.assertEqual(log_dict["logger"], "bad_logger")
+        self.assertEqual(log_dict["new_key"], "value")
+
+    def test_strings_past_the_limit_are_inline(self):
+        handler = NinjaBinaryFileHandler(self.filename)
+        handler._record_encoder._string_count = MAX_INTERNED_STRINGS
+        handler.handle(make_record("inline", new_key="value"))
+        handler.close()
+
+        (log_dict,) = read_binary_log(self.filename)
+        self.assertEqual(log_dict["new_key"], "value")
+        self.assertEqual(log_dict["logger"], "test_logger")
+
+    def test_rejects_other_files(self):
+        with open(self.filename, "w") as file:
+            file.write('{"message": "json"}\n')
+
+        with self.assertRaises(ValueError):
+            list(read_binary_log(self.filename))
+
+    def test_convert_to_jsonl(self):
+        self.write(make_record("one"), make_record("two", user_id=2))
+        output = io.StringIO()
+
+        count = convert_to_jsonl(self.filename, output, encoder="json")
+
+        lines = output.getvalue().splitlines()
+        self.assertEqual(count, 2)
+        self.assertEqual(json.loads(lines[1])["user_id"], 2)
+
+    def test_log_file_config(self):
+        handler = _setup_log_file_handler(
+            LogFileConfig(filename=self.filename, binary=True)
+        )
+        handler.close()
+        self.assertIsInstance(handler, NinjaBinaryFileHandler)
+
+        with self.assertRaises(ValueError):
+            _setup_log_file_handler(
+                LogFileConfig(
+                    filename=self.filename,
+                    binary=True,
+                    rotation_config=RotationConfig(),
+                )
+            )
+
+    def test_default_filename(self):
+        self.assertEqual(LogFileConfig().filename, "logs.jsonl")
+        self.assertEqual(LogFileConfig(binary=True).filename, "logs.lnb")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import io
+import logging
+import os
+import tempfile
+import time
+import unittest
+
+from logninja.buffered_writer import BufferedWriter
+from logninja.configs import BufferConfig
+from logninja.ninja_file_handler import NinjaFileHandler
+from logninja.ninja_formatter import NinjaFormatter
+from tests._helpers import make_record
+
+
+class BufferedWriterTests(unittest.TestCase):
+    def test_commits_on_record_count(self):
+        stream = io.StringIO()
+        writer = BufferedWriter(stream, max_records=3, max_latency=60)
+
+        writer.write("a\n")
+        writer.write("b\n")
+        self.assertEqual(stream.getvalue(), "")
+
+        writer.write("c\n")
+        self.assertEqual(stream.getvalue(), "a\nb\nc\n")
+        writer.close()
+
+    def test_commits_on_size(self):
+        stream = io.StringIO()
+        writer = BufferedWriter(stream, max_bytes=10, max_latency=60)
+
+        writer.write("12345")
+        self.assertEqual(stream.getvalue(), "")
+
+        writer.write("67890")
+        self.assertEqual(stream.getvalue(), "1234567890")
+        writer.close()
+
+    def test_commits_on_deadline(self):
+        stream = io.StringIO()
+        writer = BufferedWriter(stream, max_latency=0.05)
+
+        writer.write("late\n")
+        deadline = time.monotonic() + 2
+        while not stream.getvalue() and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        self.assertEqual(stream.getvalue(), "late\n")
+        writer.close()
+
+    def test_soft_flush_keeps_buffer(self):
+        stream = io.StringIO()
+        writer = BufferedWriter(stream, max_latency=60)
+
+        writer.write("a\n")
+        writer.flush()
+        self.assertEqual(stream.getvalue(), "")
+
+        writer.close()
+        self.assertEqual(stream.getvalue(), "a\n")
+
+
+class NinjaFileHandlerTests(unittest.TestCase):
+    def test_error_records_are_written_right_away(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "logs.log")
+            handler = NinjaFileHandler(
+                filename, buffer_config=BufferConfig(max_latency=60)
+            )
+            handler.setFormatter(NinjaFormatter(max_message_length=None))
+
+            handler.handle(make_record("first", logging.INFO))
+            with open(filename) as f:
+                self.assertEqual(f.read(), "")
+
+            handler.handle(make_record("second", logging.ERROR))
+            with open(filename) as f:
+                lines = f.read().splitlines()
+            handler.close()
+
+        self.assertEqual(len(lines), 2)
+        self.assertIn("first", lines[0])
+        self.assertIn("second", lines[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
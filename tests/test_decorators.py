@@ -0,0 +1,162 @@
+import asyncio
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import textwrap
+import unittest
+
+from logninja.decorators import log_execution
+
+
+class LogExecutionTests(unittest.TestCase):
+    def setUp(self):
+        self.logger = logging.getLogger("logninja.tests.decorators")
+        self.logger.setLevel(logging.INFO)
+
+    def test_logs_params_and_duration(self):
+        @log_execution(logger=self.logger)
+        def add(a, b, scale=1):
+            return (a + b) * scale
+
+        with self.assertLogs(self.logger) as logs:
+            self.assertEqual(add(1, 2, scale=3), 9)
+
+        start, end = logs.records
+        self.assertEqual(str(start.params), "{'args': [1, 2], 'kwargs': {'scale': 3}}")
+        self.assertGreater(end.duration, 0)
+        self.assertIsInstance(end.duration, int)
+
+    def test_bounded_and_filtered_params(self):
+        @log_execution(
+            logger=self.logger, max_param_length=10, exclude_params=["password"]
+        )
+        def login(user, password, *rest, token=None, **options):
+            pass
+
+        with self.assertLogs(self.logger) as logs:
+            login("a" * 100, "secret", list(range(100)), token="t", password2="p")
+
+        self.assertEqual(
+            str(logs.records[0].params),
+            "{'args': ['aa...aaa', ..., [0, 1, 2, ...],"
+            " 'kwargs': {'token': 't', 'password2': 'p'}}",
+        )
+
+    def test_include_params(self):
+        @log_execution(logger=self.logger, include_params=["user"])
+        def login(user, password, *rest, token=None):
+            pass
+
+        with self.assertLogs(self.logger) as logs:
+            login("ana", "secret", 1, token="t")
+
+        self.assertEqual(
+            str(logs.records[0].params), "{'args': ['ana', ..., ...], 'kwargs': {}}"
+        )
+
+    def test_disabled_level_skips_rendering(self):
+        class Unrenderable:
+            def __repr__(self):
+                raise AssertionError("rendered while the level is disabled")
+
+        @log_execution(logger=self.logger, level=logging.DEBUG)
+        def identity(value):
+            return value
+
+        value = Unrenderable()
+        self.assertIs(identity(value), value)
+
+    def test_filtered_record_skips_rendering(self):
+        renders = 0
+
+        class Counted:
+            def __repr__(self):
+                nonlocal renders
+                renders += 1
+                return "Counted()"
+
+        @log_execution(logger=self.logger)
+        def identity(value):
+            return value
+
+        def drop(record):
+            return False
+
+        self.logger.addFilter(drop)
+        self.addCleanup(self.logger.removeFilter, drop)
+        value = Counted()
+        self.assertIs(identity(value), value)
+        self.assertEqual(renders, 0)
+
+    def test_disabled_level_still_captures_exceptions(self):
+        @log_execution(logger=self.logger, level=logging.DEBUG, capture_exception=True)
+        async def fail():
+            raise ValueError("boom")
+
+        with self.assertLogs(self.logger, logging.ERROR) as logs:
+            with self.assertRaises(ValueError):
+                asyncio.run(fail())
+
+        (record,) = logs.records
+        self.assertEqual(record.exc_info[0], ValueError)
+
+    def test_aggregate(self):
+        @log_execution(logger=self.logger, aggregate=True, aggregate_interval=3600)
+        def divide(a, b):
+            return a / b
+
+        @log_execution(logger=self.logger, aggregate=True, aggregate_interval=0)
+        async def wait():
+            pass
+
+        with self.assertNoLogs(self.logger):
+            for i in range(10):
+                divide(i, 1)
+            with self.assertRaises(ZeroDivisionError):
+                divide(1, 0)
+
+        with self.assertLogs(self.logger) as logs:
+            divide.execution_stats.emit(self.logger)
+            asyncio.run(wait())
+
+        divide_summary, wait_summary = logs.records
+        self.assertEqual(divide_summary.target, divide.__qualname__)
+        self.assertEqual((divide_summary.calls, divide_summary.errors), (11, 1))
+        self.assertLessEqual(divide_summary.p50, divide_summary.max)
+        self.assertEqual(wait_summary.calls, 1)
+
+    def test_aggregate_summary_logged_at_exit_in_async_mode(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "logs.jsonl")
+            code = textwrap.dedent(
+                f"""
+                from logninja import setup_logging
+                from logninja.configs import LogFileConfig
+                from logninja.decorators import log_execution
+
+                @log_execution(aggregate=True, aggregate_interval=3600)
+                def work():
+                    pass
+
+                setup_logging(
+                    log_file_config=LogFileConfig(filename={filename!r}),
+                    log_console_config=None,
+                    async_mode=True,
+                )
+                for _ in range(5):
+                    work()
+                """
+            )
+            subprocess.run([sys.executable, "-c", code], check=True)
+
+            with open(filename) as file:
+                summaries = [log for log in map(json.loads, file) if log.get("target")]
+        self.assertEqual(len(summaries), 1)
+        self.assertEqual(summaries[0]["calls"], 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import json
+import logging
+import sys
+import unittest
+
+from logninja.exception_storm_filter import ExceptionStormFilter
+from logninja.ninja_json_formatter import NinjaJsonFormatter
+from logninja.traceback import fingerprint
+from tests._helpers import make_record
+
+
+def fail(value: int):
+    raise ValueError(f"bad value {value}")
+
+
+def exc_info_for(value: int):
+    try:
+        fail(value)
+    except ValueError:
+        return sys.exc_info()
+
+
+def request_failed(value: int):
+    return make_record("Request failed", logging.ERROR, exc_info=exc_info_for(value))
+
+
+def other_exc_info():
+    try:
+        raise KeyError("missing")
+    except KeyError:
+        return sys.exc_info()
+
+
+class FingerprintTests(unittest.TestCase):
+    def test_same_stack_same_fingerprint(self):
+        self.assertEqual(fingerprint(exc_info_for(1)), fingerprint(exc_info_for(2)))
+        self.assertNotEqual(fingerprint(exc_info_for(1)), fingerprint(other_exc_info()))
+
+
+class ExceptionStormFilterTests(unittest.TestCase):
+    def test_repeats_in_window_are_reduced_to_references(self):
+        storm_filter = ExceptionStormFilter(window=60)
+        records = [request_failed(value) for value in range(3)]
+        for record in records:
+            self.assertTrue(storm_filter.filter(record))
+
+        self.assertIsNotNone(records[0].exc_info)
+        self.assertIsNone(records[1].exc_info)
+        self.assertIsNone(records[2].exc_info)
+        self.assertEqual([record.exc_repeat_count for record in records], [1, 2, 3])
+        self.assertEqual(len({record.exc_fingerprint for record in records}), 1)
+
+    def test_new_window_logs_in_full_again(self):
+        storm_filter = ExceptionStormFilter(window=0)
+        first = request_failed(1)
+        second = request_failed(2)
+        storm_filter.filter(first)
+        storm_filter.filter(second)
+
+        self.assertIsNotNone(second.exc_info)
+        self.assertEqual(second.exc_repeat_count, 1)
+
+    def test_shared_filter_counts_a_record_once(self):
+        storm_filter = ExceptionStormFilter()
+        record = request_failed(1)
+        storm_filter.filter(record)
+        storm_filter.filter(record)
+
+        self.assertIsNotNone(record.exc_info)
+        self.assertEqual(record.exc_repeat_count, 1)
+
+    def test_json_formatter_outputs_fingerprint(self):
+        storm_filter = ExceptionStormFilter()
+        formatter = NinjaJsonFormatter(extras=None)
+        first = request_failed(1)
+        second = request_failed(2)
+        storm_filter.filter(first)
+        storm_filter.filter(second)
+
+        first_log = json.loads(formatter.format(first))
+        second_log = json.loads(formatter.format(second))
+        unfiltered_log = json.loads(formatter.format(request_failed(3)))
+
+        self.assertIn("exc_info", first_log)
+        self.assertNotIn("exc_info", second_log)
+        self.assertEqual(first_log["exc_fingerprint"], second_log["exc_fingerprint"])
+        self.assertEqual(second_log["exc_repeat_count"], 2)
+        self.assertEqual(
+            unfiltered_log["exc_fingerprint"], first_log["exc_fingerprint"]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
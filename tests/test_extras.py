@@ -0,0 +1,74 @@
+import contextvars
+import logging
+import unittest
+
+from logninja.contextvars_filter import ContextVarsFilter
+from logninja.extras import compile_extras
+from logninja.options import All, Only
+
+trace_id = contextvars.ContextVar("trace_id", default="abc")
+
+
+class CapturingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+class ExtrasTests(unittest.TestCase):
+    def setUp(self):
+        self.handler = CapturingHandler()
+        self.handler.addFilter(ContextVarsFilter(contextvars=[trace_id]))
+        self.logger = logging.getLogger("logninja.tests.extras")
+        self.logger.addHandler(self.handler)
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+
+    def tearDown(self):
+        self.logger.removeHandler(self.handler)
+
+    def _log(self, **extra) -> logging.LogRecord:
+        self.logger.info("message", extra=extra)
+        return self.handler.records[-1]
+
+    def test_all_returns_extra_keys_and_filter_attributes(self):
+        record = self._log(user="admin", request_id=1)
+
+        self.assertEqual(
+            compile_extras(All())(record),
+            {"user": "admin", "request_id": 1, "trace_id": "abc"},
+        )
+
+    def test_all_skips_attributes_set_by_formatters(self):
+        record = self._log(user="admin")
+        logging.Formatter("%(asctime)s %(message)s").format(record)
+
+        self.assertEqual(
+            compile_extras(All())(record), {"user": "admin", "trace_id": "abc"}
+        )
+
+    def test_all_with_exclude(self):
+        record = self._log(user="admin", password="secret")
+
+        self.assertEqual(
+            compile_extras(All(exclude=["password", "trace_id"]))(record),
+            {"user": "admin"},
+        )
+
+    def test_only_and_none(self):
+        record = self._log(user="admin", password="secret")
+
+        self.assertEqual(compile_extras(Only(["user"]))(record), {"user": "admin"})
+        self.assertIsNone(compile_extras(None)(record))
+
+    def test_no_extras(self):
+        self.handler.filters.clear()
+
+        self.assertFalse(compile_extras(All())(self._log()))
+
+
+if __name__ == "__main__":
+    unittest.main()
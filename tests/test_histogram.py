@@ -0,0 +1,76 @@
+import random
+import unittest
+
+from logninja.histogram import LogLinearHistogram, bucket_bounds, bucket_index
+
+
+class LogLinearHistogramTests(unittest.TestCase):
+    def test_bucket_bounds_contain_values(self):
+        rng = random.Random(1234)
+        values = list(range(1000)) + [rng.randrange(1 << 32) for _ in range(1000)]
+        for value in values:
+            low, high = bucket_bounds(bucket_index(value))
+            self.assertLessEqual(low, value)
+            self.assertLessEqual(value, high)
+
+    def test_percentiles_within_bucket_error(self):
+        rng = random.Random(1234)
+        values = sorted(int(rng.lognormvariate(8, 1)) for _ in range(10_000))
+        histogram = LogLinearHistogram()
+        for value in values:
+            histogram.record(value)
+
+        for percent in (50, 90, 99):
+            exact = values[round(len(values) * percent / 100) - 1]
+            self.assertAlmostEqual(
+                histogram.percentile(percent), exact, delta=exact / 16
+            )
+        self.assertEqual(histogram.max, values[-1])
+        self.assertEqual(histogram.min, values[0])
+        self.assertEqual(histogram.count, len(values))
+
+    def test_merge(self):
+        rng = random.Random(1234)
+        values = [int(rng.lognormvariate(8, 1)) for _ in range(1000)]
+        whole, first, second = (LogLinearHistogram() for _ in range(3))
+        for index, value in enumerate(values):
+            whole.record(value)
+            (first if index % 2 else second).record(value)
+
+        first.merge(second)
+
+        self.assertEqual(first.counts, whole.counts)
+        self.assertEqual(
+            (first.count, first.total, first.min, first.max),
+            (whole.count, whole.total, whole.min, whole.max),
+        )
+        with self.assertRaises(ValueError):
+            first.merge(LogLinearHistogram(max_value_bits=64))
+
+    def test_record_all_and_scale_up(self):
+        rng = random.Random(1234)
+        values = [int(rng.lognormvariate(8, 2)) for _ in range(1000)] + [-5, 0, 7]
+        one_by_one, at_once, scaled = (LogLinearHistogram(64) for _ in range(3))
+        for value in values:
+            one_by_one.record(value)
+            scaled.record(max(value, 0) << 20)
+        at_once.record_all(values)
+
+        self.assertEqual(at_once.counts, one_by_one.counts)
+        self.assertEqual(
+            (at_once.count, at_once.total, at_once.min, at_once.max),
+            (one_by_one.count, one_by_one.total, one_by_one.min, one_by_one.max),
+        )
+        at_once.scale_up(20)
+        self.assertEqual(at_once.counts, scaled.counts)
+        self.assertEqual(at_once.total, scaled.total)
+
+    def test_empty_histogram(self):
+        histogram = LogLinearHistogram()
+
+        self.assertEqual(histogram.percentile(99), 0)
+        self.assertEqual(histogram.mean, 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
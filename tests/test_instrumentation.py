@@ -0,0 +1,115 @@
+import logging
+import os
+import sys
+import tempfile
+import unittest
+
+from logninja.instrumentation import HandlerStats, StatsReporter, stats
+from logninja.ninja_file_handler import NinjaFileHandler
+from logninja.ninja_queue_handler import DROP_NEWEST, NinjaQueueHandler
+from tests._helpers import make_record
+
+
+class StatsFormatter(logging.Formatter):
+    pass
+
+
+class HandlerStatsTests(unittest.TestCase):
+    def test_counts_records_and_bytes_per_level(self):
+        handler_stats = HandlerStats()
+        handler_stats.add(make_record("a"), 10, 100, 1000)
+        handler_stats.add(make_record("b"), 5, 300, 500)
+        handler_stats.add(make_record("c", logging.ERROR), 7, 200, 2000)
+
+        snapshot = handler_stats.snapshot()
+
+        self.assertEqual(snapshot["records"], {"INFO": 2, "ERROR": 1})
+        self.assertEqual(snapshot["bytes"], {"INFO": 15, "ERROR": 7})
+        self.assertEqual(snapshot["format_ns"], {"total": 600, "max": 300})
+        self.assertEqual(snapshot["write_ns"], {"total": 3500, "max": 2000})
+        self.assertEqual(snapshot["exceptions_formatted"], 0)
+
+    def test_counts_exceptions(self):
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            record = make_record("failed", logging.ERROR, exc_info=sys.exc_info())
+
+        handler_stats = HandlerStats()
+        handler_stats.add(record, 1, 1, 1)
+        handler_stats.add(make_record("ok"), 1, 1, 1)
+
+        self.assertEqual(handler_stats.snapshot()["exceptions_formatted"], 1)
+
+
+class StatsTests(unittest.TestCase):
+    def setUp(self):
+        fd, self.filename = tempfile.mkstemp()
+        os.close(fd)
+
+    def tearDown(self):
+        os.remove(self.filename)
+
+    def test_file_handler_stats(self):
+        handler = NinjaFileHandler(self.filename)
+        handler.set_name("stats-file")
+        formatter = StatsFormatter("%(message)s")
+        handler.setFormatter(formatter)
+        try:
+            handler.handle(make_record("hello"))
+            handler.handle(make_record("warné", logging.WARNING))
+        finally:
+            handler.close()
+
+        entry = stats()["handlers"]["stats-file"]
+        self.assertEqual(entry["records"], {"INFO": 1, "WARNING": 1})
+        self.assertEqual(entry["bytes"], {"INFO": 6, "WARNING": 7})
+        self.assertGreater(entry["write_ns"]["total"], 0)
+        self.assertEqual(entry["dropped"], 0)
+        formatter_entry = stats()["formatters"]["StatsFormatter"]
+        self.assertEqual(formatter_entry["records"], entry["records"])
+        self.assertEqual(formatter_entry["bytes"], entry["bytes"])
+        self.assertEqual(formatter_entry["format_ns"], entry["format_ns"])
+
+    def test_queue_handler_reports_dropped(self):
+        sink = logging.NullHandler()
+        handler = NinjaQueueHandler(sink, maxsize=1, overflow_policy=DROP_NEWEST)
+        handler.set_name("stats-queue")
+        for index in range(3):
+            handler.handle(make_record(f"record {index}"))
+
+        entry = stats()["handlers"]["stats-queue"]
+        self.assertEqual(entry["records"], {"INFO": 3})
+        self.assertEqual(entry["dropped"], 2)
+
+    def test_collected_handlers_are_forgotten(self):
+        handler = NinjaFileHandler(self.filename, delay=True)
+        handler.set_name("stats-collected")
+        self.assertIn("stats-collected", stats()["handlers"])
+
+        handler.close()
+        del handler
+
+        self.assertNotIn("stats-collected", stats()["handlers"])
+
+
+class StatsReporterTests(unittest.TestCase):
+    def test_report_logs_the_snapshot(self):
+        logger = logging.getLogger("test_stats_reporter")
+        with self.assertLogs(logger, logging.INFO) as logs:
+            StatsReporter(logger=logger).report()
+
+        self.assertEqual(len(logs.records), 1)
+        self.assertIsInstance(logs.records[0].logninja_stats, dict)
+
+    def test_start_and_stop(self):
+        reporter = StatsReporter(
+            interval=0.01, logger=logging.getLogger("test_stats_reporter")
+        )
+        reporter.start()
+        reporter.stop()
+        self.assertIsNone(reporter._thread)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,9 +1,23 @@
+import dataclasses
 import datetime as dt
+import enum
 import json
 import logging
 import unittest
 
 from logninja.ninja_json_formatter import NinjaJsonFormatter
+from logninja.options import All, Only
+from tests._helpers import make_record
+
+
+class Color(enum.Enum):
+    RED = "red"
+
+
+@dataclasses.dataclass
+class Point:
+    x: int
+    at: dt.datetime
 
 
 class NinjaJsonFormatterTests(unittest.TestCase):
@@ -40,6 +54,73 @@ class NinjaJsonFormatterTests(unittest.TestCase):
             json.loads(formatted_message),
         )
 
+    def test_extras_policies(self):
+        record = make_record()
+        record.user = "admin"
+        record.trace_id = "abc"
+
+        all_extras = json.loads(NinjaJsonFormatter(extras=All()).format(record))
+        only_extras = json.loads(
+            NinjaJsonFormatter(extras=Only(["trace_id"])).format(record)
+        )
+        no_extras = json.loads(NinjaJsonFormatter(extras=None).format(record))
+
+        self.assertEqual(all_extras["user"], "admin")
+        self.assertEqual(all_extras["trace_id"], "abc")
+        self.assertNotIn("user", only_extras)
+        self.assertEqual(only_extras["trace_id"], "abc")
+        self.assertNotIn("user", no_extras)
+        self.assertNotIn("trace_id", no_extras)
+
+    def test_invalid_extras_option(self):
+        with self.assertRaises(ValueError):
+            NinjaJsonFormatter(extras=["user"])
+
+    def test_encoders_produce_the_same_document(self):
+        record = make_record()
+        record.payload = {
+            "ids": [1, 2],
+            "when": dt.date(2024, 5, 24),
+            "at": dt.datetime(2024, 1, 1, 12),
+            "at_utc": dt.datetime(2024, 1, 1, 12, tzinfo=dt.timezone.utc),
+            "took": dt.timedelta(seconds=1.5),
+            "tags": {"a"},
+            "raw": b"ab",
+            "color": Color.RED,
+            "point": Point(1, dt.datetime(2024, 1, 1)),
+        }
+
+        expected = json.loads(NinjaJsonFormatter(encoder="json").format(record))
+        self.assertEqual(expected["payload"]["at"], "2024-01-01T12:00:00")
+        self.assertEqual(expected["payload"]["at_utc"], "2024-01-01T12:00:00Z")
+        self.assertEqual(expected["payload"]["took"], "PT1.5S")
+        self.assertEqual(expected["payload"]["color"], "red")
+        self.assertEqual(
+            expected["payload"]["point"], {"x": 1, "at": "2024-01-01T00:00:00"}
+        )
+        for encoder in ("orjson", "msgspec"):
+            try:
+                formatter = NinjaJsonFormatter(encoder=encoder)
+            except ImportError:
+                continue
+            with self.subTest(encoder=encoder):
+                self.assertEqual(expected, json.loads(formatter.format(record)))
+
+    def test_non_finite_floats_are_written_as_null(self):
+        record = make_record()
+        record.ratios = [float("nan"), float("inf"), -float("inf"), 0.5]
+        record.point = Point(float("nan"), None)
+
+        for encoder in ("json", "orjson", "msgspec"):
+            try:
+                formatter = NinjaJsonFormatter(encoder=encoder)
+            except ImportError:
+                continue
+            with self.subTest(encoder=encoder):
+                log = json.loads(formatter.format(record), parse_constant=self.fail)
+                self.assertEqual(log["ratios"], [None, None, None, 0.5])
+                self.assertEqual(log["point"], {"x": None, "at": None})
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,135 @@
+import datetime as dt
+import io
+import json
+import logging
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from unittest import mock
+
+from logninja.configs import IndexConfig
+from logninja.log_index import (
+    ALL_LEVELS,
+    LogReader,
+    index_filename,
+    main,
+    read_index_file,
+)
+from logninja.ninja_file_handler import NinjaFileHandler
+from logninja.ninja_json_formatter import NinjaJsonFormatter
+from logninja.timestamps import EPOCH_MILLIS
+from tests._helpers import make_record
+
+# Records of the tests are logged a second apart.
+INDEX_CONFIG = IndexConfig(every_records=10, every_seconds=60)
+
+
+class LogIndexTests(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.filename = os.path.join(directory.name, "logs.jsonl")
+
+    def write(self, records, index_config=INDEX_CONFIG, **kwargs):
+        handler = NinjaFileHandler(self.filename, index_config=index_config)
+        handler.setFormatter(NinjaJsonFormatter(**kwargs))
+        try:
+            for record in records:
+                handler.handle(record)
+        finally:
+            handler.close()
+
+    def messages(self, **query):
+        return [
+            json.loads(line)["message"]
+            for line in LogReader(self.filename).iter_lines(**query)
+        ]
+
+    def test_blocks_cover_the_file(self):
+        self.write(make_record(f"record é {i}", created=1000.0 + i) for i in range(25))
+
+        blocks = read_index_file(index_filename(self.filename))
+
+        self.assertEqual([block.count for block in blocks], [10, 10, 5])
+        self.assertEqual(blocks[0].start, 0)
+        self.assertEqual(blocks[1].start, blocks[0].end)
+        self.assertEqual(blocks[-1].end, os.path.getsize(self.filename))
+        self.assertEqual((blocks[1].min_created, blocks[1].max_created), (1010, 1019))
+
+    def test_blocks_are_closed_every_seconds(self):
+        self.write(
+            (make_record(f"record {i}", created=1000.0 + i * 0.4) for i in range(6)),
+            index_config=IndexConfig(every_records=100, every_seconds=1.0),
+        )
+
+        blocks = read_index_file(index_filename(self.filename))
+        self.assertEqual([block.count for block in blocks], [3, 3])
+
+    def test_level_query_only_scans_matching_blocks(self):
+        records = [make_record(f"record {i}", created=1000.0 + i) for i in range(50)]
+        records[23] = make_record("failed", logging.ERROR, created=1023.0)
+        self.write(records)
+
+        reader = LogReader(self.filename)
+        (byte_range,) = reader.ranges(min_level=logging.ERROR)
+
+        self.assertEqual(byte_range.start, reader.blocks[2].start)
+        self.assertEqual(byte_range.stop, reader.blocks[2].end)
+        self.assertEqual(self.messages(min_level=logging.ERROR), ["failed"])
+
+    def test_time_query(self):
+        self.write(
+            (make_record(f"record {i}", created=1000.0 + i) for i in range(50)),
+            timestamp_format=EPOCH_MILLIS,
+        )
+
+        since = dt.datetime.fromtimestamp(1012, tz=dt.timezone.utc)
+        messages = self.messages(since=since, until=1014.0)
+
+        self.assertEqual(messages, ["record 12", "record 13", "record 14"])
+        self.assertEqual(len(LogReader(self.filename).ranges(1012, 1014)), 1)
+
+    def test_unindexed_records_are_always_scanned(self):
+        self.write([make_record("indexed", created=1000.0)])
+        self.write([make_record("not indexed", created=2000.0)], index_config=None)
+        self.write([make_record("indexed again", created=3000.0)])
+
+        blocks = read_index_file(index_filename(self.filename))
+
+        self.assertEqual(blocks[1].levels, ALL_LEVELS)
+        self.assertEqual(self.messages(since=1500, until=2500), ["not indexed"])
+
+    def test_lines_without_a_trailing_newline(self):
+        with open(self.filename, "wb") as file:
+            file.write(b'{"message":"crlf"}\r\n\n{"message":"last"}')
+
+        self.assertEqual(self.messages(), ["crlf", "last"])
+
+    def test_cleared_log_starts_a_new_index(self):
+        self.write(make_record(f"record {i}", created=1000.0 + i) for i in range(30))
+        open(self.filename, "w").close()
+        self.write([make_record("after", created=5000.0)])
+
+        blocks = read_index_file(index_filename(self.filename))
+
+        self.assertEqual(len(blocks), 1)
+        self.assertEqual(self.messages(), ["after"])
+
+    def test_cli(self):
+        records = [make_record(f"record {i}", created=1000.0 + i) for i in range(20)]
+        records[5] = make_record("failed", logging.ERROR, created=1005.0)
+        self.write(records)
+
+        output = io.TextIOWrapper(io.BytesIO())
+        with redirect_stdout(output), mock.patch("sys.stdout", output):
+            main([self.filename, "--level", "error"])
+        output.flush()
+
+        lines = output.buffer.getvalue().decode().splitlines()
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(json.loads(lines[0])["message"], "failed")
+
+
+if __name__ == "__main__":
+    unittest.main()
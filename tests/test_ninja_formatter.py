@@ -0,0 +1,63 @@
+import datetime as dt
+import unittest
+
+from logninja.ninja_formatter import NinjaFormatter
+from logninja.options import Only
+from tests._helpers import make_record
+
+
+class NinjaFormatterTests(unittest.TestCase):
+    def test_format(self):
+        record = make_record()
+        record.user = "admin"
+        record.trace_id = "abc"
+        formatter = NinjaFormatter(extras=Only(["user"]), max_message_length=20)
+
+        expected_time = dt.datetime.fromtimestamp(record.created).strftime(
+            "%Y-%m-%d %H:%M:%S"
+        )
+        self.assertEqual(
+            formatter.format(record),
+            f"[{expected_time}][INFO    ] Test message{' ' * 11} (test_logger)"
+            " file.py:10  [user=admin]",
+        )
+
+    def test_format_fields(self):
+        record = make_record("GET /users 200")
+        record.user = "admin"
+        formatter = NinjaFormatter(extras=Only(["user"]))
+
+        fields = formatter.format_fields(record)
+
+        self.assertEqual(fields.level, "[INFO    ]")
+        self.assertEqual(fields.path, "file.py:10")
+        self.assertEqual(fields.extras, {"user": "admin"})
+        self.assertEqual(fields.to_text(), formatter.format(record))
+
+    def test_long_messages_are_truncated(self):
+        formatter = NinjaFormatter(max_message_length=4)
+
+        self.assertIn("] Test... (test_logger)", formatter.format(make_record()))
+
+    def test_messages_of_max_length_are_kept_as_is(self):
+        formatter = NinjaFormatter(max_message_length=len("Test message"))
+
+        self.assertIn("] Test message (test_logger)", formatter.format(make_record()))
+
+    def test_json_messages_are_unwrapped_only_on_opt_in(self):
+        record = make_record('{"message": "inner"}')
+
+        self.assertIn(
+            '{"message": "inner"}',
+            NinjaFormatter(max_message_length=None).format(record),
+        )
+        self.assertIn(
+            "] inner (test_logger)",
+            NinjaFormatter(max_message_length=None, unwrap_json_message=True).format(
+                record
+            ),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
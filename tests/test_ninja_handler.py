@@ -0,0 +1,71 @@
+import io
+import unittest
+from unittest import mock
+
+from logninja.configs import BufferConfig
+from logninja.ninja_console import NinjaConsole
+from logninja.ninja_formatter import NinjaFormatter
+from logninja.ninja_handler import NinjaHandler
+from logninja.ninja_json_formatter import NinjaJsonFormatter
+from tests._helpers import make_record
+
+
+class NinjaHandlerTests(unittest.TestCase):
+    def test_json_formatter_dispatches_to_print_json(self):
+        console = mock.Mock()
+        handler = NinjaHandler(
+            formatter=NinjaJsonFormatter(extras=None), console=console
+        )
+
+        with mock.patch.object(handler, "is_json") as is_json:
+            handler.emit(make_record())
+
+        is_json.assert_not_called()
+        console.print_json.assert_called_once()
+        console.print.assert_not_called()
+
+    def test_text_formatter_dispatches_to_print(self):
+        console = mock.Mock()
+        handler = NinjaHandler(formatter=NinjaFormatter(), console=console)
+
+        with mock.patch.object(handler, "is_json") as is_json:
+            handler.emit(make_record('{"message": "looks like json"}'))
+
+        is_json.assert_not_called()
+        console.print.assert_called_once()
+        console.print_json.assert_not_called()
+
+    def test_handlers_sharing_a_console_get_their_own_writer(self):
+        stream = io.StringIO()
+        console = NinjaConsole()
+        console.stream = stream
+        buffered = NinjaHandler(
+            formatter=NinjaFormatter(),
+            console=console,
+            buffer_config=BufferConfig(max_latency=60),
+        )
+        other = NinjaHandler(
+            formatter=NinjaFormatter(),
+            console=console,
+            buffer_config=BufferConfig(max_records=1, max_latency=60),
+        )
+        unbuffered = NinjaHandler(formatter=NinjaFormatter(), console=console)
+
+        self.assertIs(console.stream, stream)
+        self.assertIsNot(buffered.writer, other.writer)
+        buffered.emit(make_record("buffered"))
+        self.assertEqual(stream.getvalue(), "")
+        other.emit(make_record("other"))
+        unbuffered.emit(make_record("unbuffered"))
+        self.assertNotIn("buffered", stream.getvalue().replace("unbuffered", ""))
+        self.assertIn("other", stream.getvalue())
+        self.assertIn("unbuffered", stream.getvalue())
+
+        other.close()
+        buffered.close()
+        self.assertIn("buffered", stream.getvalue().replace("unbuffered", ""))
+        self.assertFalse(stream.closed)
+
+
+if __name__ == "__main__":
+    unittest.main()
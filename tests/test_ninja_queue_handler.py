@@ -0,0 +1,105 @@
+import io
+import json
+import logging
+import unittest
+from unittest import mock
+
+from logninja.extras import All
+from logninja.ninja_console import NinjaConsole
+from logninja.ninja_handler import NinjaHandler
+from logninja.ninja_json_formatter import NinjaJsonFormatter
+from logninja.ninja_queue_handler import (
+    BLOCK,
+    DROP_NEWEST,
+    DROP_OLDEST,
+    NinjaQueueHandler,
+)
+from tests._helpers import make_record
+
+
+class CollectingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+class NinjaQueueHandlerTests(unittest.TestCase):
+    def _fill(self, overflow_policy: str) -> NinjaQueueHandler:
+        sink = CollectingHandler()
+        handler = NinjaQueueHandler(sink, maxsize=2, overflow_policy=overflow_policy)
+        for index in range(3):
+            handler.handle(make_record("record %d", args=(index,)))
+        return handler
+
+    def test_drop_newest_keeps_queued_records(self):
+        handler = self._fill(DROP_NEWEST)
+        handler.start()
+        handler.close()
+
+        self.assertEqual(handler.handler.messages, ["record 0", "record 1"])
+        self.assertEqual(handler.dropped_newest, 1)
+        self.assertEqual(handler.dropped, 1)
+
+    def test_drop_oldest_keeps_latest_records(self):
+        handler = self._fill(DROP_OLDEST)
+        handler.start()
+        handler.close()
+
+        self.assertEqual(handler.handler.messages, ["record 1", "record 2"])
+        self.assertEqual(handler.dropped_oldest, 1)
+
+    def test_close_flushes_pending_records(self):
+        sink = CollectingHandler()
+        handler = NinjaQueueHandler(sink, maxsize=10, overflow_policy=BLOCK)
+        handler.start()
+        for index in range(100):
+            handler.handle(make_record("record %d", args=(index,)))
+        handler.close()
+
+        self.assertEqual(len(sink.messages), 100)
+        self.assertEqual(handler.dropped, 0)
+
+    def test_unformattable_record_does_not_stop_the_listener(self):
+        console = NinjaConsole()
+        console.stream = io.StringIO()
+        sink = NinjaHandler(NinjaJsonFormatter(extras=All()), console=console)
+        handler = NinjaQueueHandler(sink, maxsize=1)
+        handler.start()
+        circular = {}
+        circular["self"] = circular
+
+        with mock.patch.object(logging, "raiseExceptions", False):
+            handler.handle(make_record("bad", payload=circular))
+            handler.handle(make_record("good"))
+            handler.close()
+
+        lines = console.stream.getvalue().splitlines()
+        self.assertEqual([json.loads(line)["message"] for line in lines], ["good"])
+
+    def test_raising_handler_does_not_stop_the_listener(self):
+        class FailingHandler(CollectingHandler):
+            def emit(self, record):
+                if record.getMessage() == "bad":
+                    raise ValueError("boom")
+                super().emit(record)
+
+        handler = NinjaQueueHandler(FailingHandler(), maxsize=1)
+        handler.start()
+        with mock.patch.object(logging, "raiseExceptions", False):
+            handler.handle(make_record("bad"))
+            handler.handle(make_record("good"))
+            self.assertTrue(handler.listener._thread.is_alive())
+            handler.close()
+
+        self.assertEqual(handler.handler.messages, ["good"])
+
+    def test_invalid_overflow_policy(self):
+        with self.assertRaises(ValueError):
+            NinjaQueueHandler(CollectingHandler(), overflow_policy="ignore")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import io
+import logging
+import unittest
+
+from logninja.ninja_formatter import NinjaFormatter
+from logninja.ninja_handler import NinjaHandler
+from logninja.ninja_rich_console import NinjaRichConsole, highlight
+from logninja.options import All
+
+
+class HighlightTests(unittest.TestCase):
+    def test_formatted_line(self):
+        line = (
+            '[2024-06-01 19:52:07][INFO    ] GET /users HTTP/1.1" 404'
+            " (uvicorn) middleware.py:88  [status=404, client-host=local]"
+        )
+        self.assertEqual(
+            highlight(line),
+            "[dim][2024-06-01 19:52:07][/dim][green][INFO    ][/green]"
+            ' [bold]GET[/bold] /users HTTP/1.1" [bold red]404[/bold red]'
+            " [orange4](uvicorn)[/orange4]"
+            " [dim underline]middleware.py:88[/dim underline]"
+            "  [[yellow]status[/yellow]=[blue]404[/blue],"
+            " [yellow]client-host[/yellow]=[blue]local[/blue]]",
+        )
+
+    def test_methods_and_status_codes_are_whole_words(self):
+        self.assertEqual(highlight("TARGETS 1234 GETPOST"), "TARGETS 1234 GETPOST")
+
+    def test_cached_markup_ignores_timestamp(self):
+        first = highlight("[2024-06-01 19:52:07][ERROR   ] boom")
+        second = highlight("[2024-06-01 19:52:08][ERROR   ] boom")
+        self.assertEqual(
+            second,
+            "[dim][2024-06-01 19:52:08][/dim][bold red][ERROR   ][/bold red] boom",
+        )
+        self.assertNotEqual(first, second)
+
+    def test_print(self):
+        console = NinjaRichConsole(file=io.StringIO(), width=200)
+        console.print("[INFO    ] POST /orders 201")
+        self.assertEqual(console.file.getvalue(), "[INFO    ] POST /orders 201\n")
+
+    def test_handler_prints_fields(self):
+        console = NinjaRichConsole(file=io.StringIO(), width=300)
+        formatter = NinjaFormatter(extras=All())
+        handler = NinjaHandler(formatter=formatter, console=console)
+        record = logging.makeLogRecord(
+            {"msg": "POST /orders 201", "levelno": logging.INFO, "user": "ana"}
+        )
+
+        handler.emit(record)
+
+        self.assertTrue(handler.print_fields)
+        self.assertEqual(console.file.getvalue(), formatter.format(record) + "\n")
+        self.assertEqual(
+            handler.stats.bytes, {logging.INFO: len(formatter.format(record))}
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
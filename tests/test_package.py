@@ -0,0 +1,42 @@
+import subprocess
+import sys
+import unittest
+
+import logninja
+from logninja.configs import LogConsoleConfig, LogFileConfig
+
+
+class PackageImportTests(unittest.TestCase):
+    def test_import_defers_configs_and_handlers(self):
+        code = (
+            "import sys, logninja;"
+            "print(' '.join(sorted(m for m in sys.modules if m.startswith('logninja'))))"
+        )
+        output = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True
+        ).stdout.split()
+
+        self.assertEqual(
+            output, ["logninja", "logninja.instrumentation", "logninja.logger"]
+        )
+
+    def test_lazy_attributes(self):
+        from logninja.decorators import log_execution
+        from logninja.ninja_handler import NinjaHandler
+
+        self.assertIs(logninja.log_execution, log_execution)
+        self.assertIs(logninja.NinjaHandler, NinjaHandler)
+        self.assertIn("LogFileConfig", dir(logninja))
+        with self.assertRaises(AttributeError):
+            logninja.missing
+
+
+class ConfigDefaultsTests(unittest.TestCase):
+    def test_configs_do_not_share_formatters_or_consoles(self):
+        self.assertIsNot(LogFileConfig().fmt, LogFileConfig().fmt)
+        self.assertIsNot(LogConsoleConfig().fmt, LogConsoleConfig().fmt)
+        self.assertIsNot(LogConsoleConfig().console, LogConsoleConfig().console)
+
+
+if __name__ == "__main__":
+    unittest.main()
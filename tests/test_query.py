@@ -0,0 +1,209 @@
+import io
+import json
+import logging
+import os
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from unittest import mock
+
+from logninja.configs import IndexConfig
+from logninja.extras import All
+from logninja.ninja_file_handler import NinjaFileHandler
+from logninja.ninja_json_formatter import NinjaJsonFormatter
+from logninja.query import Aggregation, Predicate, Query, main, process_chunk, run_query
+from tests._helpers import make_record
+
+
+def requests():
+    records = []
+    for index in range(100):
+        records.append(
+            make_record(
+                f"request {index}",
+                created=1000.0 + index,
+                level=logging.ERROR if index % 10 == 0 else logging.INFO,
+                name="app.db" if index % 4 == 0 else "app.http",
+                url="/users" if index % 2 else "/orders",
+                status_code=500 if index % 10 == 0 else 200,
+                duration=(index + 1) * 1000,
+            )
+        )
+    return records
+
+
+class QueryTests(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.filename = os.path.join(directory.name, "logs.jsonl")
+
+    def write(self, records, index_config=None, **kwargs):
+        handler = NinjaFileHandler(self.filename, index_config=index_config)
+        handler.setFormatter(NinjaJsonFormatter(extras=All(), **kwargs))
+        try:
+            for record in records:
+                handler.handle(record)
+        finally:
+            handler.close()
+
+    def query(self, query, **kwargs):
+        lines, groups = [], {}
+        for chunk_lines, aggregation in run_query([self.filename], query, **kwargs):
+            lines.extend(chunk_lines)
+            for key, (count, *_) in aggregation.groups.items():
+                groups[key] = groups.get(key, 0) + count
+        return lines, groups
+
+    def messages(self, query, **kwargs):
+        lines, _ = self.query(query, **kwargs)
+        return [json.loads(line)["message"] for line in lines]
+
+    def test_filters(self):
+        self.write(requests())
+
+        errors = self.messages(Query(min_level=logging.ERROR, loggers=["app.db"]))
+        since = self.messages(Query(since=1095.0, until=1097.0))
+        slow = self.messages(
+            Query(predicates=[Predicate.parse("duration>=98000")]),
+        )
+        users = self.messages(Query(predicates=[Predicate.parse("url=/users")]), jobs=1)
+
+        self.assertEqual(
+            errors,
+            ["request 0", "request 20", "request 40", "request 60", "request 80"],
+        )
+        self.assertEqual(since, ["request 95", "request 96", "request 97"])
+        self.assertEqual(slow, ["request 97", "request 98", "request 99"])
+        self.assertEqual(len(users), 50)
+
+    def test_time_range_of_every_timestamp_format(self):
+        for timestamp_format in ("iso", "rfc3339", "epoch_millis"):
+            with self.subTest(timestamp_format=timestamp_format):
+                if os.path.exists(self.filename):
+                    os.remove(self.filename)
+                self.write(requests(), timestamp_format=timestamp_format)
+
+                messages = self.messages(Query(since=1095.0, until=1097.0))
+
+                self.assertEqual(messages, ["request 95", "request 96", "request 97"])
+
+    def test_logger_includes_children_only(self):
+        self.write(
+            [
+                make_record("child", created=1000.0, name="app.db.pool"),
+                make_record("other", created=1001.0, name="app.dbx"),
+            ]
+        )
+
+        self.assertEqual(self.messages(Query(loggers=["app.db"])), ["child"])
+
+    def test_non_ascii_logger(self):
+        self.write([make_record("accented", created=1000.0, name="app.café")])
+
+        self.assertEqual(self.messages(Query(loggers=["app.café"])), ["accented"])
+
+    def test_escaped_values_and_tracebacks(self):
+        try:
+            raise RuntimeError("boom")
+        except RuntimeError:
+            record = make_record("failed", created=1000.0, url='/a "quoted" path')
+            record.exc_info = sys.exc_info()
+        self.write([record, make_record("ok", created=1001.0, url="/b")])
+
+        quoted = self.messages(
+            Query(predicates=[Predicate.parse('url=/a "quoted" path')])
+        )
+        regex = self.messages(Query(predicates=[Predicate.parse("url~quoted")]))
+
+        self.assertEqual(quoted, ["failed"])
+        self.assertEqual(regex, ["failed"])
+
+    def test_parallel_chunks_match_single_process(self):
+        self.write(requests())
+        query = Query(group_by=["url", "status_code"], count_only=True)
+
+        _, expected = self.query(query, jobs=1)
+        _, parallel = self.query(query, jobs=2, chunk_size=1024)
+
+        self.assertEqual(parallel, expected)
+        self.assertEqual(expected[("/users", 200)], 50)
+        self.assertEqual(expected[("/orders", 500)], 10)
+
+    def test_index_skips_blocks(self):
+        self.write(requests(), IndexConfig(every_records=10, every_seconds=60))
+        query = Query(since=1050.0, until=1052.0)
+
+        with mock.patch("logninja.query.process_chunk", wraps=process_chunk) as process:
+            messages = self.messages(query, jobs=1)
+        scanned = sum(end - start for (_, start, end, _), _ in process.call_args_list)
+
+        self.assertEqual(messages, ["request 50", "request 51", "request 52"])
+        self.assertLess(scanned, os.path.getsize(self.filename) / 5)
+
+    def test_cli_aggregation(self):
+        self.write(requests())
+
+        output = io.StringIO()
+        with redirect_stdout(output):
+            main(
+                [
+                    self.filename,
+                    "--group-by",
+                    "url",
+                    "--field",
+                    "duration",
+                    "--percentiles",
+                    "50,100",
+                    "--json",
+                ]
+            )
+
+        rows = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual([row["url"] for row in rows], ["/orders", "/users"])
+        self.assertEqual([row["count"] for row in rows], [50, 50])
+        self.assertEqual(rows[1]["max"], 100000)
+        self.assertAlmostEqual(rows[1]["p50"], 50000, delta=50000 / 16)
+        self.assertAlmostEqual(rows[1]["p100"], 100000, delta=100000 / 16)
+
+    def test_percentiles_of_mixed_ints_and_floats(self):
+        records = [make_record("int", created=1000.0, duration=2)]
+        records += [
+            make_record("float", created=1001.0 + i, duration=0.5) for i in range(3)
+        ]
+        self.write(records)
+        query = Query(value_field="duration", percentiles=[100])
+
+        for chunk_size in (None, 1):
+            with self.subTest(chunk_size=chunk_size):
+                aggregation = Aggregation()
+                for _, chunk in run_query(
+                    [self.filename], query, jobs=1, chunk_size=chunk_size
+                ):
+                    aggregation.merge(chunk)
+                (row,) = aggregation.rows(query)
+
+                self.assertEqual(row["count"], 4)
+                self.assertEqual(row["mean"], 0.875)
+                self.assertAlmostEqual(row["p100"], 2, delta=2 / 16)
+
+    def test_cli_lines(self):
+        self.write(requests())
+
+        output = io.TextIOWrapper(io.BytesIO())
+        with redirect_stdout(output), mock.patch("sys.stdout", output):
+            main([self.filename, "--where", "status_code>=500", "--limit", "2"])
+        output.flush()
+
+        lines = output.buffer.getvalue().decode().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(json.loads(lines[0])["message"], "request 0")
+
+    def test_invalid_predicate(self):
+        with self.assertRaises(ValueError):
+            Predicate.parse("duration")
+
+
+if __name__ == "__main__":
+    unittest.main()
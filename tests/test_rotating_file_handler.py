@@ -0,0 +1,125 @@
+import gzip
+import os
+import tempfile
+import time
+import unittest
+
+from logninja.configs import BufferConfig, IndexConfig, RotationConfig
+from logninja.log_index import LogReader, index_filename
+from logninja.ninja_formatter import NinjaFormatter
+from logninja.rotating_file_handler import NinjaRotatingFileHandler
+from tests._helpers import make_record
+
+
+class NinjaRotatingFileHandlerTests(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.filename = os.path.join(directory.name, "logs.jsonl")
+
+    def make_handler(self, **kwargs) -> NinjaRotatingFileHandler:
+        buffer_config = kwargs.pop("buffer_config", None)
+        index_config = kwargs.pop("index_config", None)
+        handler = NinjaRotatingFileHandler(
+            self.filename,
+            rotation_config=RotationConfig(**kwargs),
+            buffer_config=buffer_config,
+            index_config=index_config,
+        )
+        handler.setFormatter(NinjaFormatter(max_message_length=None))
+        return handler
+
+    def read_segments(self, handler):
+        contents = []
+        for path in handler.archiver.segments():
+            with gzip.open(path, "rt") as file:
+                contents.append(file.read().count("\n"))
+        return contents
+
+    def test_rotates_on_size_and_compresses(self):
+        handler = self.make_handler(max_bytes=400, backup_count=None)
+        for i in range(10):
+            handler.emit(make_record(f"message {i}" + "x" * 50))
+        handler.close()
+
+        self.assertEqual(self.read_segments(handler), [3, 3, 3])
+        with open(self.filename) as file:
+            self.assertEqual(file.read().count("\n"), 1)
+        leftovers = [
+            name
+            for name in os.listdir(os.path.dirname(self.filename))
+            if not name.endswith(".gz") and name != "logs.jsonl"
+        ]
+        self.assertEqual(leftovers, [])
+
+    def test_retention_by_count_and_total_bytes(self):
+        handler = self.make_handler(max_bytes=100, backup_count=3)
+        for i in range(10):
+            handler.emit(make_record(f"message {i}" + "x" * 50))
+        handler.close()
+        self.assertEqual(len(handler.archiver.segments()), 3)
+
+        segment_size = os.path.getsize(handler.archiver.segments()[-1])
+        handler = self.make_handler(
+            max_bytes=100, backup_count=None, max_total_bytes=2 * segment_size + 10
+        )
+        for i in range(5):
+            handler.emit(make_record(f"message {i}" + "x" * 50))
+        handler.close()
+        self.assertEqual(len(handler.archiver.segments()), 2)
+
+    def test_rotates_on_interval(self):
+        handler = self.make_handler(
+            interval=0.05, compress=False, buffer_config=BufferConfig(max_latency=60)
+        )
+        handler.emit(make_record("before"))
+        time.sleep(0.1)
+        handler.emit(make_record("after"))
+        handler.close()
+
+        (segment,) = handler.archiver.segments()
+        with open(segment) as file:
+            self.assertIn("before", file.read())
+        with open(self.filename) as file:
+            self.assertIn("after", file.read())
+
+    def test_segments_keep_their_index(self):
+        for backup_count in (2, 0):
+            with self.subTest(backup_count=backup_count):
+                self.filename = os.path.join(
+                    os.path.dirname(self.filename), f"logs-{backup_count}.jsonl"
+                )
+                handler = self.make_handler(
+                    max_bytes=400,
+                    backup_count=backup_count,
+                    compress=False,
+                    index_config=IndexConfig(),
+                )
+                for i in range(10):
+                    handler.emit(make_record(f"message {i}" + "x" * 50))
+                handler.close()
+
+                segments = handler.archiver.segments()
+                self.assertEqual(len(segments), backup_count)
+                for segment in segments:
+                    lines = list(LogReader(segment).iter_lines())
+                    self.assertEqual(len(lines), 3)
+                    self.assertTrue(LogReader(segment).blocks)
+                self.assertEqual(
+                    len(LogReader(self.filename).blocks), 1, "live index was pruned"
+                )
+                indexes = [
+                    name
+                    for name in os.listdir(os.path.dirname(self.filename))
+                    if name.startswith(f"logs-{backup_count}") and name.endswith(".idx")
+                ]
+                self.assertEqual(len(indexes), backup_count + 1)
+                self.assertIn(os.path.basename(index_filename(self.filename)), indexes)
+
+    def test_requires_a_trigger(self):
+        with self.assertRaises(ValueError):
+            NinjaRotatingFileHandler(self.filename, rotation_config=RotationConfig())
+
+
+if __name__ == "__main__":
+    unittest.main()
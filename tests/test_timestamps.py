@@ -0,0 +1,53 @@
+import datetime as dt
+import random
+import unittest
+
+from logninja.timestamps import (
+    epoch_millis,
+    get_timestamp_renderer,
+    isoformat_utc,
+    parse_timestamp,
+    rfc3339_utc,
+    strftime_local,
+)
+
+
+class TimestampsTests(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(1234)
+        base = 1716580291.0
+        self.timestamps = [base, base + 0.5, base + 0.9999996, base + 0.000001]
+        self.timestamps += [base + rng.random() * 5 for _ in range(1000)]
+
+    def test_isoformat_utc_matches_datetime(self):
+        for created in self.timestamps:
+            expected = dt.datetime.fromtimestamp(
+                created, tz=dt.timezone.utc
+            ).isoformat()
+            self.assertEqual(isoformat_utc(created), expected)
+
+    def test_strftime_local_matches_datetime(self):
+        fmt = "%Y-%m-%d %H:%M:%S"
+        for created in self.timestamps:
+            expected = dt.datetime.fromtimestamp(created).strftime(fmt)
+            self.assertEqual(strftime_local(created, fmt), expected)
+
+    def test_alternate_representations(self):
+        created = 1716580291.402206
+        self.assertEqual(rfc3339_utc(created), "2024-05-24T19:51:31.402Z")
+        self.assertEqual(epoch_millis(created), 1716580291402)
+
+    def test_parse_timestamp_reads_both_formats(self):
+        for created in self.timestamps:
+            for render in (isoformat_utc, rfc3339_utc):
+                parsed = parse_timestamp(render(created))
+                self.assertEqual(parsed.utcoffset(), dt.timedelta(0))
+                self.assertAlmostEqual(parsed.timestamp(), created, delta=0.001)
+
+    def test_invalid_timestamp_format(self):
+        with self.assertRaises(ValueError):
+            get_timestamp_renderer("unix")
+
+
+if __name__ == "__main__":
+    unittest.main()
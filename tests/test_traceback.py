@@ -0,0 +1,96 @@
+import sys
+import time
+import unittest
+
+from logninja.traceback import extract, format_exception, to_repr
+
+
+def raise_at_depth(depth: int, payload=None):
+    if depth <= 0:
+        raise ValueError("boom")
+    local_payload = payload  # noqa: F841
+    raise_at_depth(depth - 1, payload)
+
+
+def exc_info_at_depth(depth: int, payload=None):
+    try:
+        raise_at_depth(depth, payload)
+    except ValueError:
+        return sys.exc_info()
+
+
+class TracebackTests(unittest.TestCase):
+    def test_keeps_head_and_tail_of_deep_stacks(self):
+        exc_info = exc_info_at_depth(100)
+        (stack,) = format_exception(exc_info, max_frames=10, show_locals=False)
+        total = len(extract(*exc_info).stacks[0].frames)
+
+        self.assertEqual(len(stack["frames"]), 11)
+        self.assertEqual(stack["frames"][0]["name"], "exc_info_at_depth")
+        self.assertEqual(stack["frames"][5]["name"], f"Skipped frames: {total - 10}")
+        self.assertEqual(stack["frames"][-1]["name"], "raise_at_depth")
+        self.assertEqual(
+            [frame["lineno"] for frame in stack["frames"][-5:]],
+            [frame.lineno for frame in extract(*exc_info).stacks[0].frames[-5:]],
+        )
+
+    def test_short_stacks_are_not_truncated(self):
+        exc_info = exc_info_at_depth(3)
+        (stack,) = format_exception(exc_info, max_frames=10)
+
+        self.assertEqual(len(stack["frames"]), 5)
+        self.assertEqual(stack["exc_type"], "ValueError")
+        self.assertEqual(stack["frames"][-1]["locals"]["depth"], "0")
+
+    def test_locals_budget(self):
+        exc_info = exc_info_at_depth(20, payload="x" * 100)
+        (stack,) = format_exception(
+            exc_info, max_frames=None, locals_max_string=100, locals_max_total=500
+        )
+
+        with_locals = [frame for frame in stack["frames"] if frame["locals"]]
+        self.assertLess(len(with_locals), len(stack["frames"]))
+        self.assertEqual(stack["frames"][-1]["locals"]["depth"], "0")
+        self.assertIsNone(stack["frames"][0]["locals"])
+
+    def test_locals_budget_serves_raised_exception_first(self):
+        try:
+            try:
+                raise_at_depth(20, payload="x" * 100)
+            except ValueError as error:
+                raise RuntimeError("wrapped") from error
+        except RuntimeError:
+            exc_info = sys.exc_info()
+
+        raised, cause = format_exception(
+            exc_info, max_frames=10, locals_max_string=100, locals_max_total=50
+        )
+
+        self.assertEqual(raised["exc_type"], "RuntimeError")
+        self.assertIsNotNone(raised["frames"][-1]["locals"])
+        self.assertIsNone(cause["frames"][-1]["locals"])
+
+    def test_large_containers_have_bounded_repr(self):
+        value = to_repr(list(range(1_000_000)), max_string=None)
+
+        self.assertTrue(value.startswith("[0, 1, 2"))
+        self.assertLess(len(value), 100)
+
+    def test_nested_large_values_have_bounded_repr(self):
+        rows = {"rows": list(range(3_000_000)), "blob": b"x" * 10_000_000}
+        exc_info = exc_info_at_depth(0, payload=rows)
+
+        start = time.perf_counter()
+        (stack,) = format_exception(
+            exc_info, locals_max_string=None, locals_max_seconds=None
+        )
+        elapsed = time.perf_counter() - start
+
+        payload = stack["frames"][-1]["locals"]["payload"]
+        self.assertIn("'rows': [0, 1, 2", payload)
+        self.assertLess(len(payload), 300)
+        self.assertLess(elapsed, 0.05)
+
+
+if __name__ == "__main__":
+    unittest.main()